@@ -0,0 +1,194 @@
+# CPU y memoria por request de cada lambda_handler, sin base de datos: la
+# conexión se reemplaza por tests/unit/fake_db.py y cada consulta devuelve N
+# filas sintéticas. Mide validación, armado de dicts y serialización.
+#   python -m benchmarks.handlers [--rows 1000] [--check] [--update-baseline]
+# --check compara contra benchmarks/results/handlers_baseline.json y termina
+# con código 1 si alguna ruta empeora más que --tolerance.
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+from importlib import import_module
+
+from tests.unit.fake_db import FakeDatabase
+
+BASELINE = os.path.join(os.path.dirname(__file__), "results", "handlers_baseline.json")
+# En una sola vCPU el ruido entre corridas llega a ±30 %
+TOLERANCE = 0.5
+RETRIES = 2
+
+
+def product_rows(n):
+    return [(i, "Producto %d" % i, Decimal("35.50"), i % 40, 1, i % 8 + 1, "Categoría %d" % (i % 8 + 1))
+            for i in range(1, n + 1)]
+
+
+def scenarios(rows):
+    today = datetime.now().strftime("%Y-%m-%d")
+    sales = [(i % rows + 1, i % 28, Decimal(i % 7 + 1)) for i in range(rows * 4)]
+    return {
+        "end_of_day_balance": ("end_of_day_balance", {"body": json.dumps({"date": today})},
+                               [(r".", [("Café americano", Decimal("61.75"), Decimal("12350.00"), 200, 4)])]),
+        "get_category": ("get_category", {"pathParameters": {"status": "1"}},
+                         [(r".", [(i, "Categoría %d" % i, 1) for i in range(1, rows + 1)])]),
+        "get_products": ("get_products", {"pathParameters": {"status": "0"}}, [(r".", product_rows(rows))]),
+        "get_low_stock_products": ("get_low_stock_products", {}, [(r".", product_rows(rows))]),
+        "get_low_stock_products:forecast": ("get_low_stock_products", {"queryStringParameters": {"mode": "forecast"}},
+                                            [(r"FROM products", [(i, "Producto %d" % i, i % 40, 3)
+                                                                 for i in range(1, rows + 1)]),
+                                             (r"FROM sales_products", sales)]),
+        "product_companions": ("product_companions", {"pathParameters": {"id": "1"}},
+                               [(r".", [(i, "Producto %d" % i, rows - i) for i in range(2, 12)])]),
+        "sales_heatmap": ("sales_heatmap", {"queryStringParameters": {"start": "2024-07-01", "end": "2024-07-31"}},
+                          [(r".", [(day, hour, 12, Decimal("480.50")) for day in range(7) for hour in range(24)])]),
+        "top_sold_products": ("top_sold_products", {"body": json.dumps({"limit": 50})},
+                              [(r".", [("Producto %d" % i, "Bebidas", Decimal(rows - i)) for i in range(rows)])]),
+        "top_sold_products:per_category": ("top_sold_products", {"body": json.dumps({"per_category": True})},
+                                           [(r".", [(i % 8 + 1, "Categoría %d" % (i % 8 + 1), i, "Producto %d" % i,
+                                                     Decimal(rows - i)) for i in range(rows)])]),
+    }
+
+
+def calibrate(loops=50000, repeat=5):
+    # Trabajo fijo de Python puro para escalar la línea base a la máquina actual.
+    # Se mide junto a cada ruta porque la velocidad de la CPU cambia durante la corrida.
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        total = 0
+        for i in range(loops):
+            total += len(str(i))
+        timings.append((time.perf_counter() - started) * 1e6)
+    return round(min(timings), 1)
+
+
+def measure(handler, event, results, budget_ms=200, repeat=7):
+    database = FakeDatabase(results)
+    with database.installed():
+        handler(event, None)  # calentamiento: cachés de módulo y arranque en frío
+        loops = 1
+        while True:
+            started = time.perf_counter()
+            for _ in range(loops):
+                response = handler(event, None)
+            elapsed = time.perf_counter() - started
+            if elapsed * 1000 >= budget_ms / repeat or loops >= 100000:
+                break
+            loops *= 2
+        best = elapsed / loops
+        for _ in range(repeat - 1):
+            started = time.perf_counter()
+            for _ in range(loops):
+                handler(event, None)
+            best = min(best, (time.perf_counter() - started) / loops)
+
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            handler(event, None)
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    if response["statusCode"] != 200:
+        raise RuntimeError("%s: %s" % (response["statusCode"], response["body"]))
+    # Bloques asignados durante el request que siguen vivos después (cachés, buffers)
+    retained = sum(stat.count_diff for stat in after.compare_to(snapshot, "filename") if stat.count_diff > 0)
+    return {
+        "us_per_request": round(best * 1e6, 1),
+        "calibration_us": calibrate(),
+        "peak_kib": round((peak - before) / 1024, 1),
+        "retained_blocks": retained,
+        "response_bytes": len(response["body"]),
+    }
+
+
+def regressions(routes, baseline, tolerance):
+    # La línea base se escala por la velocidad relativa de la máquina (calibrate)
+    flagged = {}
+    for name, current in routes.items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        expected_us = before["us_per_request"] * current["calibration_us"] / before["calibration_us"]
+        if current["us_per_request"] > expected_us * (1 + tolerance):
+            flagged.setdefault(name, []).append(
+                "%.1f µs/request, baseline %.1f µs" % (current["us_per_request"], expected_us))
+        if current["peak_kib"] > before["peak_kib"] * (1 + tolerance) + 1:
+            flagged.setdefault(name, []).append(
+                "%.1f KiB peak, baseline %.1f KiB" % (current["peak_kib"], before["peak_kib"]))
+    return flagged
+
+
+def run(rows, only=None):
+    routes = {}
+    for name, (module, event, results) in scenarios(rows).items():
+        if only and name not in only:
+            continue
+        app = import_module(module + ".app")
+        for cache in ("balance_cache", "reorder_cache"):
+            if hasattr(app, cache):
+                getattr(app, cache).clear()
+        routes[name] = measure(app.lambda_handler, event, results)
+        print("%-34s %10.1f µs %8.1f KiB" % (name, routes[name]["us_per_request"], routes[name]["peak_kib"]),
+              file=sys.stderr)
+    return routes
+
+
+def quiet_run(rows, only=None):
+    # El log por invocación y la línea EMF son parte del costo real, pero no se imprimen
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return run(rows, only)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--only", action="append")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    # Los handlers leen credenciales al importarse; sin esto irían a Secrets Manager
+    os.environ.setdefault("DB_BACKEND", "sqlite")
+    routes = quiet_run(args.rows, args.only)
+
+    flagged = {}
+    if args.check:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline["rows"] != args.rows:
+            parser.error("la línea base se midió con --rows %d" % baseline["rows"])
+        flagged = regressions(routes, baseline, args.tolerance)
+        # Una ruta marcada se vuelve a medir antes de reportarla; el ruido rara vez se repite
+        for _ in range(RETRIES):
+            if not flagged:
+                break
+            routes.update(quiet_run(args.rows, list(flagged)))
+            flagged = regressions({name: routes[name] for name in flagged}, baseline, args.tolerance)
+
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "rows": args.rows,
+        "routes": routes
+    }
+    print(json.dumps(results, indent=2))
+    if args.update_baseline:
+        with open(args.baseline, "w") as output:
+            json.dump(results, output, indent=2)
+            output.write("\n")
+    for name, problems in flagged.items():
+        for problem in problems:
+            print("REGRESSION %s: %s" % (name, problem), file=sys.stderr)
+    sys.exit(1 if flagged else 0)
@@ -0,0 +1,94 @@
+# Compara el top aproximado de common/heavy_hitters.py contra el top exacto
+# calculado con SQL sobre datos sintéticos (SQLite en memoria).
+#   python -m benchmarks.heavy_hitters_accuracy [--products 300] [--lines 50000] [--k 10]
+import argparse
+import json
+import random
+import sqlite3
+import time
+
+from common.heavy_hitters import RollingHeavyHitters, CAPACITY, BUCKET_SECONDS, WINDOW_BUCKETS
+
+TOP_SQL = """
+    SELECT sp.product_id, SUM(sp.quantity) AS total_quantity_sold
+    FROM sales_products sp
+    JOIN sales s ON sp.sale_id = s.id
+    WHERE s.status = 1 AND s.createdAt >= ?
+    GROUP BY sp.product_id
+    ORDER BY total_quantity_sold DESC
+    LIMIT ?
+"""
+
+
+def generate_lines(products, lines, seed):
+    rng = random.Random(seed)
+    # Popularidad tipo Zipf: pocos productos concentran la mayoría de las ventas
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(products)]
+    window = BUCKET_SECONDS * WINDOW_BUCKETS
+    sales = []
+    sale_id = 0
+    remaining = lines
+    while remaining > 0:
+        sale_id += 1
+        size = min(remaining, rng.randint(1, 4))
+        created = rng.uniform(0, window * 1.5)
+        items = [(rng.choices(range(1, products + 1), weights)[0], rng.randint(1, 3)) for _ in range(size)]
+        sales.append((sale_id, created, items))
+        remaining -= size
+    sales.sort(key=lambda sale: sale[1])
+    return sales
+
+
+def run(products, lines, k, seed):
+    sales = generate_lines(products, lines, seed)
+    now = sales[-1][1]
+    window_start = (int(now) // BUCKET_SECONDS - (WINDOW_BUCKETS - 1)) * BUCKET_SECONDS
+
+    database = sqlite3.connect(":memory:")
+    database.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, status INTEGER, createdAt REAL)")
+    database.execute("CREATE TABLE sales_products (sale_id INTEGER, product_id INTEGER, quantity INTEGER)")
+    database.executemany("INSERT INTO sales VALUES (?, 1, ?)", [(sale_id, created) for sale_id, created, _ in sales])
+    database.executemany("INSERT INTO sales_products VALUES (?, ?, ?)",
+                         [(sale_id, product_id, quantity) for sale_id, _, items in sales for product_id, quantity in items])
+
+    sketch = RollingHeavyHitters()
+    for _, created, items in sales:
+        for product_id, quantity in items:
+            sketch.add(product_id, quantity, created)
+
+    started = time.perf_counter()
+    exact = database.execute(TOP_SQL, (window_start, k)).fetchall()
+    sql_ms = (time.perf_counter() - started) * 1000
+    exact_counts = dict(database.execute(TOP_SQL, (window_start, products)).fetchall())
+    window_units = sum(exact_counts.values())
+
+    started = time.perf_counter()
+    approximate = sketch.top(k, now)
+    sketch_ms = (time.perf_counter() - started) * 1000
+
+    exact_ids = {product_id for product_id, _ in exact}
+    overestimates = [count - exact_counts.get(product_id, 0) for product_id, count, _ in approximate]
+    return {
+        "products": products,
+        "lines": lines,
+        "k": k,
+        "capacity": CAPACITY,
+        "window_units": window_units,
+        "recall_at_k": len(exact_ids & {product_id for product_id, _, _ in approximate}) / k,
+        "max_overestimate": max(overestimates),
+        "error_bound": window_units / CAPACITY,
+        "within_bound": all(0 <= over <= error for over, (_, _, error) in zip(overestimates, approximate)),
+        "sketch_bytes": len(sketch.dumps()),
+        "sql_ms": round(sql_ms, 3),
+        "sketch_ms": round(sketch_ms, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=50000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(run(args.products, args.lines, args.k, args.seed), indent=2))
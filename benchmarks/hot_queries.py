@@ -0,0 +1,180 @@
+# Mide las consultas calientes de los handlers sobre el histórico sintético
+# (benchmarks/synthetic_data.py) a una o varias escalas y guarda el resultado en
+# JSON para comparar cambios de índices o rollups.
+#   python -m benchmarks.hot_queries --scale 10k --scale 1m [--output benchmarks/results/latest.json]
+#   python -m benchmarks.hot_queries --scale 1m --compare benchmarks/results/before.json
+#   python -m benchmarks.hot_queries --scale 10m --host ... --user ... --password ... --db cafe_balu_bench
+# Sin --host usa SQLite (un archivo por escala en --data-dir, se genera si no existe).
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from importlib import import_module
+
+from benchmarks import synthetic_data
+from common import db, instrumentation
+
+
+def hot_queries(end):
+    # Las funciones de los handlers, con los mismos parámetros que usa la app
+    last_day = end.isoformat()
+    quarter = (end - timedelta(days=90)).isoformat()
+    following = (end + timedelta(days=1)).isoformat()
+
+    def with_cursor(module, function, *args):
+        def run():
+            app = import_module(module + ".app")
+            connection = app.connect_to_database()
+            try:
+                return getattr(app, function)(connection.cursor(), *args)
+            finally:
+                connection.close()
+        return run
+
+    def call(module, function, *args, **kwargs):
+        return lambda: getattr(import_module(module + ".app"), function)(*args, **kwargs)
+
+    return {
+        "end_of_day_balance": call("end_of_day_balance", "get_end_of_day_balance", last_day),
+        "top_sold_products": with_cursor("top_sold_products", "get_top_sold_products", None),
+        "top_sold_products_category": with_cursor("top_sold_products", "get_top_sold_products", 1),
+        "top_sold_products_per_category": with_cursor("top_sold_products", "get_top_sold_products_per_category"),
+        "get_products_all": call("get_products", "get_all_products", 0),
+        "get_products_active": call("get_products", "get_all_products", 1),
+        "sales_heatmap_90d": call("sales_heatmap", "get_sales_heatmap", quarter, following),
+        "sales_heatmap_90d_rollup": call("sales_heatmap", "get_sales_heatmap", quarter, following, use_rollup=True),
+        "sales_heatmap_5y": call("sales_heatmap", "get_sales_heatmap", "2000-01-01", following),
+        "sales_heatmap_5y_rollup": call("sales_heatmap", "get_sales_heatmap", "2000-01-01", following, use_rollup=True),
+        "stock_forecast": call("get_low_stock_products", "get_stock_forecast", 28, 3, today=end),
+        "product_companions": call("product_companions", "get_companions", 1, 5),
+    }
+
+
+def measure(function, repeat):
+    function()  # calentamiento: importa el handler y llena la caché de páginas
+    timings = []
+    for _ in range(repeat):
+        invocation = instrumentation.current.invocation = instrumentation.Invocation("benchmark", None, False)
+        started = time.perf_counter()
+        try:
+            result = function()
+        finally:
+            instrumentation.current.invocation = None
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(statistics.median(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "queries": len(invocation.queries),
+        "db_round_trips": invocation.round_trips,
+        "rows": len(result) if isinstance(result, list) else None,
+    }
+
+
+def count_lines():
+    # Con SQLite o DB_HOST las credenciales no pasan por Secrets Manager
+    credentials = db.load_credentials(None)
+    connection = db.connect(host=credentials["host"], user=credentials["username"],
+                            password=credentials["password"], db=credentials["dbname"])
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sales_products")
+        return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def prepare_sqlite(scale, args):
+    path = os.path.join(args.data_dir, "cafe_balu_%s_seed%d.db" % (scale, args.seed))
+    os.environ["DB_SQLITE_PATH"] = path
+    started = time.perf_counter()
+    if synthetic_data.ensure_sqlite(path, synthetic_data.scale_lines(scale), args.days, args.end, args.seed):
+        print("generated %s in %.1f s" % (path, time.perf_counter() - started), file=sys.stderr)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    # Proporción contra el archivo anterior: > 1 es más lento ahora
+    for scale, entry in results["scales"].items():
+        before = baseline.get("scales", {}).get(scale)
+        if not before:
+            continue
+        for name, timing in entry["queries"].items():
+            previous = before["queries"].get(name)
+            if previous and previous["median_ms"]:
+                print("%-6s %-32s %10.2f ms -> %10.2f ms  x%.2f" % (
+                    scale, name, previous["median_ms"], timing["median_ms"],
+                    timing["median_ms"] / previous["median_ms"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", action="append")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--days", type=int, default=synthetic_data.DEFAULT_DAYS)
+    parser.add_argument("--end", type=date.fromisoformat, default=synthetic_data.DEFAULT_END)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", action="append", help="nombre de consulta; se puede repetir")
+    parser.add_argument("--data-dir", default="/tmp")
+    parser.add_argument("--output", default=os.path.join(os.path.dirname(__file__), "results", "hot_queries.json"))
+    parser.add_argument("--compare")
+    parser.add_argument("--host")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--db")
+    args = parser.parse_args()
+    scales = args.scale or ["10k"]
+
+    if args.host:
+        if len(scales) > 1:
+            parser.error("con --host se mide una sola escala: la que esté cargada en la base")
+        os.environ.update({"DB_HOST": args.host, "DB_USER": args.user or "", "DB_PASSWORD": args.password or "",
+                           "DB_NAME": args.db or ""})
+        os.environ.pop("DB_BACKEND", None)
+    else:
+        os.environ["DB_BACKEND"] = "sqlite"
+        # Los datos de ejemplo chocarían con los ids generados
+        os.environ.pop("DB_SQLITE_SEED", None)
+
+    # instrumentation deja el logger en INFO; aquí solo estorban los avisos de consultas lentas
+    logging.getLogger().setLevel(logging.ERROR)
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "backend": "mysql" if args.host else "sqlite",
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "scales": {}
+    }
+    for scale in scales:
+        if not args.host:
+            prepare_sqlite(scale, args)
+        queries = hot_queries(args.end)
+        entry = {"lines": count_lines(), "queries": {}}
+        for name, function in queries.items():
+            if args.only and name not in args.only:
+                continue
+            entry["queries"][name] = measure(function, args.repeat)
+            print("%-6s %-32s %10.2f ms" % (scale, name, entry["queries"][name]["median_ms"]), file=sys.stderr)
+        results["scales"][scale] = entry
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+    print(args.output)
@@ -0,0 +1,68 @@
+# Latencia de login con un cliente de Cognito simulado: cada llamada a la API
+# espera --latency-ms. Compara un IdToken con el claim cognito:groups (una sola
+# llamada) contra uno sin el claim (initiate_auth + admin_list_groups_for_user).
+#   python -m benchmarks.login_round_trips [--latency-ms 40] [--runs 20]
+import argparse
+import base64
+import json
+import statistics
+import time
+from unittest.mock import patch
+
+from login import app
+
+
+def make_token(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return "header." + payload + ".signature"
+
+
+class StubCognito:
+    def __init__(self, latency, claims):
+        self.latency = latency
+        self.claims = claims
+        self.calls = 0
+
+    def _round_trip(self):
+        self.calls += 1
+        time.sleep(self.latency)
+
+    def initiate_auth(self, **_):
+        self._round_trip()
+        return {"AuthenticationResult": {
+            "IdToken": make_token(self.claims),
+            "AccessToken": "access",
+            "RefreshToken": "refresh"
+        }}
+
+    def admin_list_groups_for_user(self, **_):
+        self._round_trip()
+        return {"Groups": [{"GroupName": "admin"}]}
+
+
+def measure(claims, latency, runs):
+    stub = StubCognito(latency, claims)
+    event = {"body": json.dumps({"username": "balu", "password": "secret"})}
+    timings = []
+    with patch("login.app.client", stub):
+        for _ in range(runs):
+            started = time.perf_counter()
+            app.lambda_handler(event, None)
+            timings.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(timings), 2), "cognito_calls_per_login": stub.calls / runs}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    with_claim = measure({"cognito:groups": ["admin"]}, latency, args.runs)
+    without_claim = measure({"sub": "123"}, latency, args.runs)
+    print(json.dumps({
+        "groups_from_token": with_claim,
+        "groups_from_admin_call": without_claim,
+        "speedup": round(without_claim["median_ms"] / with_claim["median_ms"], 2),
+    }, indent=2))
@@ -0,0 +1,380 @@
+# Reproduce tráfico contra los handlers: eventos de API Gateway capturados
+# (JSONL, uno por línea) o una hora de comida sintética con ventas, consultas
+# del catálogo y el tablero. Reporta throughput, p50/p95/p99 y viajes a la base
+# por ruta.
+#   pip install -r benchmarks/requirements.txt
+#   python -m benchmarks.replay --rush --rate 40 --duration 60 [--workers 8] [--processes]
+#   python -m benchmarks.replay --events captured.jsonl [--speed 2 | --rate 20]
+#   python -m benchmarks.replay --rush --url http://127.0.0.1:3000 --token $ID_TOKEN
+# En proceso usa SQLite (--sqlite, se genera con benchmarks/synthetic_data.py si
+# está vacía); con --url manda HTTP a un gateway local (sam local start-api) o a
+# un stage de pruebas. Los viajes a la base salen del header Server-Timing.
+import argparse
+import contextlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from importlib import import_module
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.yaml")
+ROUND_TRIPS = re.compile(r'db;desc="(\d+) round trips"')
+
+admin = {
+    "authorizer": {
+        "claims": {
+            "cognito:groups": "admin"
+        }
+    }
+}
+
+# Peso de cada grupo en la hora de comida (ver rush_events)
+RUSH_MIX = {"writes": 0.15, "catalog": 0.55, "dashboard": 0.30}
+
+
+class Route:
+    def __init__(self, method, path, module):
+        self.method = method.upper()
+        self.path = path
+        self.module = module
+        self.name = "%s %s" % (self.method, path)
+        self.pattern = re.compile("^" + re.sub(r"\\{(\w+)\\}", r"(?P<\1>[^/]+)", re.escape(path)) + "$")
+
+
+def load_routes(template=TEMPLATE):
+    # Rutas Api de template.yaml cuyos handlers están en este repositorio
+    import yaml
+
+    class Loader(yaml.SafeLoader):
+        pass
+    # !Ref, !GetAtt, !Sub...: no hacen falta para las rutas
+    Loader.add_multi_constructor("!", lambda loader, suffix, node: None)
+
+    with open(template, encoding="utf-8") as source:
+        resources = yaml.load(source, Loader=Loader).get("Resources", {})
+    base = os.path.dirname(template)
+    routes = []
+    for resource in resources.values():
+        properties = resource.get("Properties") or {}
+        code = (properties.get("CodeUri") or "").strip("/")
+        if resource.get("Type") != "AWS::Serverless::Function" or not os.path.exists(os.path.join(base, code, "app.py")):
+            continue
+        for event in (properties.get("Events") or {}).values():
+            if event.get("Type") == "Api":
+                routes.append(Route(event["Properties"]["Method"], event["Properties"]["Path"], code))
+    return routes
+
+
+def match(routes, event):
+    method = (event.get("httpMethod") or "GET").upper()
+    resource = event.get("resource")
+    for route in routes:
+        if route.method != method:
+            continue
+        if resource == route.path:
+            return route, event.get("pathParameters") or {}
+        found = route.pattern.match(event.get("path") or "")
+        if found:
+            return route, found.groupdict()
+    return None, None
+
+
+def api_event(method, path, body=None, query=None, resource=None, path_parameters=None, authorized=False):
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "resource": resource or path,
+        "headers": {},
+        "queryStringParameters": query,
+        "pathParameters": path_parameters,
+        "body": json.dumps(body) if body is not None else None,
+    }
+    if authorized:
+        event["requestContext"] = admin
+    return event
+
+
+def rush_events(rng, today, history_end, sales, products):
+    """Generadores de eventos por grupo, con su peso dentro del grupo.
+
+    today es el día del corte en vivo; history_end, el último día con ventas
+    (los reportes de días cerrados y el heatmap se piden sobre el mes anterior).
+    """
+    def closed_day():
+        return (history_end - timedelta(days=rng.randint(0, 29))).isoformat()
+
+    def cancel_sale():
+        id = str(rng.randint(1, sales))
+        return api_event("PATCH", "/cancel_sale/" + id, resource="/cancel_sale/{id}",
+                         path_parameters={"id": id}, authorized=True)
+
+    def companions():
+        id = str(rng.randint(1, products))
+        return api_event("GET", "/product_companions/" + id, resource="/product_companions/{id}",
+                         path_parameters={"id": id})
+
+    def heatmap():
+        start = (history_end - timedelta(days=rng.choice([7, 30, 90]))).isoformat()
+        return api_event("GET", "/sales_heatmap", query={"start": start, "end": history_end.isoformat()})
+
+    return {
+        # save_sale no está en este repositorio; la escritura disponible es la cancelación
+        "writes": [(1.0, cancel_sale)],
+        "catalog": [
+            (0.45, lambda: api_event("GET", "/get_products/1", resource="/get_products/{status}",
+                                     path_parameters={"status": "1"})),
+            (0.25, lambda: api_event("GET", "/get_categories/1", resource="/get_categories/{status}",
+                                     path_parameters={"status": "1"})),
+            (0.30, companions),
+        ],
+        "dashboard": [
+            (0.30, lambda: api_event("POST", "/get_end_of_day_balance", {"date": today.isoformat()})),
+            (0.10, lambda: api_event("POST", "/get_end_of_day_balance", {"date": closed_day()})),
+            (0.25, lambda: api_event("POST", "/get_top_sold_products", {})),
+            (0.10, lambda: api_event("POST", "/get_top_sold_products", {"per_category": True})),
+            (0.10, heatmap),
+            (0.10, lambda: api_event("GET", "/get_low_stock_products", query={"mode": "forecast"})),
+            (0.05, lambda: api_event("GET", "/reorder_suggestions")),
+        ],
+    }
+
+
+def rush_schedule(rate, duration, mix, seed, today, history_end, sales, products, floor=0.3):
+    """Llegadas Poisson con la tasa subiendo de floor*rate a rate a media corrida y bajando otra vez."""
+    rng = random.Random(seed)
+    generators = rush_events(rng, today, history_end, sales, products)
+    groups = list(mix)
+    group_weights = [mix[group] for group in groups]
+
+    def rate_at(t):
+        return rate * (floor + (1 - floor) * math.exp(-((t - duration / 2) / (duration / 6)) ** 2))
+
+    schedule = []
+    t = 0.0
+    while True:
+        # Thinning: candidatos a la tasa máxima, se aceptan con rate(t)/rate
+        t += rng.expovariate(rate)
+        if t >= duration:
+            return schedule
+        if rng.random() > rate_at(t) / rate:
+            continue
+        group = rng.choices(groups, group_weights)[0]
+        weights, makers = zip(*generators[group])
+        schedule.append((t, group, rng.choices(makers, weights)[0]()))
+
+
+def replay_schedule(events, rate=None, speed=1.0):
+    # Con requestTimeEpoch se respeta el espaciado original (dividido entre speed); si no, tasa fija
+    epochs = [(event.get("requestContext") or {}).get("requestTimeEpoch") for event in events]
+    if rate is None and events and all(epochs):
+        first = min(epochs)
+        return sorted((((epoch - first) / 1000 / speed, "replay", event) for epoch, event in zip(epochs, events)),
+                      key=lambda item: item[0])
+    rate = rate or 10.0
+    return [(i / rate, "replay", event) for i, event in enumerate(events)]
+
+
+def read_events(path):
+    with open(path, encoding="utf-8") as source:
+        return [json.loads(line) for line in source if line.strip()]
+
+
+def invoke(module, event):
+    # Se ejecuta en el hilo o proceso trabajador
+    started = time.perf_counter()
+    try:
+        response = import_module(module + ".app").lambda_handler(event, None)
+        status = response.get("statusCode", 0)
+        timing = (response.get("headers") or {}).get("Server-Timing", "")
+    except Exception:
+        status, timing = 0, ""
+    return status, (time.perf_counter() - started) * 1000, round_trips(timing)
+
+
+def invoke_http(url, token, event, timeout=30):
+    path = event.get("path") or "/"
+    if event.get("queryStringParameters"):
+        path += "?" + urllib.parse.urlencode(event["queryStringParameters"])
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = token
+    body = event.get("body")
+    request = urllib.request.Request(url.rstrip("/") + path, data=body.encode() if body else None,
+                                     method=event.get("httpMethod") or "GET", headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status, timing = response.status, response.headers.get("Server-Timing", "")
+    except urllib.error.HTTPError as error:
+        status, timing = error.code, error.headers.get("Server-Timing", "")
+    except (urllib.error.URLError, OSError):
+        status, timing = 0, ""
+    return status, (time.perf_counter() - started) * 1000, round_trips(timing)
+
+
+def round_trips(server_timing):
+    found = ROUND_TRIPS.search(server_timing or "")
+    return int(found.group(1)) if found else None
+
+
+def percentile(values, p):
+    # Rango más cercano sobre valores ordenados
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))], 2)
+
+
+def drive(schedule, call, workers, processes=False):
+    """Despacha cada evento en su instante programado (lazo abierto).
+
+    La latencia se cuenta desde el instante programado, así que incluye la espera
+    en la cola cuando los trabajadores no alcanzan (sin omisión coordinada).
+    """
+    pool = ProcessPoolExecutor(workers) if processes else ThreadPoolExecutor(workers)
+    results = []
+    lock = threading.Lock()
+    lag = 0.0
+    with pool:
+        started = time.perf_counter()
+        futures = []
+        for offset, group, route, payload in schedule:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                lag = max(lag, -delay)
+            future = pool.submit(call, *payload)
+
+            def done(future, route=route, group=group, scheduled=started + offset):
+                status, service_ms, trips = future.result()
+                with lock:
+                    results.append((route, group, status, (time.perf_counter() - scheduled) * 1000, service_ms, trips))
+            future.add_done_callback(done)
+            futures.append(future)
+        for future in futures:
+            future.exception()
+        elapsed = time.perf_counter() - started
+    return results, elapsed, lag * 1000
+
+
+def report(results, elapsed, lag_ms, unrouted):
+    routes = {}
+    for route, group, status, latency, service, trips in results:
+        entry = routes.setdefault(route, {"group": group, "latency": [], "service": [], "trips": [], "status": {}})
+        entry["latency"].append(latency)
+        entry["service"].append(service)
+        if trips is not None:
+            entry["trips"].append(trips)
+        entry["status"][status] = entry["status"].get(status, 0) + 1
+
+    summary = {}
+    for route, entry in sorted(routes.items()):
+        latency = sorted(entry["latency"])
+        summary[route] = {
+            "group": entry["group"],
+            "requests": len(latency),
+            "throughput_rps": round(len(latency) / elapsed, 2),
+            "p50_ms": percentile(latency, 50),
+            "p95_ms": percentile(latency, 95),
+            "p99_ms": percentile(latency, 99),
+            "service_p50_ms": percentile(sorted(entry["service"]), 50),
+            "db_round_trips_mean": round(sum(entry["trips"]) / len(entry["trips"]), 2) if entry["trips"] else None,
+            "db_round_trips_max": max(entry["trips"]) if entry["trips"] else None,
+            # 0: sin respuesta (excepción o error de red)
+            "errors": sum(count for status, count in entry["status"].items() if status == 0 or status >= 500),
+            "status": {str(status): count for status, count in sorted(entry["status"].items())},
+        }
+    latency = sorted(result[3] for result in results)
+    return {
+        "requests": len(results),
+        "unrouted": unrouted,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+        "p50_ms": percentile(latency, 50),
+        "p95_ms": percentile(latency, 95),
+        "p99_ms": percentile(latency, 99),
+        "max_dispatch_lag_ms": round(lag_ms, 2),
+        "routes": summary,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--events", help="JSONL con eventos de API Gateway")
+    source.add_argument("--rush", action="store_true", help="hora de comida sintética")
+    parser.add_argument("--rate", type=float, help="solicitudes por segundo (en --rush, la tasa pico)")
+    parser.add_argument("--speed", type=float, default=1.0, help="acelera la repetición de --events")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--mix", default=",".join("%s=%s" % item for item in RUSH_MIX.items()))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--processes", action="store_true", help="trabajadores en procesos en lugar de hilos")
+    parser.add_argument("--url", help="gateway HTTP; sin esto se llaman los handlers en proceso")
+    parser.add_argument("--token", help="header Authorization para rutas de administrador vía --url")
+    parser.add_argument("--sqlite", default="/tmp/cafe_balu_10k_seed7.db")
+    parser.add_argument("--scale", default="10k", help="escala para generar --sqlite si está vacía")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    routes = load_routes()
+    if args.rush:
+        from benchmarks import synthetic_data
+
+        mix = {group: float(weight) for group, weight in (item.split("=") for item in args.mix.split(","))}
+        # En proceso los datos sintéticos terminan en DEFAULT_END; por HTTP se asume historia hasta hoy
+        history_end = date.today() if args.url else synthetic_data.DEFAULT_END
+        schedule = rush_schedule(args.rate or 20.0, args.duration, mix, args.seed, date.today(), history_end,
+                                 sales=max(1, synthetic_data.scale_lines(args.scale) // 2),
+                                 products=len(synthetic_data.catalog(random.Random(args.seed))[1]))
+    else:
+        schedule = replay_schedule(read_events(args.events), args.rate, args.speed)
+
+    dispatch = []
+    unrouted = 0
+    for offset, group, event in schedule:
+        route, path_parameters = match(routes, event)
+        if route is None:
+            unrouted += 1
+            continue
+        event = {**event, "resource": route.path, "pathParameters": path_parameters or event.get("pathParameters")}
+        if args.url:
+            dispatch.append((offset, group, route.name, (args.url, args.token, event)))
+        else:
+            dispatch.append((offset, group, route.name, (route.module, event)))
+
+    if args.url:
+        call = invoke_http
+    else:
+        from benchmarks import synthetic_data
+
+        # Archivo y no memoria compartida: con varios hilos escribiendo, SQLite en
+        # memoria compartida falla con "table is locked" en lugar de esperar
+        os.environ.update({"DB_BACKEND": "sqlite", "DB_SQLITE_PATH": args.sqlite, "SERVER_TIMING": "1"})
+        os.environ.pop("DB_SQLITE_SEED", None)
+        synthetic_data.ensure_sqlite(args.sqlite, synthetic_data.scale_lines(args.scale))
+        call = invoke
+
+    print("%d requests scheduled (%d unrouted)" % (len(dispatch), unrouted), file=sys.stderr)
+    # La línea EMF por invocación va a stdout; aquí solo estorba
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results, elapsed, lag_ms = drive(dispatch, call, args.workers, args.processes)
+    summary = report(results, elapsed, lag_ms, unrouted)
+    if not args.url and not args.processes:
+        # Lecturas idénticas que coincidieron en el tiempo y compartieron una sola consulta
+        from common import single_flight
+        summary["single_flight"] = single_flight.snapshot()
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summary, output, indent=2)
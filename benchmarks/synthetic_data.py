@@ -0,0 +1,244 @@
+# Genera un histórico sintético y determinista de la cafetería (categorías,
+# productos, ventas y sales_products) con horas pico, productos populares y
+# cancelaciones, y lo carga con inserts por lotes.
+#   python -m benchmarks.synthetic_data --scale 1m --sqlite /tmp/cafe_balu_1m.db
+#   python -m benchmarks.synthetic_data --scale 10m --host ... --user ... --password ... --db cafe_balu_bench
+# La escala es el número de líneas de venta (sales_products): 10k, 1m, 10m o un entero.
+import argparse
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+DEFAULT_END = date(2024, 12, 31)
+DEFAULT_DAYS = 5 * 365 + 1
+BATCH = 5000
+
+# (nombre, activa, rango de precio en pesos, productos)
+CATALOG = [
+    ("Bebidas calientes", 1, (25, 60), ["Café americano", "Espresso", "Capuchino", "Latte", "Moka",
+                                        "Chocolate caliente", "Té chai", "Té verde", "Café de olla"]),
+    ("Bebidas frías", 1, (35, 75), ["Frappé de café", "Frappé de moka", "Latte frío", "Cold brew",
+                                    "Limonada", "Agua de jamaica", "Smoothie de fresa"]),
+    ("Panadería", 1, (12, 35), ["Concha", "Cuernito", "Dona glaseada", "Oreja", "Bisquet",
+                                "Rol de canela", "Mantecada", "Pan de elote"]),
+    ("Desayunos", 1, (55, 120), ["Chilaquiles", "Molletes", "Sandwich de jamón", "Bagel con queso crema",
+                                 "Avena con fruta", "Hot cakes"]),
+    ("Comidas", 1, (80, 150), ["Baguette de pollo", "Ensalada César", "Panini caprese", "Wrap de pollo",
+                               "Sopa del día"]),
+    ("Postres", 1, (40, 85), ["Pay de queso", "Pastel de chocolate", "Brownie", "Galleta de avena",
+                              "Flan napolitano"]),
+    ("Temporada", 0, (45, 90), ["Pan de muerto", "Rosca de reyes", "Ponche", "Chocolate con churros"]),
+]
+CUP_SIZES = ["chico", "grande"]
+
+# Peso de cada hora (7:00 a 21:00): desayuno 8-9 h y comida 13-14 h
+OPENING_HOURS = list(range(7, 22))
+HOUR_WEIGHTS = [4, 10, 9, 6, 5, 5, 8, 9, 6, 4, 4, 5, 5, 3, 2]
+# Lunes a domingo
+WEEKDAY_WEIGHTS = [0.9, 0.95, 1.0, 1.0, 1.15, 1.3, 0.85]
+LINES_PER_SALE = [1, 2, 3, 4, 5, 6]
+LINES_PER_SALE_WEIGHTS = [30, 32, 20, 10, 5, 3]
+QUANTITY_WEIGHTS = [75, 18, 5, 2]
+CANCEL_RATE = 0.03
+ZIPF_EXPONENT = 1.1
+
+
+def scale_lines(scale):
+    return SCALES[scale] if scale in SCALES else int(scale)
+
+
+def catalog(rng):
+    categories = []
+    products = []
+    for category_id, (name, status, (low, high), names) in enumerate(CATALOG, start=1):
+        categories.append((category_id, name, status))
+        for product in names:
+            sizes = CUP_SIZES if name.startswith("Bebidas") else [None]
+            for size in sizes:
+                price = rng.randint(low * 2, high * 2) * 50
+                if size == "grande":
+                    price += 1000
+                products.append((
+                    len(products) + 1,
+                    product + " " + size if size else product,
+                    price,
+                    rng.randint(0, 150),
+                    status,
+                    category_id
+                ))
+    return categories, products
+
+
+def day_quotas(lines, days, end):
+    # Líneas por día: crecimiento de ~8 % anual y variación por día de la semana.
+    # Con sumas acumuladas el total cuadra exacto y no se guarda la lista de ventas.
+    start = end - timedelta(days=days - 1)
+    weights = [1.08 ** (day / 365) * WEEKDAY_WEIGHTS[(start + timedelta(days=day)).weekday()] for day in range(days)]
+    total = sum(weights)
+    cumulative = 0.0
+    assigned = 0
+    for day, weight in enumerate(weights):
+        cumulative += weight
+        target = round(lines * cumulative / total)
+        yield start + timedelta(days=day), target - assigned
+        assigned = target
+
+
+def generate_sales(lines, products, days=DEFAULT_DAYS, end=DEFAULT_END, seed=7):
+    """Genera (venta, líneas) en orden de fecha, con exactamente `lines` líneas.
+
+    venta = (id, total, status, createdAt); línea = (sale_id, product_id, quantity).
+    """
+    rng = random.Random(seed)
+    # Popularidad tipo Zipf sobre los productos activos en orden aleatorio (fijo por seed)
+    active = [product for product in products if product[4] == 1]
+    rng.shuffle(active)
+    product_ids = [product[0] for product in active]
+    prices = {product[0]: product[2] for product in products}
+    popularity = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(len(active))]
+    popularity_cum = list(_accumulate(popularity))
+    hours_cum = list(_accumulate(HOUR_WEIGHTS))
+    sizes_cum = list(_accumulate(LINES_PER_SALE_WEIGHTS))
+    quantities_cum = list(_accumulate(QUANTITY_WEIGHTS))
+
+    sale_id = 0
+    for day, quota in day_quotas(lines, days, end):
+        day_sales = []
+        while quota > 0:
+            size = min(quota, rng.choices(LINES_PER_SALE, cum_weights=sizes_cum)[0])
+            quota -= size
+            hour = rng.choices(OPENING_HOURS, cum_weights=hours_cum)[0]
+            created = datetime(day.year, day.month, day.day, hour, rng.randrange(60), rng.randrange(60))
+            items = {}
+            for product_id in rng.choices(product_ids, cum_weights=popularity_cum, k=size):
+                items[product_id] = items.get(product_id, 0) + rng.choices((1, 2, 3, 4), cum_weights=quantities_cum)[0]
+            # Un producto repetido suma cantidad; para conservar el número de líneas se completa con otros
+            while len(items) < size:
+                items.setdefault(rng.choice(product_ids), 1)
+            day_sales.append((created, items))
+        # Los ids crecen con la hora, como con AUTO_INCREMENT
+        day_sales.sort(key=lambda sale: sale[0])
+        for created, items in day_sales:
+            sale_id += 1
+            total = sum(prices[product_id] * quantity for product_id, quantity in items.items())
+            status = 0 if rng.random() < CANCEL_RATE else 1
+            yield (sale_id, round(total / 100, 2), status, created), [
+                (sale_id, product_id, quantity) for product_id, quantity in items.items()
+            ]
+
+
+def _accumulate(weights):
+    total = 0
+    for weight in weights:
+        total += weight
+        yield total
+
+
+def load(connection, lines, days=DEFAULT_DAYS, end=DEFAULT_END, seed=7, batch=BATCH):
+    """Carga el histórico en una base vacía; devuelve el número de ventas."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sales")
+    if cursor.fetchone()[0]:
+        raise ValueError("la tabla sales no está vacía; usa una base dedicada para benchmarks")
+
+    rng = random.Random(seed)
+    categories, products = catalog(rng)
+    cursor.executemany("INSERT INTO categories (id, name, status) VALUES (%s, %s, %s)", categories)
+    cursor.executemany(
+        "INSERT INTO products (id, name, price, stock, status, category_id) VALUES (%s, %s, %s, %s, %s, %s)",
+        [(id, name, price / 100, stock, status, category_id) for id, name, price, stock, status, category_id in products]
+    )
+    connection.commit()
+
+    sales = []
+    sale_lines = []
+    count = 0
+    for sale, items in generate_sales(lines, products, days, end, seed):
+        sales.append(sale)
+        sale_lines.extend(items)
+        if len(sale_lines) >= batch:
+            _flush(connection, cursor, sales, sale_lines)
+        count += 1
+    _flush(connection, cursor, sales, sale_lines)
+    return count
+
+
+def _flush(connection, cursor, sales, sale_lines):
+    # executemany con INSERT ... VALUES: pymysql lo manda como un solo INSERT multi-fila
+    if sales:
+        cursor.executemany("INSERT INTO sales (id, total, status, createdAt) VALUES (%s, %s, %s, %s)", sales)
+    if sale_lines:
+        cursor.executemany("INSERT INTO sales_products (sale_id, product_id, quantity) VALUES (%s, %s, %s)", sale_lines)
+    connection.commit()
+    sales.clear()
+    sale_lines.clear()
+
+
+def refresh_rollups(connection, days=DEFAULT_DAYS, end=DEFAULT_END):
+    # sales_hourly y product_pairs, igual que scripts/backfill_sales_hourly.py y scripts/rebuild_cooccurrence.py
+    from common import cooccurrence, sales_rollup
+
+    cursor = connection.cursor()
+    start = end - timedelta(days=days - 1)
+    month = start
+    while month <= end:
+        following = min(month + timedelta(days=31), end + timedelta(days=1))
+        sales_rollup.refresh_range(cursor, month, following)
+        connection.commit()
+        month = following
+    cooccurrence.rebuild(connection)
+
+
+def ensure_sqlite(path, lines, days=DEFAULT_DAYS, end=DEFAULT_END, seed=7):
+    """Abre (o genera, si está vacía) una base SQLite con el histórico; devuelve True si la generó."""
+    from common import sqlite_backend
+
+    connection = sqlite_backend.connect(path)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sales_products")
+        if cursor.fetchone()[0]:
+            return False
+        load(connection, lines, days, end, seed)
+        refresh_rollups(connection, days, end)
+        return True
+    finally:
+        connection.close()
+
+
+def connect(args):
+    if args.host:
+        import pymysql
+        return pymysql.connect(host=args.host, user=args.user, password=args.password, database=args.db)
+    from common import sqlite_backend
+    return sqlite_backend.connect(args.sqlite)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", default="10k")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--end", type=date.fromisoformat, default=DEFAULT_END)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-rollups", dest="rollups", action="store_false")
+    parser.add_argument("--sqlite", default="/tmp/cafe_balu.db")
+    parser.add_argument("--host")
+    parser.add_argument("--user")
+    parser.add_argument("--password")
+    parser.add_argument("--db")
+    args = parser.parse_args()
+
+    lines = scale_lines(args.scale)
+    connection = connect(args)
+    try:
+        started = time.perf_counter()
+        sales = load(connection, lines, args.days, args.end, args.seed)
+        loaded = time.perf_counter() - started
+        if args.rollups:
+            refresh_rollups(connection, args.days, args.end)
+    finally:
+        connection.close()
+    print("%d sales, %d lines loaded in %.1f s (%.0f lines/s), total %.1f s" % (
+        sales, lines, loaded, lines / loaded if loaded else math.inf, time.perf_counter() - started))
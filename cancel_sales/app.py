@@ -3,6 +3,7 @@ import pymysql
 import re
 import boto3
 from botocore.exceptions import ClientError
+from common import auth, cooccurrence, db, instrumentation, sales_rollup
 
 def get_secret():
     secret_name = "secretsForBalu"
@@ -28,21 +29,26 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
 rds_db = secrets["dbname"]
 
 
+@instrumentation.instrument("cancel_sales")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "PATCH, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
+    # La verificación y la cancelación comparten una conexión
+    shared = db.SharedConnection(open_connection)
     try:
-        claims = event['requestContext']['authorizer']['claims']
+        # Claims del autorizador de API Gateway o, sin él, del JWT verificado localmente
+        claims = auth.get_claims(event)
         role = claims['cognito:groups']
 
         if 'admin' not in role:
@@ -99,7 +105,7 @@ def lambda_handler(event, __):
             }
 
         # Verificar que el ID existe en la base de datos
-        if not id_exists_in_db(id):
+        if not id_exists_in_db(id, shared):
             return {
                 "statusCode": 404,
                 "headers": headers,
@@ -108,7 +114,15 @@ def lambda_handler(event, __):
                 }),
             }
 
-        cancel_sale(id)
+        # cancel_sale devuelve la respuesta de error si algo falló y se deshizo la transacción
+        if cancel_sale(id, shared) is not None:
+            return {
+                "statusCode": 500,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "DATABASE_ERROR"
+                }),
+            }
         return {
             "statusCode": 200,
             "headers": headers,
@@ -125,6 +139,15 @@ def lambda_handler(event, __):
                 "error": str(e)
             }),
         }
+    except auth.AuthError as e:
+        return {
+            "statusCode": 401,
+            "headers": headers,
+            "body": json.dumps({
+                "message": "UNAUTHORIZED",
+                "error": str(e)
+            }),
+        }
     except KeyError as e:
         return {
             "statusCode": 400,
@@ -151,10 +174,16 @@ def lambda_handler(event, __):
                 "error": str(e)
             }),
         }
+    finally:
+        shared.close()
+
+
+def open_connection():
+    return instrumentation.connect(db.connect, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
 
 
-def id_exists_in_db(id):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+def id_exists_in_db(id, shared=None):
+    connection = shared.get() if shared else open_connection()
     try:
         cursor = connection.cursor()
         cursor.execute("SELECT COUNT(*) FROM sales WHERE id = %s", (id,))
@@ -163,16 +192,26 @@ def id_exists_in_db(id):
     except Exception as e:
         return False
     finally:
-        connection.close()
+        if shared is None:
+            connection.close()
 
 
-def cancel_sale(id):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+def cancel_sale(id, shared=None):
+    connection = shared.get() if shared else open_connection()
     try:
         cursor = connection.cursor()
-        cursor.execute("UPDATE sales SET status = 0 WHERE id=%s", (id,))
+        cursor.execute("UPDATE sales SET status = 0 WHERE id=%s AND status = 1", (id,))
+        # Si la venta seguía activa se descuentan sus pares de productos, se
+        # recalcula su hora en sales_hourly y se invalida el snapshot de su día
+        # para que end_of_day_balance lo recalcule
+        if cursor.rowcount:
+            cooccurrence.cancel_sale(cursor, id)
+            sales_rollup.refresh_sale_hour(cursor, id)
+            cursor.execute("DELETE FROM daily_balance WHERE day = (SELECT DATE(createdAt) FROM sales WHERE id=%s)", (id,))
         connection.commit()
     except Exception as e:
+        # Ni la cancelación ni sus efectos (pares, hora, snapshot) quedan a medias
+        connection.rollback()
         return {
             "statusCode": 500,
             "headers": {
@@ -185,4 +224,5 @@ def cancel_sale(id):
             }),
         }
     finally:
-        connection.close()
+        if shared is None:
+            connection.close()
@@ -0,0 +1,101 @@
+import os
+import random
+import threading
+import time
+
+from common import query_governor
+
+# Control de admisión: cuántas sesiones puede tener abiertas a la vez contra
+# la base un proceso, por clase de ruta. El slot se toma antes de abrir la
+# conexión, así que una solicitud rechazada no llega a ocupar una sesión de
+# MySQL ni agrega viajes. Las escrituras tienen prioridad: si sus slots están
+# ocupados usan los de lecturas y reportes, y esperan más antes de rendirse;
+# los reportes solo usan los suyos y no esperan. Sin slot la invocación
+# responde 503 DATABASE_BUSY.
+# Los slots son de cada proceso (router único, gateway local, replay con
+# hilos). En Lambda cada contenedor atiende una solicitud a la vez y el tope
+# entre contenedores es su concurrencia reservada; scripts/connection_budget.py
+# cuadra ambos números con max_connections.
+WRITE = "write"
+OLTP = query_governor.OLTP
+ANALYTICS = query_governor.ANALYTICS
+WRITE_FUNCTIONS = {
+    "cancel_sales", "save_category", "update_category", "save_sale", "save_product",
+    "update_product", "change_status_category_or_product"
+}
+DEFAULT_SLOTS = {WRITE: 12, OLTP: 20, ANALYTICS: 6}
+# Clases cuyos slots puede usar cada clase, en orden
+BORROWS = {WRITE: [WRITE, OLTP, ANALYTICS], OLTP: [OLTP], ANALYTICS: [ANALYTICS]}
+WAIT_SECONDS = {WRITE: 2.0, OLTP: 0.5, ANALYTICS: 0.0}
+POLL_SECONDS = (0.02, 0.1)
+SLOT_PREFIX = "slot_"
+
+local_locks = {}
+local_locks_lock = threading.Lock()
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, route_class, retry_after=1):
+        super().__init__("no database slot free for %s" % route_class)
+        self.route_class = route_class
+        self.retry_after = retry_after
+
+
+def enabled():
+    return os.environ.get("ADMISSION_CONTROL", "0") == "1"
+
+
+def route_class(function_name):
+    return WRITE if function_name in WRITE_FUNCTIONS else query_governor.route_class(function_name)
+
+
+def slots(setting=None):
+    # ADMISSION_SLOTS="write=12,oltp=20,analytics=6"; las clases que falten usan el valor por defecto
+    configured = dict(DEFAULT_SLOTS)
+    setting = os.environ.get("ADMISSION_SLOTS", "") if setting is None else setting
+    for item in setting.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() in configured and value.strip():
+            configured[name.strip()] = int(value)
+    return configured
+
+
+def candidates(klass, configured=None):
+    """Slots que puede tomar la clase; dentro de cada clase se empieza en uno
+    al azar para que los hilos no compitan por el primero."""
+    configured = configured or slots()
+    names = []
+    for borrowed in BORROWS[klass]:
+        count = configured[borrowed]
+        if count <= 0:
+            continue
+        start = random.randrange(count)
+        names.extend("%s%s_%d" % (SLOT_PREFIX, borrowed, (start + i) % count) for i in range(count))
+    return names
+
+
+def try_local(names):
+    for name in names:
+        with local_locks_lock:
+            lock = local_locks.setdefault(name, threading.Lock())
+        if lock.acquire(blocking=False):
+            return name
+    return None
+
+
+def admit(function_name):
+    """Toma un slot antes de abrir la conexión; devuelve la función que lo libera.
+
+    Lanza AdmissionRejected si no hay slot a tiempo.
+    """
+    klass = route_class(function_name)
+    names = candidates(klass)
+    deadline = time.monotonic() + WAIT_SECONDS[klass]
+    while True:
+        name = try_local(names)
+        if name is not None:
+            return local_locks[name].release
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise AdmissionRejected(klass)
+        time.sleep(min(remaining, random.uniform(*POLL_SECONDS)))
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import time
+import urllib.request
+
+import jwt
+
+from common import metrics
+
+# Verificación local de los JWT de Cognito para cuando el handler corre sin el
+# autorizador de API Gateway (gateway local o un router único). Las llaves del
+# JWKS se guardan por contenedor y solo se vuelven a pedir si llega un kid
+# desconocido; los tokens ya verificados se recuerdan hasta que expiran.
+REGION = os.environ.get("COGNITO_REGION", "us-east-2")
+USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID", "us-east-2_WxG0qudnH")
+CLIENT_ID = os.environ.get("COGNITO_CLIENT_ID", "5ffukkqllrcqtlffpbq1pjuuqc")
+ISSUER = "https://cognito-idp.%s.amazonaws.com/%s" % (REGION, USER_POOL_ID)
+JWKS_URL = ISSUER + "/.well-known/jwks.json"
+JWKS_REFRESH_INTERVAL = 60
+MAX_CACHED_TOKENS = 1000
+
+signing_keys = {}
+# None hasta la primera descarga: time.monotonic() puede empezar cerca de 0
+# en una máquina recién arrancada
+jwks_fetched_at = None
+verified_tokens = {}
+
+
+class AuthError(Exception):
+    pass
+
+
+def fetch_jwks():
+    with urllib.request.urlopen(JWKS_URL, timeout=2) as response:
+        return json.loads(response.read())
+
+
+def refresh_signing_keys():
+    global jwks_fetched_at
+    # El intento cuenta para el límite aunque falle; las llaves conocidas solo
+    # se reemplazan si el JWKS nuevo se descargó y se leyó completo
+    jwks_fetched_at = time.monotonic()
+    try:
+        keys = {key.key_id: key.key for key in jwt.PyJWKSet.from_dict(fetch_jwks()).keys}
+    except (OSError, ValueError, jwt.PyJWTError) as e:
+        raise AuthError("JWKS_UNAVAILABLE: %s" % e)
+    signing_keys.clear()
+    signing_keys.update(keys)
+
+
+def get_signing_key(kid):
+    # Un kid desconocido puede ser una rotación de llaves; se recarga el JWKS
+    # como máximo una vez por JWKS_REFRESH_INTERVAL para no amplificar ataques.
+    # Sin llaves todavía (o tras una descarga vacía) siempre se pide.
+    if kid not in signing_keys and (
+        not signing_keys
+        or jwks_fetched_at is None
+        or time.monotonic() - jwks_fetched_at >= JWKS_REFRESH_INTERVAL
+    ):
+        refresh_signing_keys()
+    if kid not in signing_keys:
+        raise AuthError("UNKNOWN_SIGNING_KEY")
+    return signing_keys[kid]
+
+
+def verify_token(token, now=None):
+    now = time.time() if now is None else now
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    cached = verified_tokens.get(token_hash)
+    if cached is not None and cached[0] > now:
+        metrics.count_cache(True)
+        return cached[1]
+    metrics.count_cache(False)
+
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        claims = jwt.decode(
+            token,
+            get_signing_key(kid),
+            algorithms=["RS256"],
+            issuer=ISSUER,
+            options={"verify_aud": False, "require": ["exp", "iss", "token_use"]}
+        )
+    except jwt.PyJWTError as e:
+        raise AuthError(str(e))
+
+    # El IdToken trae el cliente en aud y el AccessToken en client_id
+    if claims["token_use"] == "id":
+        audience = claims.get("aud")
+    elif claims["token_use"] == "access":
+        audience = claims.get("client_id")
+    else:
+        audience = None
+    if audience != CLIENT_ID:
+        raise AuthError("INVALID_AUDIENCE")
+
+    if len(verified_tokens) >= MAX_CACHED_TOKENS:
+        for expired in [key for key, (exp, _) in verified_tokens.items() if exp <= now]:
+            del verified_tokens[expired]
+        if len(verified_tokens) >= MAX_CACHED_TOKENS:
+            del verified_tokens[next(iter(verified_tokens))]
+    verified_tokens[token_hash] = (claims["exp"], claims)
+    return claims
+
+
+def get_claims(event):
+    # Detrás de API Gateway los claims ya vienen verificados por el autorizador
+    authorizer = (event.get("requestContext") or {}).get("authorizer") or {}
+    if "claims" in authorizer:
+        return authorizer["claims"]
+
+    headers = {key.lower(): value for key, value in (event.get("headers") or {}).items()}
+    token = headers.get("authorization")
+    if not token:
+        raise KeyError("claims")
+    if token.lower().startswith("bearer "):
+        token = token[7:]
+    return verify_token(token.strip())
@@ -0,0 +1,79 @@
+import math
+import os
+import threading
+import time
+
+# Circuit breaker por contenedor y por host de base de datos. Tras
+# BREAKER_FAILURES fallas transitorias seguidas (conexión rechazada, timeout,
+# demasiadas conexiones) el circuito se abre y durante BREAKER_OPEN_SECONDS
+# db.connect falla de inmediato en vez de esperar a RDS; la invocación responde
+# 503 con Retry-After (ver instrumentation.instrument). Pasado ese tiempo una
+# sola conexión de prueba decide si se cierra o se vuelve a abrir.
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "3"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "10"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# host -> Breaker
+breakers = {}
+breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, host, retry_after):
+        super().__init__("circuit open for %s, retry in %d s" % (host, retry_after))
+        self.host = host
+        self.retry_after = retry_after
+
+
+class Breaker:
+    def __init__(self, host, failures=None, open_seconds=None):
+        self.host = host
+        self.max_failures = BREAKER_FAILURES if failures is None else failures
+        self.open_seconds = BREAKER_OPEN_SECONDS if open_seconds is None else open_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def retry_after(self):
+        remaining = self.opened_at + self.open_seconds - time.monotonic()
+        return max(int(math.ceil(remaining)), 1)
+
+    def before_call(self):
+        """Lanza CircuitOpenError si no se debe intentar; deja pasar una sola prueba al reabrir."""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() >= self.opened_at + self.open_seconds:
+                self.state = HALF_OPEN
+                return
+            # Abierto, o con la conexión de prueba todavía en curso
+            raise CircuitOpenError(self.host, self.retry_after())
+
+    def record_success(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.max_failures:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+def for_host(host):
+    with breakers_lock:
+        breaker = breakers.get(host)
+        if breaker is None:
+            breaker = breakers[host] = Breaker(host)
+        return breaker
+
+
+def reset():
+    with breakers_lock:
+        breakers.clear()
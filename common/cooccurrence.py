@@ -0,0 +1,95 @@
+from itertools import permutations
+
+# Índice de "se compran juntos": cuántas ventas activas contienen cada par de
+# productos. Se guarda en ambas direcciones en product_pairs para que los
+# acompañantes de un producto salgan de una sola lectura por índice.
+INSERT_BATCH = 1000
+
+
+def sale_pairs(product_ids):
+    return list(permutations(sorted(set(product_ids)), 2))
+
+
+def record_sale(cursor, product_ids):
+    # Se llama dentro de la transacción que guarda la venta. save_sale no vive
+    # en este repositorio: mientras no la llame, la tabla se llena con
+    # scripts/rebuild_cooccurrence.py
+    pairs = sale_pairs(product_ids)
+    if pairs:
+        cursor.executemany("""
+            INSERT INTO product_pairs (product_id, companion_id, sales_count) VALUES (%s, %s, 1)
+            ON DUPLICATE KEY UPDATE sales_count = sales_count + 1
+        """, pairs)
+
+
+def cancel_sale(cursor, sale_id):
+    # Una sola sentencia para todos los pares de la venta: un viaje y los
+    # locks de product_pairs solo lo que dura ese UPDATE
+    cursor.execute("""
+        UPDATE product_pairs pp
+        JOIN (
+            SELECT DISTINCT a.product_id, b.product_id AS companion_id
+            FROM sales_products a
+            JOIN sales_products b ON a.sale_id = b.sale_id AND a.product_id <> b.product_id
+            WHERE a.sale_id = %s
+        ) x ON x.product_id = pp.product_id AND x.companion_id = pp.companion_id
+        SET pp.sales_count = pp.sales_count - 1
+        WHERE pp.sales_count > 0
+    """, (sale_id,))
+
+
+def get_companions(cursor, product_id, limit):
+    cursor.execute("""
+        SELECT pp.companion_id, p.name, pp.sales_count
+        FROM product_pairs pp
+        JOIN products p ON p.id = pp.companion_id
+        WHERE pp.product_id = %s AND pp.sales_count > 0
+        ORDER BY pp.sales_count DESC
+        LIMIT %s
+    """, (product_id, limit))
+    return cursor.fetchall()
+
+
+def count_pairs(rows):
+    # rows: [(sale_id, product_id), ...]. Con la matriz de incidencia venta x
+    # producto A, (Aᵀ·A)[i, j] es el número de ventas que contienen i y j.
+    import numpy as np
+    from scipy import sparse
+
+    if not rows:
+        return []
+    sale_ids, product_ids = np.asarray(rows, dtype=np.int64).T
+    sales, sale_index = np.unique(sale_ids, return_inverse=True)
+    products, product_index = np.unique(product_ids, return_inverse=True)
+    incidence = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (sale_index, product_index)),
+        shape=(len(sales), len(products))
+    )
+    # Una venta cuenta una sola vez aunque repita el producto en varias líneas
+    incidence.data[:] = 1
+    counts = (incidence.T @ incidence).tocoo()
+    off_diagonal = counts.row != counts.col
+    return list(zip(
+        products[counts.row[off_diagonal]].tolist(),
+        products[counts.col[off_diagonal]].tolist(),
+        counts.data[off_diagonal].tolist()
+    ))
+
+
+def rebuild(connection):
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT sp.sale_id, sp.product_id
+        FROM sales_products sp
+        JOIN sales s ON sp.sale_id = s.id
+        WHERE s.status = 1
+    """)
+    pairs = count_pairs(cursor.fetchall())
+    cursor.execute("DELETE FROM product_pairs")
+    for start in range(0, len(pairs), INSERT_BATCH):
+        cursor.executemany(
+            "INSERT INTO product_pairs (product_id, companion_id, sales_count) VALUES (%s, %s, %s)",
+            pairs[start:start + INSERT_BATCH]
+        )
+    connection.commit()
+    return len(pairs)
@@ -0,0 +1,204 @@
+import itertools
+import os
+import random
+import threading
+import time
+from datetime import datetime
+
+import pymysql
+
+from common import circuit_breaker
+
+# Punto único para abrir conexiones. Con DB_BACKEND=sqlite los handlers corren
+# contra una base SQLite local (common/sqlite_backend.py) sin Secrets Manager
+# ni RDS, para pruebas y benchmarks sin conexión.
+SQLITE_DEFAULT_PATH = "file:cafe_balu?mode=memory&cache=shared"
+
+# Timeouts explícitos (segundos): sin ellos una RDS saturada deja cada
+# invocación esperando hasta el Timeout de 25 s de la función. Los errores
+# transitorios al conectar se reintentan con backoff exponencial con jitter;
+# el peor caso (3 intentos de conexión más una lectura) queda por debajo de 25 s.
+CONNECT_TIMEOUT = float(os.environ.get("DB_CONNECT_TIMEOUT", "2"))
+READ_TIMEOUT = float(os.environ.get("DB_READ_TIMEOUT", "10"))
+WRITE_TIMEOUT = float(os.environ.get("DB_WRITE_TIMEOUT", "10"))
+CONNECT_RETRIES = int(os.environ.get("DB_CONNECT_RETRIES", "2"))
+RETRY_BASE_SECONDS = 0.05
+RETRY_MAX_SECONDS = 0.5
+# Demasiadas conexiones, límite por usuario, no se puede conectar, se fue el
+# servidor, conexión perdida (incluye el timeout de lectura)
+TRANSIENT_ERRORS = {1040, 1203, 2003, 2006, 2013}
+
+# Réplicas de lectura: segundos de retraso tolerados y cada cuánto se vuelve a
+# medir el retraso de una réplica (por contenedor de Lambda)
+MAX_REPLICA_LAG_SECONDS = float(os.environ.get("MAX_REPLICA_LAG_SECONDS", "2"))
+REPLICA_CHECK_SECONDS = float(os.environ.get("REPLICA_CHECK_SECONDS", "10"))
+# host -> (válido hasta, usable, retraso medido)
+replica_state = {}
+replica_lock = threading.Lock()
+rotation = itertools.count()
+
+
+def backend():
+    return os.environ.get("DB_BACKEND", "mysql")
+
+
+def load_credentials(fetch):
+    # fetch es el get_secret() de cada handler; con SQLite no se llama
+    if backend() == "sqlite":
+        return {
+            "host": "localhost",
+            "username": "",
+            "password": "",
+            "dbname": os.environ.get("DB_SQLITE_PATH", SQLITE_DEFAULT_PATH)
+        }
+    # Credenciales directas para correr los handlers contra otra base MySQL
+    # (benchmarks, staging) sin pasar por Secrets Manager
+    if os.environ.get("DB_HOST"):
+        return {
+            "host": os.environ["DB_HOST"],
+            "username": os.environ.get("DB_USER", ""),
+            "password": os.environ.get("DB_PASSWORD", ""),
+            "dbname": os.environ.get("DB_NAME", "")
+        }
+    return fetch()
+
+
+def connect(host=None, user=None, password=None, db=None, **kwargs):
+    if backend() == "sqlite":
+        from common import sqlite_backend
+        # El nombre de la base de MySQL no aplica. Un host con forma de ruta de
+        # SQLite (réplicas en pruebas) se abre tal cual; si no, sale del entorno.
+        if host and (host.startswith("file:") or host.endswith(".db")):
+            return sqlite_backend.connect(host)
+        return sqlite_backend.connect(os.environ.get("DB_SQLITE_PATH", SQLITE_DEFAULT_PATH))
+    kwargs.setdefault("connect_timeout", CONNECT_TIMEOUT)
+    kwargs.setdefault("read_timeout", READ_TIMEOUT)
+    kwargs.setdefault("write_timeout", WRITE_TIMEOUT)
+    breaker = circuit_breaker.for_host(host)
+    # Con el circuito abierto lanza CircuitOpenError sin tocar la red
+    breaker.before_call()
+    attempt = 0
+    while True:
+        try:
+            connection = pymysql.connect(host=host, user=user, password=password, db=db, **kwargs)
+        except pymysql.MySQLError as e:
+            if not is_transient(e):
+                # El servidor respondió (credenciales, base inexistente): no es saturación
+                breaker.record_success()
+                raise
+            if attempt >= CONNECT_RETRIES:
+                breaker.record_failure()
+                raise
+            time.sleep(backoff(attempt))
+            attempt += 1
+            continue
+        breaker.record_success()
+        return connection
+
+
+def is_transient(error):
+    return isinstance(error, pymysql.err.OperationalError) and bool(error.args) and error.args[0] in TRANSIENT_ERRORS
+
+
+def backoff(attempt):
+    # "Full jitter": evita que los contenedores reintenten todos al mismo tiempo
+    return random.uniform(0, min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+def replica_hosts(secrets):
+    # "replica_hosts" en el secreto: lista o texto separado por comas; opcional
+    hosts = secrets.get("replica_hosts") or []
+    if isinstance(hosts, str):
+        hosts = hosts.split(",")
+    return [host.strip() for host in hosts if host.strip()]
+
+
+def replica_lag(connection):
+    """Segundos de retraso según replication_heartbeat, o None si no se puede medir.
+
+    El primario actualiza la fila cada segundo (ver database/replication_heartbeat.sql);
+    en la réplica, NOW() menos el último latido replicado es el retraso.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT beat, NOW() FROM replication_heartbeat WHERE id = 1")
+        row = cursor.fetchone()
+    except pymysql.MySQLError:
+        return None
+    finally:
+        cursor.close()
+    if row is None or row[0] is None:
+        return None
+    beat, now = row
+    if isinstance(now, str):
+        # SQLite no tipa el resultado de NOW()
+        now = datetime.fromisoformat(now)
+    return max((now - beat).total_seconds(), 0.0)
+
+
+def connect_read(replicas, host=None, user=None, password=None, db=None, **kwargs):
+    """Conexión para handlers de solo lectura.
+
+    Prueba las réplicas en rotación y usa la primera que responde con un retraso
+    menor a MAX_REPLICA_LAG_SECONDS; si ninguna sirve, o no hay réplicas, va al
+    primario. El resultado de cada réplica se recuerda REPLICA_CHECK_SECONDS
+    para no medir el retraso en cada invocación.
+    """
+    if replicas:
+        start = next(rotation) % len(replicas)
+        for replica in replicas[start:] + replicas[:start]:
+            now = time.monotonic()
+            with replica_lock:
+                state = replica_state.get(replica)
+            if state is not None and state[0] > now and not state[1]:
+                continue
+            try:
+                connection = connect(host=replica, user=user, password=password, db=db, **kwargs)
+            except (pymysql.MySQLError, circuit_breaker.CircuitOpenError):
+                mark_replica(replica, False, None)
+                continue
+            if state is not None and state[0] > now:
+                return connection
+            lag = replica_lag(connection)
+            usable = lag is not None and lag <= MAX_REPLICA_LAG_SECONDS
+            mark_replica(replica, usable, lag)
+            if usable:
+                return connection
+            connection.close()
+    return connect(host=host, user=user, password=password, db=db, **kwargs)
+
+
+def mark_replica(replica, usable, lag):
+    with replica_lock:
+        replica_state[replica] = (time.monotonic() + REPLICA_CHECK_SECONDS, usable, lag)
+
+
+def record_query_error(cursor, error):
+    # Un timeout de lectura o una conexión perdida a media consulta también
+    # cuenta como falla para el circuito del host
+    host = getattr(getattr(cursor, "connection", None), "host", None)
+    if is_transient(error) and isinstance(host, str):
+        circuit_breaker.for_host(host).record_failure()
+
+
+class SharedConnection:
+    """Una sola conexión por invocación para handlers con varias consultas.
+
+    Se abre en el primer get() (una validación que falla antes no llega a
+    conectarse) y el handler la cierra al final. Sin ella, cada función
+    auxiliar abría su propia conexión y una petición ocupaba dos o tres.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.connection = None
+
+    def get(self):
+        if self.connection is None:
+            self.connection = self.factory()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,54 @@
+from itertools import chain
+
+import numpy as np
+
+# Estadísticas de demanda de todo el catálogo a la vez con arreglos de NumPy.
+# La matriz de demanda tiene una fila por producto y una columna por día,
+# donde la columna 0 es hoy y la columna i son las ventas de hace i días.
+HALF_LIFE_DAYS = 7
+
+
+def daily_matrix(product_ids, rows, days):
+    # rows: [(product_id, days_ago, quantity), ...] tal como sale del GROUP BY
+    ids = np.asarray(product_ids, dtype=np.int64)
+    if len(ids) == 0 or not rows:
+        return np.zeros((len(ids), days))
+    data = np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=3 * len(rows)).reshape(-1, 3)
+    order = np.argsort(ids)
+    position = np.searchsorted(ids[order], data[:, 0])
+    position = np.minimum(position, len(ids) - 1)
+    product_row = order[position]
+    days_ago = data[:, 1].astype(np.int64)
+    valid = (ids[product_row] == data[:, 0]) & (days_ago >= 0) & (days_ago < days)
+    cells = product_row[valid] * days + days_ago[valid]
+    return np.bincount(cells, weights=data[valid, 2], minlength=len(ids) * days).reshape(len(ids), days)
+
+
+def moving_average(matrix, half_life=HALF_LIFE_DAYS):
+    # Promedio móvil exponencial: los días recientes pesan más
+    weights = 0.5 ** (np.arange(matrix.shape[1]) / half_life)
+    return matrix @ (weights / weights.sum())
+
+
+def days_of_cover(stock, daily_rate):
+    stock = np.maximum(np.asarray(stock, dtype=np.float64), 0)
+    cover = np.full(stock.shape, np.inf)
+    selling = daily_rate > 0
+    cover[selling] = stock[selling] / daily_rate[selling]
+    # Sin existencias no hay cobertura, aunque no haya ventas recientes
+    cover[stock == 0] = 0
+    return cover
+
+
+def mean_and_std(matrix):
+    return matrix.mean(axis=1), matrix.std(axis=1)
+
+
+def order_quantities(stock, mean, std, lead_time, review_days, z):
+    # Revisión periódica: se pide hasta cubrir la demanda esperada del tiempo de
+    # entrega más el periodo de revisión, más un inventario de seguridad z·σ·√(L+R)
+    horizon = np.asarray(lead_time, dtype=np.float64) + review_days
+    safety_stock = z * std * np.sqrt(horizon)
+    order_up_to = mean * horizon + safety_stock
+    stock = np.maximum(np.asarray(stock, dtype=np.float64), 0)
+    return safety_stock, order_up_to, np.ceil(np.maximum(order_up_to - stock, 0))
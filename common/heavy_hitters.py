@@ -0,0 +1,106 @@
+import json
+import time
+
+# Top de productos "en vivo" con Space-Saving sobre una ventana deslizante.
+# Cada cubeta de BUCKET_SECONDS guarda como máximo CAPACITY contadores; el
+# conteo de un producto sobreestima el real en a lo sumo su "error", que está
+# acotado por (unidades vendidas en la ventana) / CAPACITY.
+# Todavía no hay ruta que lo use: lo tendría que alimentar save_sale, cuyo
+# código no vive en este repositorio. benchmarks/heavy_hitters_accuracy.py
+# mide su error contra el top exacto.
+CAPACITY = 64
+BUCKET_SECONDS = 300
+WINDOW_BUCKETS = 12
+
+
+class SpaceSaving:
+    def __init__(self, capacity=CAPACITY, counters=None):
+        self.capacity = capacity
+        # item -> [conteo, error]
+        self.counters = counters if counters is not None else {}
+
+    def minimum(self):
+        # Cota superior del conteo de cualquier producto que no está en el resumen
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def add(self, item, count=1):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += count
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+            return
+        # Reemplaza el contador mínimo y hereda su conteo como error
+        victim = min(self.counters, key=lambda key: self.counters[key][0])
+        minimum = self.counters.pop(victim)[0]
+        self.counters[item] = [minimum + count, minimum]
+
+    def merge(self, other):
+        own_minimum = self.minimum()
+        other_minimum = other.minimum()
+        merged = {}
+        for item in self.counters.keys() | other.counters.keys():
+            count, error = self.counters.get(item, (own_minimum, own_minimum))
+            other_count, other_error = other.counters.get(item, (other_minimum, other_minimum))
+            merged[item] = [count + other_count, error + other_error]
+        if len(merged) > self.capacity:
+            merged = dict(sorted(merged.items(), key=lambda pair: pair[1][0], reverse=True)[:self.capacity])
+        self.counters = merged
+
+    def top(self, k):
+        ranked = sorted(self.counters.items(), key=lambda pair: pair[1][0], reverse=True)[:k]
+        return [(item, count, error) for item, (count, error) in ranked]
+
+
+class RollingHeavyHitters:
+    def __init__(self, capacity=CAPACITY, bucket_seconds=BUCKET_SECONDS, window_buckets=WINDOW_BUCKETS, buckets=None):
+        self.capacity = capacity
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        # inicio de la cubeta (epoch) -> SpaceSaving
+        self.buckets = buckets if buckets is not None else {}
+
+    def _bucket_start(self, now):
+        return int(now) // self.bucket_seconds * self.bucket_seconds
+
+    def _expire(self, now):
+        oldest = self._bucket_start(now) - (self.window_buckets - 1) * self.bucket_seconds
+        for start in [start for start in self.buckets if start < oldest]:
+            del self.buckets[start]
+
+    def add(self, item, count=1, now=None):
+        now = time.time() if now is None else now
+        self._expire(now)
+        start = self._bucket_start(now)
+        bucket = self.buckets.get(start)
+        if bucket is None:
+            bucket = self.buckets[start] = SpaceSaving(self.capacity)
+        bucket.add(item, count)
+
+    def top(self, k, now=None):
+        now = time.time() if now is None else now
+        self._expire(now)
+        window = SpaceSaving(self.capacity * self.window_buckets)
+        for bucket in self.buckets.values():
+            window.merge(bucket)
+        return window.top(k)
+
+    def dumps(self):
+        return json.dumps({
+            "capacity": self.capacity,
+            "bucket_seconds": self.bucket_seconds,
+            "window_buckets": self.window_buckets,
+            "buckets": {str(start): bucket.counters for start, bucket in self.buckets.items()}
+        }, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, data):
+        raw = json.loads(data)
+        buckets = {}
+        for start, counters in raw["buckets"].items():
+            # JSON convierte las llaves a texto; los ids de producto son enteros
+            buckets[int(start)] = SpaceSaving(raw["capacity"], {int(item): counter for item, counter in counters.items()})
+        return cls(raw["capacity"], raw["bucket_seconds"], raw["window_buckets"], buckets)
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+
+from common import admission, circuit_breaker, db, metrics, profiling, query_governor, slow_queries
+
+# Tiempos por invocación: secreto, conexión, cada consulta, serialización y
+# viajes a la base de datos. Se emiten en una sola línea JSON por invocación y,
+# con SERVER_TIMING=1, en el header Server-Timing para verlos en el navegador.
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+INSERT_VALUES = re.compile(r"^\s*INSERT\b.+\bVALUES\b", re.IGNORECASE | re.DOTALL)
+
+current = threading.local()
+# Fases medidas al importar el módulo (secreto, clientes); se reportan en el arranque en frío
+init_phases = {}
+started_functions = set()
+
+
+class Invocation:
+    def __init__(self, function_name, route, cold_start):
+        self.function_name = function_name
+        self.route = route
+        self.cold_start = cold_start
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.queries = []
+        self.round_trips = 0
+        # Segundos para Retry-After y mensaje si la base no estuvo disponible
+        # (circuito abierto o sin slot de admisión)
+        self.retry_after = None
+        self.unavailable = None
+
+    def add_phase(self, name, elapsed_ms):
+        self.phases[name] = self.phases.get(name, 0.0) + elapsed_ms
+
+    def add_query(self, elapsed_ms, round_trips=1):
+        self.queries.append(round(elapsed_ms, 2))
+        self.round_trips += round_trips
+        self.add_phase("query", elapsed_ms)
+
+    def duration_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        entries = ["%s;dur=%.1f" % (name, elapsed) for name, elapsed in self.phases.items()]
+        # Sin dur: es un conteo, no un tiempo (lo lee benchmarks/replay.py)
+        entries.append('db;desc="%d round trips"' % self.round_trips)
+        entries.append("total;dur=%.1f" % self.duration_ms())
+        return ", ".join(entries)
+
+    def summary(self, status_code):
+        return {
+            "function": self.function_name,
+            "route": self.route,
+            "cold_start": self.cold_start,
+            "status_code": status_code,
+            "duration_ms": round(self.duration_ms(), 2),
+            "phases": {name: round(elapsed, 2) for name, elapsed in self.phases.items()},
+            "queries_ms": self.queries,
+            "db_round_trips": self.round_trips
+        }
+
+
+def active():
+    return getattr(current, "invocation", None)
+
+
+def record_phase(name, elapsed_ms):
+    invocation = active()
+    if invocation is not None:
+        invocation.add_phase(name, elapsed_ms)
+    else:
+        init_phases[name] = init_phases.get(name, 0.0) + elapsed_ms
+
+
+@contextmanager
+def phase(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, (time.perf_counter() - started) * 1000)
+
+
+def dumps(obj, **kwargs):
+    with phase("serialize"):
+        return json.dumps(obj, **kwargs)
+
+
+class TimedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, args=None):
+        invocation = active()
+        if invocation is not None:
+            # Límite de tiempo para los SELECT de las rutas de reportes
+            query = query_governor.govern(query, invocation.function_name)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        except pymysql.MySQLError as e:
+            db.record_query_error(self._cursor, e)
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            invocation = active()
+            if invocation is not None:
+                invocation.add_query(elapsed_ms)
+            slow_queries.record(self._cursor, query, args, elapsed_ms)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        except pymysql.MySQLError as e:
+            db.record_query_error(self._cursor, e)
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            invocation = active()
+            if invocation is not None:
+                # pymysql agrupa los INSERT ... VALUES en una sola sentencia
+                trips = 1 if INSERT_VALUES.match(query) else max(len(args), 1)
+                invocation.add_query(elapsed_ms, trips)
+            slow_queries.record(self._cursor, query, None, elapsed_ms, explain=False)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TimedConnection:
+    def __init__(self, connection):
+        self._connection = connection
+        # Libera el slot de admisión al cerrar
+        self.release = None
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._connection.cursor(*args, **kwargs))
+
+    def commit(self):
+        with phase("commit"):
+            result = self._connection.commit()
+        invocation = active()
+        if invocation is not None:
+            invocation.round_trips += 1
+        return result
+
+    def close(self):
+        try:
+            return self._connection.close()
+        finally:
+            if self.release is not None:
+                self.release()
+                self.release = None
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def mark_unavailable(invocation, error):
+    invocation.retry_after = error.retry_after
+    invocation.unavailable = "DATABASE_BUSY" if isinstance(error, admission.AdmissionRejected) else "DATABASE_UNAVAILABLE"
+
+
+def connect(factory, *args, **kwargs):
+    invocation = active()
+    release = None
+    if invocation is not None and admission.enabled():
+        # El slot se toma antes de abrir la sesión: sin slot no hay conexión
+        try:
+            with phase("admission"):
+                release = admission.admit(invocation.function_name)
+        except admission.AdmissionRejected as e:
+            mark_unavailable(invocation, e)
+            raise
+    started = time.perf_counter()
+    try:
+        connection = factory(*args, **kwargs)
+    except Exception as e:
+        if release is not None:
+            release()
+        if isinstance(e, circuit_breaker.CircuitOpenError) and invocation is not None:
+            mark_unavailable(invocation, e)
+        raise
+    finally:
+        record_phase("connect", (time.perf_counter() - started) * 1000)
+    if invocation is not None:
+        invocation.round_trips += 1
+    connection = TimedConnection(connection)
+    connection.release = release
+    return connection
+
+
+def unavailable(response, retry_after, message):
+    headers = response.get("headers") if isinstance(response, dict) else None
+    return {
+        "statusCode": 503,
+        "headers": {
+            **(headers or {"Access-Control-Allow-Origin": "*"}),
+            "Retry-After": str(retry_after)
+        },
+        "body": json.dumps({
+            "message": message
+        }),
+    }
+
+
+def instrument(function_name):
+    def decorator(handler):
+        def wrapper(event, context):
+            cold_start = function_name not in started_functions
+            started_functions.add(function_name)
+            invocation = Invocation(function_name, (event or {}).get("resource"), cold_start)
+            if cold_start:
+                for name, elapsed in init_phases.items():
+                    invocation.add_phase("init_" + name, elapsed)
+                init_phases.clear()
+            current.invocation = invocation
+            metrics.start()
+            response = None
+            try:
+                if profiling.should_profile(event):
+                    response = profiling.run(function_name, handler, event, context)
+                else:
+                    response = handler(event, context)
+            except (circuit_breaker.CircuitOpenError, admission.AdmissionRejected) as e:
+                mark_unavailable(invocation, e)
+            finally:
+                current.invocation = None
+                if invocation.retry_after is not None:
+                    # El handler pudo convertir el error en 500 (o en otra cosa);
+                    # sin base disponible la respuesta es siempre 503
+                    response = unavailable(response, invocation.retry_after, invocation.unavailable)
+                status_code = response.get("statusCode") if isinstance(response, dict) else None
+                if isinstance(response, dict) and os.environ.get("SERVER_TIMING") == "1":
+                    response["headers"] = {
+                        **(response.get("headers") or {}),
+                        "Server-Timing": invocation.server_timing(),
+                        "Timing-Allow-Origin": "*"
+                    }
+                logger.info(json.dumps(invocation.summary(status_code)))
+                metrics.put_metric("Latency", round(invocation.duration_ms(), 2), "Milliseconds")
+                metrics.put_metric("DbRoundTrips", invocation.round_trips, "Count")
+                metrics.put_metric("Queries", len(invocation.queries), "Count")
+                metrics.put_metric("ColdStart", int(cold_start), "Count")
+                metrics.put_metric("ServerErrors", int(status_code is None or status_code >= 500), "Count")
+                metrics.put_metric("CircuitOpen", int(invocation.unavailable == "DATABASE_UNAVAILABLE"), "Count")
+                metrics.put_metric("AdmissionRejected", int(invocation.unavailable == "DATABASE_BUSY"), "Count")
+                metrics.flush(function_name, invocation.route)
+            return response
+        wrapper.__name__ = handler.__name__
+        wrapper.__wrapped__ = handler
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+import threading
+import time
+
+# Métricas de CloudWatch en Embedded Metric Format: se acumulan durante la
+# invocación y se imprimen como un solo documento JSON en stdout al final.
+# CloudWatch las extrae del log, sin llamadas síncronas a PutMetricData.
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "CafeBalu")
+# CloudWatch acepta hasta 100 valores por métrica en un documento
+MAX_VALUES = 100
+
+current = threading.local()
+
+
+def start():
+    current.metrics = {}
+
+
+def put_metric(name, value, unit="None"):
+    buffer = getattr(current, "metrics", None)
+    if buffer is None:
+        return
+    entry = buffer.setdefault(name, {"unit": unit, "values": []})
+    if len(entry["values"]) < MAX_VALUES:
+        entry["values"].append(value)
+
+
+def count_cache(hit):
+    put_metric("CacheHits" if hit else "CacheMisses", 1, "Count")
+
+
+def document(function_name, route, buffer, timestamp=None):
+    doc = {
+        "_aws": {
+            "Timestamp": int((time.time() if timestamp is None else timestamp) * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": NAMESPACE,
+                "Dimensions": [["FunctionName", "Route"], ["FunctionName"]],
+                "Metrics": [{"Name": name, "Unit": entry["unit"]} for name, entry in buffer.items()]
+            }]
+        },
+        "FunctionName": function_name,
+        # Una dimensión no puede ir vacía; las invocaciones directas no traen resource
+        "Route": route or "direct"
+    }
+    for name, entry in buffer.items():
+        values = entry["values"]
+        doc[name] = values[0] if len(values) == 1 else values
+    return doc
+
+
+def flush(function_name, route):
+    buffer = getattr(current, "metrics", None)
+    current.metrics = None
+    if not buffer:
+        return None
+    doc = document(function_name, route, buffer)
+    sys.stdout.write(json.dumps(doc) + "\n")
+    sys.stdout.flush()
+    return doc
@@ -0,0 +1,126 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import resource
+import time
+import tracemalloc
+
+# Perfilado bajo demanda de una invocación: cProfile para el tiempo por función
+# y tracemalloc para el pico de memoria. Se activa con PROFILE=1, con un
+# porcentaje de invocaciones (PROFILE_SAMPLE_RATE entre 0 y 1) o con el header
+# X-Profile: 1 enviado por un administrador. Los archivos se escriben en /tmp,
+# se suben a S3 si hay PROFILE_BUCKET y se borran al terminar: /tmp sobrevive
+# entre invocaciones del contenedor y no debe llenarse. El bucket cafe-balu
+# permite lectura pública, así que la subida está apagada por defecto; sin ella
+# queda solo el reporte en el log.
+logger = logging.getLogger()
+
+PROFILE_DIR = "/tmp"
+PROFILE_HEADER = "x-profile"
+
+s3_client = None
+
+
+def requested_by_admin(event):
+    headers = {key.lower(): value for key, value in (event.get("headers") or {}).items()}
+    if headers.get(PROFILE_HEADER) != "1":
+        return False
+    # Solo los claims que ya verificó el autorizador de API Gateway: las
+    # funciones de lectura no llevan pyjwt para validar un token por su cuenta
+    authorizer = (event.get("requestContext") or {}).get("authorizer") or {}
+    claims = authorizer.get("claims") or {}
+    return "admin" in (claims.get("cognito:groups") or "")
+
+
+def should_profile(event):
+    if os.environ.get("PROFILE") == "1":
+        return True
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE") or 0)
+    if sample_rate > 0 and random.random() < sample_rate:
+        return True
+    return requested_by_admin(event or {})
+
+
+def top_functions(profiler, limit):
+    stats = pstats.Stats(profiler)
+    ranked = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [{
+        "function": "%s:%d(%s)" % (os.path.basename(filename), line, name),
+        "calls": calls,
+        "total_ms": round(total * 1000, 3),
+        "cumulative_ms": round(cumulative * 1000, 3)
+    } for (filename, line, name), (_, calls, total, cumulative, _) in ranked]
+
+
+def top_allocations(snapshot, limit):
+    return [{
+        "line": "%s:%d" % (os.path.basename(stat.traceback[0].filename), stat.traceback[0].lineno),
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count
+    } for stat in snapshot.statistics("lineno")[:limit]]
+
+
+def upload(paths, function_name):
+    global s3_client
+    bucket = os.environ.get("PROFILE_BUCKET")
+    if not bucket:
+        return []
+    if s3_client is None:
+        import boto3
+        s3_client = boto3.client("s3")
+    keys = []
+    for path in paths:
+        key = "profiles/%s/%s" % (function_name, os.path.basename(path))
+        s3_client.upload_file(path, bucket, key)
+        keys.append("s3://%s/%s" % (bucket, key))
+    return keys
+
+
+def run(function_name, handler, event, context):
+    limit = int(os.environ.get("PROFILE_TOP_N") or 15)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Ya hay otro perfilador activo en el proceso
+        return handler(event, context)
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        return handler(event, context)
+    finally:
+        profiler.disable()
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+
+        prefix = os.path.join(PROFILE_DIR, "%s-%d" % (function_name, time.time() * 1000))
+        profiler.dump_stats(prefix + ".prof")
+        snapshot.dump(prefix + ".tracemalloc")
+        report = {
+            "profile": function_name,
+            "files": [prefix + ".prof", prefix + ".tracemalloc"],
+            "peak_traced_mb": round(peak / (1024 * 1024), 2),
+            # ru_maxrss viene en KB en Linux; es el máximo de todo el contenedor
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+            "memory_size_mb": os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE"),
+            "top_functions": top_functions(profiler, limit),
+            "top_allocations": top_allocations(snapshot, limit)
+        }
+        try:
+            report["uploaded"] = upload(report["files"], function_name)
+        except Exception as e:
+            report["upload_error"] = str(e)
+        finally:
+            for path in report["files"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        logger.info(json.dumps(report))
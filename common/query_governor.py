@@ -0,0 +1,96 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Gobernador de consultas. Cada función se clasifica como OLTP (catálogo,
+# cancelaciones, inventario) o analytics (reportes). Los SELECT de analytics
+# llevan el hint MAX_EXECUTION_TIME para que un reporte sobre un rango grande
+# no acapare la RDS micro y las escrituras mantengan su latencia; al pasar el
+# límite MySQL corta la sentencia con el error 3024 y el handler responde con
+# el último reporte que tenga o con 503 REPORT_TIMEOUT.
+OLTP = "oltp"
+ANALYTICS = "analytics"
+ANALYTICS_FUNCTIONS = {"end_of_day_balance", "top_sold_products", "sales_heatmap"}
+ANALYTICS_MAX_EXECUTION_MS = int(os.environ.get("ANALYTICS_MAX_EXECUTION_MS", "3000"))
+# ER_QUERY_TIMEOUT: maximum statement execution time exceeded
+QUERY_TIMEOUT = 3024
+RETRY_AFTER_SECONDS = 30
+
+# Último resultado bueno de cada reporte, por contenedor
+REPORT_CACHE_SIZE = 32
+reports = OrderedDict()
+reports_lock = threading.Lock()
+
+TOKENS = re.compile(r"'(?:[^'\\]|\\.)*'|\(|\)|\bSELECT\b", re.IGNORECASE)
+LEADING = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+HINT = re.compile(r"MAX_EXECUTION_TIME\s*\(", re.IGNORECASE)
+
+
+def route_class(function_name):
+    return ANALYTICS if function_name in ANALYTICS_FUNCTIONS else OLTP
+
+
+def limit_ms(function_name):
+    return ANALYTICS_MAX_EXECUTION_MS if route_class(function_name) == ANALYTICS else None
+
+
+def govern(query, function_name):
+    limit = limit_ms(function_name)
+    if not limit:
+        return query
+    return with_limit(query, limit)
+
+
+def with_limit(query, limit):
+    """Agrega /*+ MAX_EXECUTION_TIME(limit) */ al SELECT principal.
+
+    MySQL solo acepta el hint en el bloque de consulta de más afuera; en un
+    WITH ... SELECT ese es el primer SELECT fuera de paréntesis. Otras
+    sentencias (INSERT, UPDATE) no se tocan.
+    """
+    if not LEADING.match(query) or HINT.search(query):
+        return query
+    depth = 0
+    for token in TOKENS.finditer(query):
+        text = token.group()
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth -= 1
+        elif depth == 0 and text.upper() == "SELECT":
+            return "%s /*+ MAX_EXECUTION_TIME(%d) */%s" % (query[:token.end()], limit, query[token.end():])
+    return query
+
+
+def is_timeout(error):
+    return bool(getattr(error, "args", None)) and error.args[0] == QUERY_TIMEOUT
+
+
+def remember(key, value):
+    with reports_lock:
+        reports[key] = (time.monotonic(), value)
+        reports.move_to_end(key)
+        if len(reports) > REPORT_CACHE_SIZE:
+            reports.popitem(last=False)
+
+
+def last_report(key):
+    # (valor, segundos de antigüedad) o None
+    with reports_lock:
+        entry = reports.get(key)
+    if entry is None:
+        return None
+    return entry[1], round(time.monotonic() - entry[0], 1)
+
+
+def timeout_response(headers):
+    return {
+        "statusCode": 503,
+        "headers": {**headers, "Retry-After": str(RETRY_AFTER_SECONDS)},
+        "body": json.dumps({
+            "message": "REPORT_TIMEOUT"
+        }),
+    }
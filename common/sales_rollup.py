@@ -0,0 +1,33 @@
+# Rollup por hora de las ventas activas (tabla sales_hourly). Permite responder
+# reportes por rango, como /sales_heatmap?source=rollup, leyendo una fila por
+# hora en lugar de una por venta.
+HOUR_FORMAT = "%%Y-%%m-%%d %%H:00:00"
+
+
+def refresh_range(cursor, start, end):
+    # Recalcula las horas en [start, end); se usa para el backfill
+    cursor.execute("DELETE FROM sales_hourly WHERE hour >= %s AND hour < %s", (start, end))
+    cursor.execute("""
+        INSERT INTO sales_hourly (hour, sales_count, revenue)
+        SELECT DATE_FORMAT(createdAt, '""" + HOUR_FORMAT + """'), COUNT(*), SUM(total)
+        FROM sales
+        WHERE status = 1 AND createdAt >= %s AND createdAt < %s
+        GROUP BY 1
+    """, (start, end))
+
+
+def refresh_sale_hour(cursor, sale_id):
+    # Recalcula solo la hora de la venta; se llama al guardar o cancelar una venta
+    cursor.execute("""
+        INSERT INTO sales_hourly (hour, sales_count, revenue)
+        SELECT h.hour, COUNT(s.id), COALESCE(SUM(s.total), 0)
+        FROM (
+            SELECT CAST(DATE_FORMAT(createdAt, '""" + HOUR_FORMAT + """') AS DATETIME) AS hour
+            FROM sales
+            WHERE id = %s
+        ) h
+        LEFT JOIN sales s
+            ON s.status = 1 AND s.createdAt >= h.hour AND s.createdAt < h.hour + INTERVAL 1 HOUR
+        GROUP BY h.hour
+        ON DUPLICATE KEY UPDATE sales_count = VALUES(sales_count), revenue = VALUES(revenue)
+    """, (sale_id,))
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+
+from common import instrumentation, metrics
+
+# Coalescencia (single-flight) de lecturas idénticas concurrentes. Cuando varios
+# hilos del mismo proceso (router único o gateway local) atienden la misma
+# solicitud a la vez, solo el primero ejecuta el handler; los demás esperan y
+# reciben su respuesta ya serializada. No es un caché: al terminar la llave se
+# libera y la siguiente solicitud vuelve a la base. En Lambda cada contenedor
+# atiende una solicitud a la vez, así que ahí nunca coalesce.
+ENABLED = os.environ.get("SINGLE_FLIGHT", "1") == "1"
+
+# llave -> Flight en curso
+in_flight = {}
+lock = threading.Lock()
+# Totales del proceso: solicitudes que ejecutaron el handler, que reusaron la
+# respuesta de otra y consultas que se ahorraron
+stats = {"leaders": 0, "followers": 0, "queries_saved": 0}
+
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.queries = 0
+
+
+def request_key(function_name, event):
+    # Misma función, ruta, parámetros y cuerpo (sin importar el orden de las llaves del JSON)
+    event = event or {}
+    body = event.get("body")
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            pass
+    return (
+        function_name,
+        event.get("httpMethod"),
+        event.get("resource") or event.get("path"),
+        json.dumps(event.get("pathParameters") or {}, sort_keys=True),
+        json.dumps(event.get("queryStringParameters") or {}, sort_keys=True),
+        body
+    )
+
+
+def shareable(response):
+    # Un 5xx (base caída, sin slot de admisión) no se reparte: cada quien lo reintenta
+    return isinstance(response, dict) and (response.get("statusCode") or 500) < 500
+
+
+def coalesce(function_name):
+    def decorator(handler):
+        def wrapper(event, context):
+            if not ENABLED:
+                return handler(event, context)
+            key = request_key(function_name, event)
+            with lock:
+                flight = in_flight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = in_flight[key] = Flight()
+            if leader:
+                return lead(key, flight, handler, event, context)
+
+            flight.done.wait()
+            if not shareable(flight.response):
+                return handler(event, context)
+            with lock:
+                stats["followers"] += 1
+                stats["queries_saved"] += flight.queries
+            metrics.put_metric("Coalesced", 1, "Count")
+            metrics.put_metric("QueriesSaved", flight.queries, "Count")
+            # Copia: instrument() agrega sus headers a cada respuesta
+            return dict(flight.response)
+        wrapper.__name__ = handler.__name__
+        wrapper.__wrapped__ = handler
+        return wrapper
+    return decorator
+
+
+def lead(key, flight, handler, event, context):
+    try:
+        response = handler(event, context)
+        flight.response = dict(response) if isinstance(response, dict) else response
+        return response
+    finally:
+        invocation = instrumentation.active()
+        flight.queries = len(invocation.queries) if invocation is not None else 0
+        with lock:
+            del in_flight[key]
+            stats["leaders"] += 1
+        flight.done.set()
+
+
+def snapshot():
+    with lock:
+        return dict(stats)
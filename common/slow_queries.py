@@ -0,0 +1,80 @@
+import json
+import logging
+import os
+import re
+
+# Registro de consultas lentas. Cada sentencia se normaliza a una huella
+# (literales y parámetros como ?) y por contenedor se guardan cuántas veces
+# corrió y cuánto tardó. La primera vez que una huella pasa del umbral se
+# ejecuta EXPLAIN y se registra, para ver los escaneos completos en los logs.
+logger = logging.getLogger()
+
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+MAX_FINGERPRINTS = 500
+EXPLAINABLE = ("select", "with", "update", "delete", "insert", "replace")
+
+COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*", re.DOTALL)
+STRINGS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+PARAMETERS = re.compile(r"%s|%\(\w+\)s")
+VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+SPACES = re.compile(r"\s+")
+
+# huella -> [veces, total_ms, max_ms]
+stats = {}
+explained = set()
+
+
+def fingerprint(query):
+    query = COMMENTS.sub(" ", query)
+    query = STRINGS.sub("?", query)
+    query = PARAMETERS.sub("?", query)
+    query = NUMBERS.sub("?", query)
+    # IN (?, ?, ?) y VALUES (?, ?) cuentan igual sin importar cuántos valores traen
+    query = VALUE_LISTS.sub("(?+)", query)
+    return SPACES.sub(" ", query).strip().lower()
+
+
+def record(cursor, query, args, elapsed_ms, explain=True):
+    key = fingerprint(query)
+    entry = stats.get(key)
+    if entry is None and len(stats) < MAX_FINGERPRINTS:
+        entry = stats[key] = [0, 0.0, 0.0]
+    if entry is not None:
+        entry[0] += 1
+        entry[1] += elapsed_ms
+        entry[2] = max(entry[2], elapsed_ms)
+
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    log = {"slow_query": key, "elapsed_ms": round(elapsed_ms, 2)}
+    if entry is not None:
+        log.update(count=entry[0], total_ms=round(entry[1], 2), max_ms=round(entry[2], 2))
+    if explain and key not in explained and key.startswith(EXPLAINABLE):
+        explained.add(key)
+        log["explain"] = run_explain(cursor, query, args)
+    logger.warning(json.dumps(log, default=str))
+
+
+def run_explain(cursor, query, args):
+    # Cursor aparte: el resultado de la consulta original sigue sin leerse
+    try:
+        explain_cursor = cursor.connection.cursor()
+        try:
+            explain_cursor.execute("EXPLAIN " + query, args)
+            columns = [column[0] for column in explain_cursor.description or []]
+            return [dict(zip(columns, row)) for row in explain_cursor.fetchall()]
+        finally:
+            explain_cursor.close()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def top(limit=10):
+    ranked = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [{
+        "fingerprint": key,
+        "count": count,
+        "total_ms": round(total, 2),
+        "max_ms": round(maximum, 2)
+    } for key, (count, total, maximum) in ranked]
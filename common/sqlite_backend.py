@@ -0,0 +1,400 @@
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+
+import pymysql
+
+# Backend SQLite para correr los handlers sin RDS. Traduce las construcciones
+# de MySQL que usa el código (placeholders %s, DATE_FORMAT, DATEDIFF, WEEKDAY,
+# HOUR, INTERVAL, ON DUPLICATE KEY UPDATE, FOR UPDATE, UPDATE ... JOIN) y el
+# DDL de database/*.sql.
+# No es un emulador general de MySQL: solo cubre lo que el repo usa.
+SCHEMA_DIR = os.environ.get(
+    "DB_SCHEMA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database")
+)
+BASE_SCHEMA = "base_tables.sql"
+
+# Una conexión abierta por ruta mantiene viva la base en memoria compartida
+anchors = {}
+anchors_lock = threading.Lock()
+
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+
+
+def convert_datetime(value):
+    try:
+        return datetime.fromisoformat(value.decode())
+    except ValueError:
+        return value.decode()
+
+
+def convert_date(value):
+    try:
+        return date.fromisoformat(value.decode()[:10])
+    except ValueError:
+        return value.decode()
+
+
+sqlite3.register_converter("DATETIME", convert_datetime)
+sqlite3.register_converter("DATE", convert_date)
+
+
+def split_arguments(text):
+    # Separa los argumentos de una llamada respetando paréntesis y comillas
+    arguments, depth, quote, start = [], 0, None, 0
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            arguments.append(text[start:i].strip())
+            start = i + 1
+    arguments.append(text[start:].strip())
+    return arguments
+
+
+def rewrite_calls(sql, name, rewrite):
+    pattern = re.compile(r"\b" + name + r"\s*\(", re.IGNORECASE)
+    result, position = [], 0
+    while True:
+        match = pattern.search(sql, position)
+        if match is None:
+            result.append(sql[position:])
+            return "".join(result)
+        depth, quote, end = 1, None, match.end()
+        while depth:
+            char = sql[end]
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in "'\"":
+                quote = char
+            elif char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            end += 1
+        inner = rewrite_calls(sql[match.end():end - 1], name, rewrite)
+        result.append(sql[position:match.start()])
+        result.append(rewrite(split_arguments(inner)))
+        position = end
+
+
+def rewrite_cast(arguments):
+    expression = re.match(r"(.*)\s+AS\s+(\w+)$", arguments[0], re.IGNORECASE | re.DOTALL)
+    if expression and expression.group(2).upper() == "DATETIME":
+        return "datetime(%s)" % expression.group(1)
+    if expression and expression.group(2).upper() == "DATE":
+        return "date(%s)" % expression.group(1)
+    return "CAST(%s)" % arguments[0]
+
+
+# Los % que agrega la traducción se marcan aparte para que no los toque el
+# manejo de %% de los placeholders
+PERCENT = "\x00"
+
+FUNCTIONS = [
+    ("DATE_FORMAT", lambda args: "strftime(%s, %s)" % (args[1].replace("%i", "%M").replace("%s", "%S"), args[0])),
+    ("DATEDIFF", lambda args: "CAST(julianday(date(%s)) - julianday(date(%s)) AS INTEGER)" % (args[0], args[1])),
+    # WEEKDAY de MySQL: lunes = 0; strftime('%w'): domingo = 0
+    ("WEEKDAY", lambda args: "((CAST(strftime('%sw', %s) AS INTEGER) + 6) %s 7)" % (PERCENT, args[0], PERCENT)),
+    ("HOUR", lambda args: "CAST(strftime('%sH', %s) AS INTEGER)" % (PERCENT, args[0])),
+    ("NOW", lambda args: "datetime('now', 'localtime')"),
+    ("CURDATE", lambda args: "date('now', 'localtime')"),
+    ("CAST", rewrite_cast),
+]
+
+INTERVAL = re.compile(r"([\w.]+)\s*([+-])\s*INTERVAL\s+(\d+)\s+(SECOND|MINUTE|HOUR|DAY)\b", re.IGNORECASE)
+ON_DUPLICATE = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.IGNORECASE)
+VALUES_REFERENCE = re.compile(r"\bVALUES\s*\(\s*(\w+)\s*\)", re.IGNORECASE)
+# UPDATE t alias JOIN (subconsulta) x ON ... SET ... [WHERE ...], sobre el SQL
+# con el contenido de los paréntesis en blanco (ver outer_parentheses)
+UPDATE_JOIN = re.compile(
+    r"^\s*UPDATE\s+(\w+)\s+(\w+)\s+JOIN\s+(\(\s*\)|\w+)\s+(\w+)\s+ON\s+(.*?)\s+SET\s+(.*?)(?:\s+WHERE\s+(.*?))?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+# Hint de common/query_governor.py: se quita antes de traducir y se aplica con
+# un progress handler que corta la sentencia al pasar el límite
+EXECUTION_HINT = re.compile(r"/\*\+\s*MAX_EXECUTION_TIME\((\d+)\)\s*\*/\s*", re.IGNORECASE)
+
+
+def top_level(sql):
+    # Misma longitud que sql, con lo que está entre paréntesis en blanco
+    depth, chars = 0, []
+    for char in sql:
+        if char == "(":
+            depth += 1
+        chars.append(char if depth == 0 else " ")
+        if char == ")":
+            depth -= 1
+    return "".join(chars)
+
+
+def outer_parentheses(sql):
+    # Como top_level, pero deja visibles los paréntesis de más afuera
+    depth, chars = 0, []
+    for char in sql:
+        if char == ")":
+            depth -= 1
+        chars.append(char if depth == 0 else " ")
+        if char == "(":
+            depth += 1
+    return "".join(chars)
+
+
+def rewrite_update_join(sql):
+    # SQLite no tiene UPDATE con JOIN; lo equivalente es UPDATE ... FROM, con
+    # las columnas a asignar sin el alias de la tabla
+    match = UPDATE_JOIN.match(outer_parentheses(sql))
+    if not match:
+        return sql
+    table, alias, source, source_alias, condition, assignments, where = (
+        sql[match.start(i):match.end(i)] if match.start(i) >= 0 else None for i in range(1, 8)
+    )
+    assignments = re.sub(r"(^|,)\s*" + alias + r"\.(\w+)\s*=", r"\1 \2 =", assignments)
+    sql = "UPDATE %s AS %s SET %s FROM %s AS %s WHERE (%s)" % (
+        table, alias, assignments, source, source_alias, condition
+    )
+    return sql + (" AND (%s)" % where if where else "")
+
+
+def rewrite_placeholders(sql, paramstyle):
+    # pymysql solo interpola (y convierte %% en %) cuando hay argumentos
+    if paramstyle is None:
+        return sql
+    if paramstyle == "named":
+        sql = re.sub(r"%\((\w+)\)s", r":\1", sql)
+    else:
+        sql = re.sub(r"(?<!%)%s", "?", sql)
+    return sql.replace("%%", "%")
+
+
+@lru_cache(maxsize=512)
+def translate(sql, paramstyle="qmark"):
+    # Se traducen las funciones antes que los placeholders para que '%%Y' siga escapado
+    for name, rewrite in FUNCTIONS:
+        sql = rewrite_calls(sql, name, rewrite)
+    sql = INTERVAL.sub(
+        lambda m: "datetime(%s, '%s%s %ss')" % (m.group(1), m.group(2), m.group(3), m.group(4).lower()), sql
+    )
+    sql = re.sub(r"\bFOR\s+UPDATE\b", "", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE", sql, flags=re.IGNORECASE)
+    sql = rewrite_update_join(sql)
+
+    upsert = ON_DUPLICATE.search(sql)
+    if upsert:
+        head, assignments = sql[:upsert.start()], sql[upsert.end():]
+        assignments = VALUES_REFERENCE.sub(r"excluded.\1", assignments)
+        # INSERT ... SELECT seguido de ON CONFLICT necesita un WHERE para que
+        # SQLite no lo confunda con el ON de un JOIN
+        outer = top_level(head)
+        if re.search(r"\bSELECT\b", outer, re.IGNORECASE) and not re.search(r"\bWHERE\b", outer, re.IGNORECASE):
+            group_by = re.search(r"\bGROUP\s+BY\b", outer, re.IGNORECASE)
+            position = group_by.start() if group_by else len(head)
+            head = head[:position] + " WHERE true " + head[position:]
+        sql = head + "ON CONFLICT DO UPDATE SET" + assignments
+    return rewrite_placeholders(sql, paramstyle).replace(PERCENT, "%")
+
+
+def translate_ddl(sql):
+    # DDL de database/*.sql a SQLite; los índices en línea se crean aparte
+    statements = []
+    sql = "\n".join(line for line in sql.splitlines() if not line.strip().startswith("--"))
+    for statement in [part.strip() for part in sql.split(";") if part.strip()]:
+        table = re.search(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)", statement, re.IGNORECASE)
+        indexes = []
+
+        def extract_index(match):
+            indexes.append("CREATE INDEX IF NOT EXISTS %s ON %s (%s)" % (match.group(1), table.group(1), match.group(2)))
+            return ""
+
+        statement = re.sub(r",\s*(?:INDEX|KEY)\s+(\w+)\s*\(([^)]*)\)", extract_index, statement, flags=re.IGNORECASE)
+        statement = re.sub(r"UNIQUE\s+KEY\s+\w+\s*\(", "UNIQUE (", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\bINT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", "INTEGER PRIMARY KEY AUTOINCREMENT",
+                           statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\bDECIMAL\s*\(\s*\d+\s*,\s*\d+\s*\)", "REAL", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", "", statement, flags=re.IGNORECASE)
+        statement = re.sub(r"\)\s*ENGINE\s*=.*$", ")", statement, flags=re.IGNORECASE | re.DOTALL)
+        statements.append(statement)
+        statements.extend(indexes)
+    return statements
+
+
+def schema_files(schema_dir=SCHEMA_DIR):
+    files = sorted(glob.glob(os.path.join(schema_dir, "*.sql")))
+    base = [path for path in files if os.path.basename(path) == BASE_SCHEMA]
+    return base + [path for path in files if os.path.basename(path) != BASE_SCHEMA]
+
+
+def create_schema(connection, schema_dir=SCHEMA_DIR):
+    for path in schema_files(schema_dir):
+        with open(path, encoding="utf-8") as schema:
+            for statement in translate_ddl(schema.read()):
+                connection.execute(statement)
+    connection.commit()
+
+
+def as_mysql_error(error):
+    message = str(error)
+    if isinstance(error, sqlite3.IntegrityError):
+        code = 1062 if "UNIQUE" in message else 1452 if "FOREIGN KEY" in message else 1048
+        return pymysql.err.IntegrityError(code, message)
+    if isinstance(error, sqlite3.OperationalError):
+        return pymysql.err.OperationalError(1064, message)
+    return pymysql.err.DatabaseError(0, message)
+
+
+def paramstyle_of(args):
+    if args is None:
+        return None, None
+    if isinstance(args, dict):
+        return "named", args
+    if not isinstance(args, (tuple, list)):
+        # pymysql acepta un valor suelto, p. ej. execute(query, (id)) con id entero
+        return "qmark", (args,)
+    return "qmark", tuple(args)
+
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._connection.cursor()
+
+    def execute(self, query, args=None):
+        paramstyle, params = paramstyle_of(args)
+        hint = EXECUTION_HINT.search(query)
+        if hint:
+            query = query[:hint.start()] + query[hint.end():]
+            deadline = time.monotonic() + int(hint.group(1)) / 1000
+            self.connection._connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+        try:
+            if params is None:
+                self._cursor.execute(translate(query, None))
+            else:
+                self._cursor.execute(translate(query, paramstyle), params)
+        except sqlite3.OperationalError as e:
+            # Como en MySQL, el límite cubre la ejecución hasta la primera fila,
+            # donde SQLite agrupa y ordena
+            if hint and str(e) == "interrupted":
+                raise pymysql.err.OperationalError(
+                    3024, "Query execution was interrupted, maximum statement execution time exceeded"
+                ) from e
+            raise as_mysql_error(e) from e
+        except sqlite3.Error as e:
+            raise as_mysql_error(e) from e
+        finally:
+            if hint:
+                self.connection._connection.set_progress_handler(None, 0)
+        return self._cursor.rowcount
+
+    def executemany(self, query, args):
+        args = [paramstyle_of(row)[1] for row in args]
+        if not args:
+            return 0
+        try:
+            self._cursor.executemany(translate(query, paramstyle_of(args[0])[0]), args)
+        except sqlite3.Error as e:
+            raise as_mysql_error(e) from e
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        return True
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_sqlite(path):
+    connection = sqlite3.connect(
+        path,
+        uri=path.startswith("file:"),
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False,
+        timeout=10
+    )
+    connection.execute("PRAGMA foreign_keys = ON")
+    return connection
+
+
+def connect(path):
+    with anchors_lock:
+        if path not in anchors:
+            anchor = open_sqlite(path)
+            if anchor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sales'").fetchone() is None:
+                create_schema(anchor)
+                seed = os.environ.get("DB_SQLITE_SEED")
+                if seed:
+                    with open(seed, encoding="utf-8") as data:
+                        anchor.executescript(data.read())
+            anchors[path] = anchor
+    return SQLiteConnection(open_sqlite(path))
+
+
+def reset(path):
+    # Borra la base en memoria compartida (o la conexión ancla de un archivo)
+    with anchors_lock:
+        anchor = anchors.pop(path, None)
+    if anchor is not None:
+        anchor.close()
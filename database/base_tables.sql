@@ -0,0 +1,38 @@
+-- Tablas base de la aplicación (categorías, productos y ventas).
+-- Reconstruidas a partir de las consultas de los handlers; el resto de los
+-- archivos de esta carpeta dependen de ellas, así que se crean primero.
+CREATE TABLE IF NOT EXISTS categories (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    status TINYINT NOT NULL DEFAULT 1,
+    UNIQUE KEY uq_categories_name (name)
+);
+
+CREATE TABLE IF NOT EXISTS products (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    price DECIMAL(10, 2) NOT NULL,
+    stock INT NOT NULL DEFAULT 0,
+    status TINYINT NOT NULL DEFAULT 1,
+    category_id INT NOT NULL,
+    INDEX idx_products_category (category_id),
+    FOREIGN KEY (category_id) REFERENCES categories (id)
+);
+
+CREATE TABLE IF NOT EXISTS sales (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    total DECIMAL(10, 2) NOT NULL,
+    status TINYINT NOT NULL DEFAULT 1,
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_sales_createdAt (createdAt)
+);
+
+CREATE TABLE IF NOT EXISTS sales_products (
+    sale_id INT NOT NULL,
+    product_id INT NOT NULL,
+    quantity INT NOT NULL,
+    INDEX idx_sales_products_sale (sale_id),
+    INDEX idx_sales_products_product (product_id),
+    FOREIGN KEY (sale_id) REFERENCES sales (id),
+    FOREIGN KEY (product_id) REFERENCES products (id)
+);
@@ -0,0 +1,12 @@
+-- Snapshot inmutable del balance de cada día cerrado.
+-- Lo escribe end_of_day_balance la primera vez que se consulta un día pasado
+-- y lo borra cancel_sales cuando cancela una venta de ese día.
+CREATE TABLE IF NOT EXISTS daily_balance (
+    day DATE NOT NULL PRIMARY KEY,
+    most_sold_product VARCHAR(255) NOT NULL,
+    average_sale DECIMAL(10, 2) NOT NULL,
+    total_sales_today DECIMAL(10, 2) NOT NULL,
+    total_transactions_today INT NOT NULL,
+    total_cancelled_transactions INT NOT NULL,
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,10 @@
+-- Conteo de ventas activas que contienen cada par de productos (common/cooccurrence.py).
+-- Cada par se guarda en ambas direcciones; el índice secundario resuelve
+-- "top K acompañantes del producto X" con una sola lectura.
+CREATE TABLE IF NOT EXISTS product_pairs (
+    product_id INT NOT NULL,
+    companion_id INT NOT NULL,
+    sales_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, companion_id),
+    INDEX idx_product_pairs_top (product_id, sales_count)
+);
@@ -0,0 +1,8 @@
+-- Sugerencias de compra calculadas una vez por día hábil (/reorder_suggestions).
+CREATE TABLE IF NOT EXISTS reorder_suggestions (
+    day DATE NOT NULL,
+    params VARCHAR(64) NOT NULL,
+    data MEDIUMTEXT NOT NULL,
+    createdAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, params)
+);
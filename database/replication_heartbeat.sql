@@ -0,0 +1,10 @@
+-- Latido para medir el retraso de las réplicas de lectura (common/db.py, connect_read).
+-- En el primario, con event_scheduler=ON en el parameter group de RDS:
+--   CREATE EVENT IF NOT EXISTS replication_heartbeat_tick ON SCHEDULE EVERY 1 SECOND
+--   DO INSERT INTO replication_heartbeat (id, beat) VALUES (1, NOW())
+--      ON DUPLICATE KEY UPDATE beat = VALUES(beat);
+-- En una réplica, NOW() menos beat es el retraso en segundos.
+CREATE TABLE IF NOT EXISTS replication_heartbeat (
+    id INT NOT NULL PRIMARY KEY,
+    beat DATETIME NOT NULL
+);
@@ -0,0 +1,7 @@
+-- Ventas activas agregadas por hora (common/sales_rollup.py).
+-- cancel_sales recalcula la hora de la venta; scripts/backfill_sales_hourly.py llena el histórico.
+CREATE TABLE IF NOT EXISTS sales_hourly (
+    hour DATETIME NOT NULL PRIMARY KEY,
+    sales_count INT NOT NULL,
+    revenue DECIMAL(12, 2) NOT NULL
+);
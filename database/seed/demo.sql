@@ -0,0 +1,31 @@
+-- Datos mínimos de ejemplo para correr los handlers sin RDS (DB_SQLITE_SEED).
+-- Los datos de volumen para benchmarks los genera otro proceso.
+INSERT INTO categories (id, name, status) VALUES
+    (1, 'Bebidas', 1),
+    (2, 'Panadería', 1),
+    (3, 'Temporada', 0);
+
+INSERT INTO products (id, name, price, stock, status, category_id) VALUES
+    (1, 'Café americano', 25.00, 40, 1, 1),
+    (2, 'Capuchino', 35.00, 4, 1, 1),
+    (3, 'Chocolate caliente', 30.00, 12, 1, 1),
+    (4, 'Concha', 15.00, 3, 1, 2),
+    (5, 'Cuernito', 18.00, 20, 1, 2),
+    (6, 'Pan de muerto', 45.00, 0, 0, 3);
+
+INSERT INTO sales (id, total, status, createdAt) VALUES
+    (1, 58.00, 1, '2024-07-19 08:15:00'),
+    (2, 35.00, 1, '2024-07-19 09:40:00'),
+    (3, 48.00, 0, '2024-07-19 13:05:00'),
+    (4, 78.00, 1, '2024-07-20 08:30:00');
+
+INSERT INTO sales_products (sale_id, product_id, quantity) VALUES
+    (1, 1, 1),
+    (1, 4, 1),
+    (1, 5, 1),
+    (2, 2, 1),
+    (3, 3, 1),
+    (3, 5, 1),
+    (4, 2, 1),
+    (4, 1, 1),
+    (4, 5, 1);
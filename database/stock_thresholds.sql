@@ -0,0 +1,9 @@
+-- Parámetros de inventario por producto para get_low_stock_products.
+-- days_of_cover: umbral de ?mode=forecast (si es NULL se usa el del request).
+-- lead_time_days: días que tarda el proveedor, usado por /reorder_suggestions.
+CREATE TABLE IF NOT EXISTS stock_thresholds (
+    product_id INT NOT NULL PRIMARY KEY,
+    days_of_cover DECIMAL(6, 2) NULL,
+    lead_time_days INT NULL,
+    FOREIGN KEY (product_id) REFERENCES products (id)
+);
@@ -1,9 +1,12 @@
 import json
+import time
 import pymysql
+from collections import OrderedDict
 from datetime import datetime
 from decimal import Decimal
 import boto3
 from botocore.exceptions import ClientError
+from common import db, instrumentation, metrics, query_governor, single_flight
 
 def get_secret():
     secret_name = "secretsForBalu"
@@ -29,12 +32,26 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
 rds_db = secrets["dbname"]
+# Réplicas de lectura opcionales; ver db.connect_read
+rds_replicas = db.replica_hosts(secrets)
 
+# Los días cerrados no cambian salvo por una cancelación tardía. cancel_sales
+# borra el snapshot de daily_balance, pero no puede limpiar el LRU de cada
+# contenedor: una entrada vive BALANCE_MAX_AGE segundos, así que la cancelación
+# tarda como mucho eso en verse. El LRU sigue ahorrando la conexión a los
+# tableros que repiten la misma consulta cada pocos segundos.
+BALANCE_CACHE_SIZE = 64
+BALANCE_MAX_AGE = 30
+balance_cache = OrderedDict()
+
+@instrumentation.instrument("end_of_day_balance")
+@single_flight.coalesce("end_of_day_balance")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
@@ -42,8 +59,9 @@ def lambda_handler(event, __):
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
     try:
-        if 'date' in json.loads(event['body']):
-            date = json.loads(event['body']).get('date')
+        body = json.loads(event['body'])
+        if 'date' in body:
+            date = body.get('date')
         else:
             return {
                 "statusCode": 400,
@@ -62,12 +80,35 @@ def lambda_handler(event, __):
                 }),
             }
 
-        balance = get_end_of_day_balance(date)
+        try:
+            if is_closed_day(date):
+                balance = get_closed_day_balance(date)
+            else:
+                balance = get_end_of_day_balance(date)
+                headers = {**headers, "Cache-Control": "no-store"}
+        except pymysql.MySQLError as e:
+            if not query_governor.is_timeout(e):
+                raise
+            # La consulta pasó el límite de query_governor: el último balance calculado, si hay
+            cached = query_governor.last_report(("end_of_day_balance", date))
+            if cached is None:
+                return query_governor.timeout_response(headers)
+            return {
+                "statusCode": 200,
+                "headers": {**headers, "Cache-Control": "no-store"},
+                "body": instrumentation.dumps({
+                    "message": "END_OF_DAY_BALANCE_FETCHED",
+                    "balance": cached[0],
+                    "stale": True,
+                    "age_seconds": cached[1]
+                }, default=decimal_to_float)
+            }
+        query_governor.remember(("end_of_day_balance", date), balance)
 
         return {
             "statusCode": 200,
             "headers": headers,
-            "body": json.dumps({
+            "body": instrumentation.dumps({
                 "message": "END_OF_DAY_BALANCE_FETCHED",
                 "balance": balance
             }, default=decimal_to_float)
@@ -93,16 +134,73 @@ def validate_date(date_string):
     except ValueError:
         return False
 
-def connect_to_database():
+def connect_to_database(read_only=False):
     try:
-        connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        # Las consultas de solo lectura pueden ir a una réplica; lo que escribe, al primario
+        if read_only:
+            return instrumentation.connect(db.connect_read, rds_replicas, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        connection = instrumentation.connect(db.connect, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
         return connection
     except pymysql.MySQLError as e:
         raise Exception("ERROR CONNECTING TO DATABASE: " + str(e))
 
-def get_end_of_day_balance(date):
+def is_closed_day(date_string):
+    return datetime.strptime(date_string, '%Y-%m-%d').date() < datetime.now().date()
+
+def get_closed_day_balance(date):
+    cached = balance_cache.get(date)
+    if cached is not None and cached[0] > time.monotonic():
+        metrics.count_cache(True)
+        balance_cache.move_to_end(date)
+        return cached[1]
+    metrics.count_cache(False)
+
     connection = connect_to_database()
-    cursor = connection.cursor()
+    try:
+        cursor = connection.cursor()
+        balance = get_balance_snapshot(cursor, date)
+        if balance is None:
+            balance = query_end_of_day_balance(cursor, date)
+            save_balance_snapshot(cursor, date, balance)
+            connection.commit()
+    finally:
+        connection.close()
+
+    balance_cache[date] = (time.monotonic() + BALANCE_MAX_AGE, balance)
+    balance_cache.move_to_end(date)
+    if len(balance_cache) > BALANCE_CACHE_SIZE:
+        balance_cache.popitem(last=False)
+    return balance
+
+def get_balance_snapshot(cursor, date):
+    cursor.execute("""
+        SELECT most_sold_product, average_sale, total_sales_today,
+               total_transactions_today, total_cancelled_transactions
+        FROM daily_balance
+        WHERE day = %s
+    """, (date,))
+    result = cursor.fetchone()
+    if result is None:
+        return None
+    return balance_from_row(result)
+
+def save_balance_snapshot(cursor, date, balance):
+    cursor.execute("""
+        INSERT INTO daily_balance (day, most_sold_product, average_sale, total_sales_today,
+                                   total_transactions_today, total_cancelled_transactions)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE day = day
+    """, (date, balance["most_sold_product"], balance["average_sale"], balance["total_sales_today"],
+          balance["total_transactions_today"], balance["total_cancelled_transactions"]))
+
+def get_end_of_day_balance(date):
+    connection = connect_to_database(read_only=True)
+    try:
+        return query_end_of_day_balance(connection.cursor(), date)
+    finally:
+        connection.close()
+
+def query_end_of_day_balance(cursor, date):
     cursor.execute("""
         WITH daily_sales AS (
             SELECT
@@ -148,16 +246,16 @@ def get_end_of_day_balance(date):
             COALESCE((SELECT total_transactions FROM total_transactions), 0) AS total_transactions_today,
             COALESCE((SELECT cancelled_transactions FROM cancelled_transactions), 0) AS total_cancelled_transactions;
     """, (date, date, date))
-    result = cursor.fetchone()
-    connection.close()
-    balance = {
+    return balance_from_row(cursor.fetchone())
+
+def balance_from_row(result):
+    return {
         "most_sold_product": result[0],
         "average_sale": result[1],
         "total_sales_today": result[2],
         "total_transactions_today": result[3],
         "total_cancelled_transactions": result[4]
     }
-    return balance
 
 def decimal_to_float(obj):
     if isinstance(obj, Decimal):
@@ -1,8 +1,8 @@
 import json
-import pymysql
 from decimal import Decimal
 import boto3
 from botocore.exceptions import ClientError
+from common import db, instrumentation, single_flight
 
 
 def get_secret():
@@ -29,11 +29,14 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
 rds_db = secrets["dbname"]
+# Réplicas de lectura opcionales; ver db.connect_read
+rds_replicas = db.replica_hosts(secrets)
 
 
 def decimal_to_float(obj):
@@ -41,6 +44,8 @@ def decimal_to_float(obj):
         return float(obj)
     raise TypeError
 
+@instrumentation.instrument("get_category")
+@single_flight.coalesce("get_category")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
@@ -79,7 +84,7 @@ def lambda_handler(event, __):
         return {
             "statusCode": 200,
             "headers": headers,
-            "body": json.dumps(body, default=decimal_to_float)
+            "body": instrumentation.dumps(body, default=decimal_to_float)
         }
     except Exception as e:
         return {
@@ -92,7 +97,7 @@ def lambda_handler(event, __):
         }
 
 def get_all_categories(status):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+    connection = instrumentation.connect(db.connect_read, rds_replicas, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
     try:
         cursor = connection.cursor()
 
@@ -103,7 +108,8 @@ def get_all_categories(status):
 
         result = cursor.fetchall()
 
-        result = [dict(zip([column[0] for column in cursor.description], row)) for row in result]
+        columns = [column[0] for column in cursor.description]
+        result = [dict(zip(columns, row)) for row in result]
 
         return result
     except Exception as e:
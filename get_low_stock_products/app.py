@@ -1,8 +1,13 @@
 import json
+import math
 import pymysql
+from datetime import datetime, timedelta
+from statistics import NormalDist
 from decimal import Decimal
 import boto3
+import numpy as np
 from botocore.exceptions import ClientError
+from common import db, demand, instrumentation, metrics, single_flight
 
 def get_secret():
     secret_name = "secretsForBalu"
@@ -28,12 +33,32 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
 rds_db = secrets["dbname"]
+# Réplicas de lectura opcionales; ver db.connect_read
+rds_replicas = db.replica_hosts(secrets)
 
+# Modo pronóstico (?mode=forecast): días de cobertura según la venta diaria reciente
+HISTORY_DAYS = 28
+MAX_HISTORY_DAYS = 365
+DEFAULT_DAYS_OF_COVER = 7
+
+# /reorder_suggestions: cantidades a pedir por categoría, calculadas una vez por día
+DEFAULT_LEAD_TIME_DAYS = 2
+REVIEW_DAYS = 7
+MAX_REVIEW_DAYS = 90
+# Nivel de servicio con dos decimales: cada combinación de parámetros es una
+# fila de reorder_suggestions (params VARCHAR(64)) y una entrada de reorder_cache
+SERVICE_LEVEL = 0.95
+MAX_CACHED_SUGGESTIONS = 32
+reorder_cache = {}
+
+@instrumentation.instrument("get_low_stock_products")
+@single_flight.coalesce("get_low_stock_products")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
@@ -41,11 +66,56 @@ def lambda_handler(event, __):
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
     try:
-       result = get_low_stock_products()
+       params = (event or {}).get('queryStringParameters') or {}
+       if (event or {}).get('resource') == '/reorder_suggestions':
+           try:
+               history_days = int(params.get('days', HISTORY_DAYS))
+               review_days = int(params.get('review_days', REVIEW_DAYS))
+               service_level = round(float(params.get('service_level', SERVICE_LEVEL)), 2)
+           except ValueError:
+               history_days = 0
+               review_days = 0
+               service_level = 0
+           if (history_days < 1 or history_days > MAX_HISTORY_DAYS or review_days < 1 or review_days > MAX_REVIEW_DAYS
+                   or not 0.5 <= service_level < 1):
+               return {
+                   "statusCode": 400,
+                   "headers": headers,
+                   "body": json.dumps({
+                       "message": "INVALID_PARAMETERS"
+                   }),
+               }
+           return {
+               "statusCode": 200,
+               "headers": headers,
+               "body": instrumentation.dumps({
+                   "message": "REORDER_SUGGESTIONS_FETCHED",
+                   "categories": get_reorder_suggestions(history_days, review_days, service_level)
+               }, default=decimal_to_float)
+           }
+
+       if params.get('mode') == 'forecast':
+           try:
+               history_days = int(params.get('days', HISTORY_DAYS))
+               days_of_cover = float(params.get('days_of_cover', DEFAULT_DAYS_OF_COVER))
+           except ValueError:
+               history_days = 0
+               days_of_cover = 0
+           if history_days < 1 or history_days > MAX_HISTORY_DAYS or not math.isfinite(days_of_cover) or days_of_cover <= 0:
+               return {
+                   "statusCode": 400,
+                   "headers": headers,
+                   "body": json.dumps({
+                       "message": "INVALID_PARAMETERS"
+                   }),
+               }
+           result = get_stock_forecast(history_days, days_of_cover)
+       else:
+           result = get_low_stock_products()
        return {
            "statusCode": 200,
            "headers": headers,
-           "body": json.dumps({
+           "body": instrumentation.dumps({
                "message": "PRODUCTS_FETCHED",
                "products": result
            }, default=decimal_to_float)
@@ -61,16 +131,154 @@ def lambda_handler(event, __):
         }
 
 def get_low_stock_products():
-    connection = connect_to_database()
-    cursor = connection.cursor()
-    cursor.execute("select * from products where stock <= 5 and status = 1;", ())
-    result = cursor.fetchall()
-    result = [dict(zip([column[0] for column in cursor.description], row)) for row in result]
+    connection = connect_to_database(read_only=True)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("select * from products where stock <= 5 and status = 1;", ())
+        result = cursor.fetchall()
+        columns = [column[0] for column in cursor.description]
+    finally:
+        # Un error no debe dejar abierta la conexión (ni su slot de admisión)
+        connection.close()
+    result = [dict(zip(columns, row)) for row in result]
     return result
 
-def connect_to_database():
+def get_stock_forecast(history_days, default_days_of_cover, today=None):
+    today = today or datetime.now().date()
+    since = today - timedelta(days=history_days - 1)
+    connection = connect_to_database(read_only=True)
+    try:
+        cursor = connection.cursor()
+        # El umbral por producto vive en stock_thresholds; si no hay, se usa el del request
+        cursor.execute("""
+            SELECT p.id, p.name, p.stock, COALESCE(t.days_of_cover, %s)
+            FROM products p
+            LEFT JOIN stock_thresholds t ON t.product_id = p.id
+            WHERE p.status = 1
+        """, (default_days_of_cover,))
+        products = cursor.fetchall()
+        cursor.execute("""
+            SELECT sp.product_id, DATEDIFF(%s, DATE(s.createdAt)) AS days_ago, SUM(sp.quantity)
+            FROM sales_products sp
+            JOIN sales s ON sp.sale_id = s.id
+            WHERE s.status = 1 AND s.createdAt >= %s AND s.createdAt < %s
+            GROUP BY sp.product_id, days_ago
+        """, (today, since, today + timedelta(days=1)))
+        sales = cursor.fetchall()
+    finally:
+        connection.close()
+    return rank_by_stock_out(products, sales, history_days)
+
+def rank_by_stock_out(products, sales, history_days):
+    if not products:
+        return []
+    ids = [row[0] for row in products]
+    stock = np.array([row[2] for row in products], dtype=np.float64)
+    thresholds = np.array([row[3] for row in products], dtype=np.float64)
+
+    daily_rate = demand.moving_average(demand.daily_matrix(ids, sales, history_days))
+    cover = demand.days_of_cover(stock, daily_rate)
+
+    flagged = np.flatnonzero(cover <= thresholds)
+    flagged = flagged[np.argsort(cover[flagged], kind="stable")]
+    return [{
+        "id": ids[i],
+        "name": products[i][1],
+        "stock": products[i][2],
+        "daily_rate": round(float(daily_rate[i]), 3),
+        "days_of_cover": round(float(cover[i]), 2),
+        "threshold": float(thresholds[i])
+    } for i in flagged]
+
+def get_reorder_suggestions(history_days, review_days, service_level, today=None):
+    today = today or datetime.now().date()
+    key = "%d:%d:%.2f" % (history_days, review_days, service_level)
+    # Solo se conservan las sugerencias del día en curso
+    if any(day != today for day, _ in reorder_cache):
+        reorder_cache.clear()
+    if (today, key) in reorder_cache:
+        metrics.count_cache(True)
+        return reorder_cache[(today, key)]
+    metrics.count_cache(False)
+
+    since = today - timedelta(days=history_days - 1)
+    connection = connect_to_database()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT data FROM reorder_suggestions WHERE day = %s AND params = %s", (today, key))
+        cached = cursor.fetchone()
+        if cached is not None:
+            suggestions = json.loads(cached[0])
+        else:
+            cursor.execute("""
+                SELECT p.id, p.name, p.stock, c.id, c.name, COALESCE(t.lead_time_days, %s)
+                FROM products p
+                JOIN categories c ON p.category_id = c.id
+                LEFT JOIN stock_thresholds t ON t.product_id = p.id
+                WHERE p.status = 1
+                ORDER BY c.id, p.id
+            """, (DEFAULT_LEAD_TIME_DAYS,))
+            products = cursor.fetchall()
+            cursor.execute("""
+                SELECT sp.product_id, DATEDIFF(%s, DATE(s.createdAt)) AS days_ago, SUM(sp.quantity)
+                FROM sales_products sp
+                JOIN sales s ON sp.sale_id = s.id
+                WHERE s.status = 1 AND s.createdAt >= %s AND s.createdAt < %s
+                GROUP BY sp.product_id, days_ago
+            """, (today, since, today + timedelta(days=1)))
+            suggestions = suggest_reorders(products, cursor.fetchall(), history_days, review_days, service_level)
+            cursor.execute("""
+                INSERT INTO reorder_suggestions (day, params, data) VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE data = VALUES(data)
+            """, (today, key, json.dumps(suggestions, default=decimal_to_float)))
+            connection.commit()
+    finally:
+        connection.close()
+
+    if len(reorder_cache) >= MAX_CACHED_SUGGESTIONS:
+        del reorder_cache[next(iter(reorder_cache))]
+    reorder_cache[(today, key)] = suggestions
+    return suggestions
+
+def suggest_reorders(products, sales, history_days, review_days, service_level):
+    if not products:
+        return []
+    ids = [row[0] for row in products]
+    stock = np.array([row[2] for row in products], dtype=np.float64)
+    lead_time = np.array([row[5] for row in products], dtype=np.float64)
+
+    mean, std = demand.mean_and_std(demand.daily_matrix(ids, sales, history_days))
+    z = NormalDist().inv_cdf(service_level)
+    safety_stock, order_up_to, quantity = demand.order_quantities(stock, mean, std, lead_time, review_days, z)
+
+    categories = []
+    for i in np.flatnonzero(quantity > 0):
+        product_id, name, units, category_id, category_name, lead_time_days = products[i]
+        if not categories or categories[-1]["category_id"] != category_id:
+            categories.append({
+                "category_id": category_id,
+                "category_name": category_name,
+                "products": []
+            })
+        categories[-1]["products"].append({
+            "id": product_id,
+            "name": name,
+            "stock": units,
+            "mean_daily": round(float(mean[i]), 3),
+            "std_daily": round(float(std[i]), 3),
+            "lead_time_days": lead_time_days,
+            "safety_stock": round(float(safety_stock[i]), 2),
+            "order_up_to": round(float(order_up_to[i]), 2),
+            "order_quantity": int(quantity[i])
+        })
+    return categories
+
+def connect_to_database(read_only=False):
     try:
-        connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        # Las consultas de solo lectura pueden ir a una réplica; lo que escribe, al primario
+        if read_only:
+            return instrumentation.connect(db.connect_read, rds_replicas, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        connection = instrumentation.connect(db.connect, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
         return connection
     except pymysql.MySQLError as e:
         raise Exception("ERROR CONNECTING TO DATABASE: " + str(e))
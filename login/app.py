@@ -1,15 +1,34 @@
 import json
+import base64
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from common import instrumentation
 
+# El cliente se crea una vez por contenedor: las invocaciones en caliente no
+# vuelven a cargar el modelo del servicio ni a negociar TLS con Cognito
+with instrumentation.phase("client"):
+    client = boto3.client('cognito-idp', region_name='us-east-2', config=Config(
+        connect_timeout=2,
+        read_timeout=5,
+        max_pool_connections=10,
+        tcp_keepalive=True,
+        retries={'max_attempts': 3, 'mode': 'adaptive'}
+    ))
+
+@instrumentation.instrument("login")
 def lambda_handler(event, __):
+    if event.get('resource') == '/refresh':
+        return refresh(event)
+    return login(event)
+
+def login(event):
     headers = {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "POST, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
 
-    client = boto3.client('cognito-idp', region_name='us-east-2')
     client_id = "5ffukkqllrcqtlffpbq1pjuuqc"
 
     try:
@@ -17,14 +36,15 @@ def lambda_handler(event, __):
         username = body_parameters.get('username')
         password = body_parameters.get('password')
 
-        response = client.initiate_auth(
-            ClientId=client_id,
-            AuthFlow='USER_PASSWORD_AUTH',
-            AuthParameters={
-                'USERNAME': username,
-                'PASSWORD': password
-            }
-        )
+        with instrumentation.phase("cognito"):
+            response = client.initiate_auth(
+                ClientId=client_id,
+                AuthFlow='USER_PASSWORD_AUTH',
+                AuthParameters={
+                    'USERNAME': username,
+                    'PASSWORD': password
+                }
+            )
 
         # Verifica si 'AuthenticationResult' está presente en la respuesta
         if 'AuthenticationResult' in response:
@@ -32,16 +52,7 @@ def lambda_handler(event, __):
             access_token = response['AuthenticationResult']['AccessToken']
             refresh_token = response['AuthenticationResult']['RefreshToken']
 
-            # Obtén los grupos del usuario
-            user_groups = client.admin_list_groups_for_user(
-                Username=username,
-                UserPoolId='us-east-2_WxG0qudnH'  # Reemplaza con tu User Pool ID
-            )
-
-            # Determina el rol basado en el grupo
-            role = None
-            if user_groups['Groups']:
-                role = user_groups['Groups'][0]['GroupName']  # Asumiendo un usuario pertenece a un solo grupo
+            role = get_role(id_token, username)
 
             return {
                 'statusCode': 200,
@@ -73,3 +84,101 @@ def lambda_handler(event, __):
             "headers": headers,
             'body': json.dumps({"error_message": str(e)})
         }
+
+
+def refresh(event):
+    # Renueva la sesión con el refresh_token que devolvió /login, sin volver a
+    # autenticar con usuario y contraseña
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
+    }
+
+    client_id = "5ffukkqllrcqtlffpbq1pjuuqc"
+
+    try:
+        body_parameters = json.loads(event["body"])
+        refresh_token = body_parameters.get('refresh_token')
+        if not refresh_token:
+            return {
+                'statusCode': 400,
+                "headers": headers,
+                'body': json.dumps({"error_message": "MISSING_REFRESH_TOKEN"})
+            }
+
+        with instrumentation.phase("cognito"):
+            response = client.initiate_auth(
+                ClientId=client_id,
+                AuthFlow='REFRESH_TOKEN_AUTH',
+                AuthParameters={
+                    'REFRESH_TOKEN': refresh_token
+                }
+            )
+
+        id_token = response['AuthenticationResult']['IdToken']
+        access_token = response['AuthenticationResult']['AccessToken']
+        claims = get_token_claims(id_token) or {}
+        role = get_role(id_token, claims.get('cognito:username'))
+
+        body = {
+            'id_token': id_token,
+            'access_token': access_token,
+            'role': role
+        }
+        # Cognito solo devuelve un refresh token nuevo si la rotación está activa
+        if 'RefreshToken' in response['AuthenticationResult']:
+            body['refresh_token'] = response['AuthenticationResult']['RefreshToken']
+        return {
+            'statusCode': 200,
+            "headers": headers,
+            'body': json.dumps(body)
+        }
+
+    except ClientError as e:
+        return {
+            'statusCode': 400,
+            "headers": headers,
+            'body': json.dumps({"error_message": e.response['Error']['Message']})
+        }
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            "headers": headers,
+            'body': json.dumps({"error_message": str(e)})
+        }
+
+
+def get_role(id_token, username):
+    # Los grupos vienen en el claim cognito:groups del IdToken; solo si
+    # no está se consultan a Cognito (segunda llamada de red)
+    groups = get_groups_from_token(id_token)
+    if groups is None and username:
+        with instrumentation.phase("cognito"):
+            user_groups = client.admin_list_groups_for_user(
+                Username=username,
+                UserPoolId='us-east-2_WxG0qudnH'  # Reemplaza con tu User Pool ID
+            )
+        groups = [group['GroupName'] for group in user_groups['Groups']]
+
+    # Determina el rol basado en el grupo
+    if groups:
+        return groups[0]  # Asumiendo un usuario pertenece a un solo grupo
+    return None
+
+
+def get_token_claims(id_token):
+    # El token acaba de llegar de Cognito por TLS, así que solo se lee el payload
+    try:
+        payload = id_token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return None
+
+
+def get_groups_from_token(id_token):
+    claims = get_token_claims(id_token)
+    if claims is None:
+        return None
+    return claims.get('cognito:groups')
@@ -1,14 +1,29 @@
 import json
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from common import instrumentation
 
+# Cliente de Cognito reutilizado entre invocaciones del mismo contenedor
+with instrumentation.phase("client"):
+    client = boto3.client('cognito-idp', region_name='us-east-2', config=Config(
+        connect_timeout=2,
+        read_timeout=5,
+        max_pool_connections=10,
+        tcp_keepalive=True,
+        retries={'max_attempts': 3, 'mode': 'adaptive'}
+    ))
+
+@instrumentation.instrument("newPassword")
 def lambda_handler(event, __):
+    return change_password(event)
+
+def change_password(event):
     headers = {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "PATCH, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
-    client = boto3.client('cognito-idp', region_name='us-east-2')
     user_pool_id = "us-east-2_Yxnt4eRMp"
     client_id = "5ffukkqllrcqtlffpbq1pjuuqc"
     try:
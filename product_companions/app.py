@@ -0,0 +1,134 @@
+import json
+import pymysql
+from decimal import Decimal
+import boto3
+from botocore.exceptions import ClientError
+from common import cooccurrence, db, instrumentation, single_flight
+
+def get_secret():
+    secret_name = "secretsForBalu"
+    region_name = "us-east-2"
+
+    # Crear un cliente de Secrets Manager
+    session = boto3.session.Session()
+    client = session.client(
+        service_name='secretsmanager',
+        region_name=region_name
+    )
+
+    try:
+        get_secret_value_response = client.get_secret_value(
+            SecretId=secret_name
+        )
+    except ClientError as e:
+        # Para obtener una lista de excepciones lanzadas, vea
+        # https://docs.aws.amazon.com/secretsmanager/latest/apireference/API_GetSecretValue.html
+        raise e
+
+    secret = get_secret_value_response['SecretString']
+    return json.loads(secret)
+
+# Obtener las credenciales desde Secrets Manager
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
+rds_host = secrets["host"]
+rds_user = secrets["username"]
+rds_password = secrets["password"]
+rds_db = secrets["dbname"]
+# Réplicas de lectura opcionales; ver db.connect_read
+rds_replicas = db.replica_hosts(secrets)
+
+COMPANIONS_LIMIT = 5
+MAX_COMPANIONS_LIMIT = 20
+
+@instrumentation.instrument("product_companions")
+@single_flight.coalesce("product_companions")
+def lambda_handler(event, __):
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
+    }
+    try:
+        id_str = (event.get('pathParameters') or {}).get('id')
+        params = event.get('queryStringParameters') or {}
+        if id_str is None:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "MISSING_FIELDS"
+                }),
+            }
+
+        try:
+            id = int(id_str)
+        except ValueError:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "INVALID_ID"
+                }),
+            }
+
+        try:
+            limit = int(params.get('limit', COMPANIONS_LIMIT))
+        except ValueError:
+            limit = 0
+
+        if id <= 0:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "INVALID_ID"
+                }),
+            }
+
+        if limit < 1 or limit > MAX_COMPANIONS_LIMIT:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "INVALID_LIMIT"
+                }),
+            }
+
+        return {
+            "statusCode": 200,
+            "headers": headers,
+            "body": instrumentation.dumps({
+                "message": "COMPANIONS_FETCHED",
+                "products": get_companions(id, limit)
+            }, default=decimal_to_float)
+        }
+    except Exception as e:
+        return {
+            "statusCode": 500,
+            "headers": headers,
+            "body": json.dumps({
+                "message": "INTERNAL_SERVER_ERROR",
+                "error": str(e)
+            }),
+        }
+
+def get_companions(id, limit):
+    connection = connect_to_database()
+    try:
+        rows = cooccurrence.get_companions(connection.cursor(), id, limit)
+    finally:
+        connection.close()
+    return [{"id": companion_id, "name": name, "sales_count": sales_count} for companion_id, name, sales_count in rows]
+
+def connect_to_database():
+    try:
+        connection = instrumentation.connect(db.connect_read, rds_replicas, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        return connection
+    except pymysql.MySQLError as e:
+        raise Exception("ERROR CONNECTING TO DATABASE: " + str(e))
+
+def decimal_to_float(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
@@ -0,0 +1,163 @@
+import json
+import pymysql
+from datetime import datetime, timedelta
+import boto3
+from botocore.exceptions import ClientError
+from common import db, instrumentation, query_governor, single_flight
+
+def get_secret():
+    secret_name = "secretsForBalu"
+    region_name = "us-east-2"
+
+    # Crear un cliente de Secrets Manager
+    session = boto3.session.Session()
+    client = session.client(
+        service_name='secretsmanager',
+        region_name=region_name
+    )
+
+    try:
+        get_secret_value_response = client.get_secret_value(
+            SecretId=secret_name
+        )
+    except ClientError as e:
+        # Para obtener una lista de excepciones lanzadas, vea
+        # https://docs.aws.amazon.com/secretsmanager/latest/apireference/API_GetSecretValue.html
+        raise e
+
+    secret = get_secret_value_response['SecretString']
+    return json.loads(secret)
+
+# Obtener las credenciales desde Secrets Manager
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
+rds_host = secrets["host"]
+rds_user = secrets["username"]
+rds_password = secrets["password"]
+rds_db = secrets["dbname"]
+# Réplicas de lectura opcionales; ver db.connect_read
+rds_replicas = db.replica_hosts(secrets)
+
+MAX_RANGE_DAYS = 366
+
+@instrumentation.instrument("sales_heatmap")
+@single_flight.coalesce("sales_heatmap")
+def lambda_handler(event, __):
+    headers = {
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
+    }
+    try:
+        params = event.get('queryStringParameters') or {}
+        if 'start' not in params or 'end' not in params:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "MISSING_FIELDS"
+                }),
+            }
+
+        try:
+            start = datetime.strptime(params['start'], '%Y-%m-%d')
+            end = datetime.strptime(params['end'], '%Y-%m-%d')
+        except ValueError:
+            start = end = None
+        if start is None or end < start or (end - start).days >= MAX_RANGE_DAYS:
+            return {
+                "statusCode": 400,
+                "headers": headers,
+                "body": json.dumps({
+                    "message": "INVALID_DATE_RANGE"
+                }),
+            }
+
+        # source=rollup lee sales_hourly: más rápido, pero solo tan fresco como su último recálculo
+        use_rollup = params.get('source') == 'rollup'
+        report = ("sales_heatmap", params['start'], params['end'], use_rollup)
+        try:
+            count, revenue = get_sales_heatmap(start, end + timedelta(days=1), use_rollup)
+        except pymysql.MySQLError as e:
+            if not query_governor.is_timeout(e):
+                raise
+            # La consulta pasó el límite de query_governor: el último mapa igual, si hay
+            cached = query_governor.last_report(report)
+            if cached is None:
+                return query_governor.timeout_response(headers)
+            (count, revenue), age_seconds = cached
+            return {
+                "statusCode": 200,
+                "headers": headers,
+                "body": instrumentation.dumps({
+                    "message": "HEATMAP_FETCHED",
+                    "start": params['start'],
+                    "end": params['end'],
+                    "source": "rollup" if use_rollup else "sales",
+                    "count": count,
+                    "revenue": revenue,
+                    "stale": True,
+                    "age_seconds": age_seconds
+                }, separators=(",", ":"))
+            }
+
+        query_governor.remember(report, (count, revenue))
+        return {
+            "statusCode": 200,
+            "headers": headers,
+            "body": instrumentation.dumps({
+                "message": "HEATMAP_FETCHED",
+                "start": params['start'],
+                "end": params['end'],
+                "source": "rollup" if use_rollup else "sales",
+                # Filas: lunes a domingo; columnas: hora 0 a 23
+                "count": count,
+                "revenue": revenue
+            }, separators=(",", ":"))
+        }
+    except Exception as e:
+        return {
+            "statusCode": 500,
+            "headers": headers,
+            "body": json.dumps({
+                "message": "INTERNAL_SERVER_ERROR",
+                "error": str(e)
+            }),
+        }
+
+def get_sales_heatmap(start, end, use_rollup=False):
+    connection = connect_to_database()
+    try:
+        cursor = connection.cursor()
+        if use_rollup:
+            cursor.execute("""
+                SELECT WEEKDAY(hour), HOUR(hour), SUM(sales_count), SUM(revenue)
+                FROM sales_hourly
+                WHERE hour >= %s AND hour < %s
+                GROUP BY 1, 2
+            """, (start, end))
+        else:
+            # Rango sobre createdAt (sin funciones sobre la columna) para usar el índice
+            cursor.execute("""
+                SELECT WEEKDAY(createdAt), HOUR(createdAt), COUNT(*), SUM(total)
+                FROM sales
+                WHERE status = 1 AND createdAt >= %s AND createdAt < %s
+                GROUP BY 1, 2
+            """, (start, end))
+        rows = cursor.fetchall()
+    finally:
+        connection.close()
+
+    count = [[0] * 24 for _ in range(7)]
+    revenue = [[0.0] * 24 for _ in range(7)]
+    for weekday, hour, sales_count, total in rows:
+        count[weekday][hour] = int(sales_count)
+        revenue[weekday][hour] = round(float(total or 0), 2)
+    return count, revenue
+
+def connect_to_database():
+    try:
+        connection = instrumentation.connect(db.connect_read, rds_replicas, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        return connection
+    except pymysql.MySQLError as e:
+        raise Exception("ERROR CONNECTING TO DATABASE: " + str(e))
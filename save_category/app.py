@@ -4,6 +4,7 @@ import logging
 import re
 import boto3
 from botocore.exceptions import ClientError
+from common import auth, db, instrumentation
 
 def get_secret():
     secret_name = "secretsForBalu"
@@ -57,7 +58,8 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
@@ -66,14 +68,18 @@ rds_db = secrets["dbname"]
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+@instrumentation.instrument("save_category")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "POST, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
+    # La verificación de duplicado y el INSERT comparten una conexión
+    shared = db.SharedConnection(open_connection)
     try:
-        claims = event['requestContext']['authorizer']['claims']
+        # Claims del autorizador de API Gateway o, sin él, del JWT verificado localmente
+        claims = auth.get_claims(event)
         role = claims['cognito:groups']
 
         if 'admin' not in role:
@@ -110,7 +116,7 @@ def lambda_handler(event, __):
             }
 
         # Verificar nombre duplicado
-        if is_name_duplicate(name):
+        if is_name_duplicate(name, shared):
             logger.warning("Duplicate category name: %s", name)
             return {
                 "statusCode": 400,
@@ -120,7 +126,7 @@ def lambda_handler(event, __):
                 }),
             }
 
-        save_category(name, headers)
+        save_category(name, headers, shared)
         return {
             "statusCode": 200,
             "headers": headers,
@@ -137,6 +143,15 @@ def lambda_handler(event, __):
                 "message": "INVALID_JSON_FORMAT"
             }),
         }
+    except auth.AuthError as e:
+        return {
+            "statusCode": 401,
+            "headers": headers,
+            "body": json.dumps({
+                "message": "UNAUTHORIZED",
+                "error": str(e)
+            }),
+        }
     except KeyError as e:
         return {
             "statusCode": 400,
@@ -155,9 +170,14 @@ def lambda_handler(event, __):
                 "error": str(e)
             }),
         }
+    finally:
+        shared.close()
+
+def open_connection():
+    return instrumentation.connect(db.connect, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
 
-def is_name_duplicate(name):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+def is_name_duplicate(name, shared=None):
+    connection = shared.get() if shared else open_connection()
     try:
         cursor = connection.cursor()
         cursor.execute("SELECT COUNT(*) FROM categories WHERE name = %s", (name,))
@@ -167,11 +187,12 @@ def is_name_duplicate(name):
         logger.error("Database query error: %s", str(e))
         return False
     finally:
-        connection.close()
+        if shared is None:
+            connection.close()
 
-def save_category(name, headers):
+def save_category(name, headers, shared=None):
     print(f"name: {name}, headers: {headers}")
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+    connection = shared.get() if shared else open_connection()
     try:
         cursor = connection.cursor()
         cursor.execute("INSERT INTO categories (name, status) VALUES (%s, true)", (name,))
@@ -197,4 +218,5 @@ def save_category(name, headers):
             }),
         }
     finally:
-        connection.close()
+        if shared is None:
+            connection.close()
@@ -0,0 +1,30 @@
+# Llena sales_hourly para un rango de fechas, un día por transacción.
+#   python -m scripts.backfill_sales_hourly --host ... --user ... --password ... --db cafe_balu --start 2024-01-01 --end 2024-12-31
+import argparse
+from datetime import date, timedelta
+
+import pymysql
+
+from common import sales_rollup
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", required=True)
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--db", required=True)
+    parser.add_argument("--start", required=True, type=date.fromisoformat)
+    parser.add_argument("--end", required=True, type=date.fromisoformat)
+    args = parser.parse_args()
+
+    connection = pymysql.connect(host=args.host, user=args.user, password=args.password, database=args.db)
+    try:
+        cursor = connection.cursor()
+        day = args.start
+        while day <= args.end:
+            sales_rollup.refresh_range(cursor, day, day + timedelta(days=1))
+            connection.commit()
+            day += timedelta(days=1)
+    finally:
+        connection.close()
+    print("sales_hourly refreshed from %s to %s" % (args.start, args.end))
@@ -0,0 +1,152 @@
+# Cuadra el presupuesto de conexiones de la RDS con template.yaml. En Lambda
+# cada contenedor tiene como mucho una conexión abierta, así que el tope entre
+# contenedores es la concurrencia reservada de cada función; los slots de
+# admisión (common/admission.py) son el tope de un solo proceso con varios
+# handlers (router único, gateway local). Ambos deben caber en max_connections.
+#   pip install -r scripts/requirements.txt
+#   python -m scripts.connection_budget
+#   python -m scripts.connection_budget --max-connections 60 --slots write=12,oltp=20,analytics=6
+# Sale con código 1 si los slots o la concurrencia reservada no caben en el presupuesto.
+import argparse
+import os
+import sys
+
+from common import admission
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.yaml")
+# Memoria de cada clase de instancia (GiB); max_connections por defecto en RDS
+# MySQL es {DBInstanceClassMemory/12582880}. DBInstanceClassMemory descuenta la
+# memoria del sistema, así que el valor real es algo menor: con la base a la
+# mano, mejor pasar --max-connections con SELECT @@max_connections.
+INSTANCE_MEMORY_GIB = {
+    "db.t3.micro": 1, "db.t3.small": 2, "db.t3.medium": 4, "db.t3.large": 8,
+    "db.t4g.micro": 1, "db.t4g.small": 2, "db.t4g.medium": 4, "db.t4g.large": 8
+}
+BYTES_PER_CONNECTION = 12582880
+# Conexiones que quedan fuera de las Lambdas: administración, scripts/, migraciones
+RESERVED_CONNECTIONS = 5
+# Funciones que no abren conexiones a la base (Cognito)
+NO_DATABASE = {"login", "newPassword"}
+
+
+def load_template(template=TEMPLATE):
+    import yaml
+
+    class Loader(yaml.SafeLoader):
+        pass
+    # !Ref se resuelve con el Default del parámetro (ver resolve); !GetAtt,
+    # !Sub...: no hacen falta para el presupuesto
+    Loader.add_constructor("!Ref", lambda loader, node: {"Ref": loader.construct_scalar(node)})
+    Loader.add_multi_constructor("!", lambda loader, suffix, node: None)
+
+    with open(template, encoding="utf-8") as source:
+        return yaml.load(source, Loader=Loader)
+
+
+def max_connections(instance_class):
+    return INSTANCE_MEMORY_GIB[instance_class] * 1024 ** 3 // BYTES_PER_CONNECTION
+
+
+def resolve(template, value):
+    if isinstance(value, dict) and "Ref" in value:
+        parameter = (template.get("Parameters") or {}).get(value["Ref"]) or {}
+        value = parameter.get("Default")
+        return int(value) if value is not None else None
+    return value
+
+
+def report_concurrency(connections, slots, analytics_functions, reserve=RESERVED_CONNECTIONS):
+    """Concurrencia reservada por función de reportes: lo que queda del
+    presupuesto después de los slots de escrituras y lecturas, repartido entre
+    las funciones de reportes."""
+    if not analytics_functions:
+        return None
+    return (connections - reserve - slots[admission.WRITE] - slots[admission.OLTP]) // analytics_functions
+
+
+def functions(template):
+    """(recurso, código, clase de ruta, concurrencia reservada o None) de cada función con base."""
+    defaults = ((template.get("Globals") or {}).get("Function") or {})
+    result = []
+    for name, resource in (template.get("Resources") or {}).items():
+        if resource.get("Type") != "AWS::Serverless::Function":
+            continue
+        properties = resource.get("Properties") or {}
+        code = (properties.get("CodeUri") or "").strip("/")
+        if code in NO_DATABASE:
+            continue
+        reserved = resolve(template, properties.get("ReservedConcurrentExecutions", defaults.get("ReservedConcurrentExecutions")))
+        result.append((name, code, admission.route_class(code), reserved))
+    return result
+
+
+def instance_class(template):
+    for resource in (template.get("Resources") or {}).values():
+        if resource.get("Type") == "AWS::RDS::DBInstance" and "SourceDBInstanceIdentifier" not in (resource.get("Properties") or {}):
+            return resource["Properties"]["DBInstanceClass"]
+    return None
+
+
+def check(template, slots, connections, reserve=RESERVED_CONNECTIONS):
+    """Devuelve (errores, avisos, filas del reporte)."""
+    budget = connections - reserve
+    errors = []
+    warnings = []
+    rows = []
+
+    total_slots = sum(slots.values())
+    if total_slots > budget:
+        errors.append("admission slots (%d) exceed the connection budget (%d = %d max_connections - %d reserved)"
+                      % (total_slots, budget, connections, reserve))
+
+    unbounded = []
+    for name, code, klass, reserved in functions(template):
+        rows.append((name, klass, reserved))
+        if reserved is None:
+            unbounded.append(name)
+
+    # Cada contenedor tiene como mucho una conexión abierta a la vez
+    reserved_total = sum(reserved for _, _, reserved in rows if reserved is not None)
+    if reserved_total > budget:
+        errors.append("reserved concurrency (%d) exceeds the connection budget (%d)" % (reserved_total, budget))
+    analytics = [reserved for _, klass, reserved in rows if klass == admission.ANALYTICS and reserved is not None]
+    suggested = report_concurrency(connections, slots, len(analytics), reserve)
+    if analytics and max(analytics) > suggested:
+        warnings.append("analytics: reserved concurrency %d per report function leaves less than the write and oltp "
+                        "slots (%d) for the other functions; at most %d fits"
+                        % (max(analytics), slots[admission.WRITE] + slots[admission.OLTP], suggested))
+    if unbounded:
+        warnings.append("%d functions without ReservedConcurrentExecutions (%s): in Lambda their sessions are "
+                        "only capped by the account concurrency limit"
+                        % (len(unbounded), ", ".join(unbounded)))
+    return errors, warnings, rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--template", default=TEMPLATE)
+    parser.add_argument("--max-connections", type=int)
+    parser.add_argument("--reserve", type=int, default=RESERVED_CONNECTIONS)
+    parser.add_argument("--slots", help="write=12,oltp=20,analytics=6 (default: ADMISSION_SLOTS from template.yaml)")
+    parser.add_argument("--strict", action="store_true", help="treat warnings as errors")
+    args = parser.parse_args()
+
+    template = load_template(args.template)
+    environment = (((template.get("Globals") or {}).get("Function") or {}).get("Environment") or {}).get("Variables") or {}
+    slots = admission.slots(args.slots if args.slots is not None else environment.get("ADMISSION_SLOTS", ""))
+    instance = instance_class(template)
+    connections = args.max_connections or max_connections(instance)
+
+    errors, warnings, rows = check(template, slots, connections, args.reserve)
+    print("%s: max_connections %d, %d reserved, budget %d" % (instance, connections, args.reserve, connections - args.reserve))
+    print("admission slots: %s (total %d)" % (", ".join("%s=%d" % item for item in slots.items()), sum(slots.values())))
+    for name, klass, reserved in sorted(rows, key=lambda row: (row[1], row[0])):
+        print("  %-40s %-10s %s" % (name, klass, "unreserved" if reserved is None else reserved))
+    analytics = sum(1 for _, klass, _ in rows if klass == admission.ANALYTICS)
+    print("ReportConcurrency (template parameter): at most %s"
+          % report_concurrency(connections, slots, analytics, args.reserve))
+    for warning in warnings:
+        print("WARNING: " + warning)
+    for error in errors:
+        print("ERROR: " + error)
+    sys.exit(1 if errors or (args.strict and warnings) else 0)
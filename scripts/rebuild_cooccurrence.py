@@ -0,0 +1,25 @@
+# Reconstruye product_pairs desde cero a partir de sales_products.
+#   python -m scripts.rebuild_cooccurrence --host ... --user ... --password ... --db cafe_balu
+# Requiere numpy y scipy (solo para este proceso batch, no en las Lambdas).
+import argparse
+import time
+
+import pymysql
+
+from common import cooccurrence
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", required=True)
+    parser.add_argument("--user", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--db", required=True)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    connection = pymysql.connect(host=args.host, user=args.user, password=args.password, database=args.db)
+    try:
+        pairs = cooccurrence.rebuild(connection)
+    finally:
+        connection.close()
+    print("product_pairs rebuilt: %d rows in %.1f s" % (pairs, time.perf_counter() - started))
@@ -0,0 +1,90 @@
+import re
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from pymysql.cursors import RE_INSERT_VALUES
+
+from common import db
+
+
+class FakeCursor:
+    def __init__(self, database):
+        self.database = database
+        self.rows = []
+        self.rowcount = 0
+        self.description = None
+
+    def execute(self, query, args=None):
+        self.database.statements.append(query)
+        self.rows = self.database.rows_for(query)
+        self.rowcount = len(self.rows) or 1
+        width = len(self.rows[0]) if self.rows else 1
+        self.description = tuple(("col%d" % i,) for i in range(width))
+        return self.rowcount
+
+    def executemany(self, query, args):
+        # pymysql solo agrupa INSERT ... VALUES en una sentencia; cualquier
+        # otra consulta viaja una vez por fila
+        trips = 1 if RE_INSERT_VALUES.match(query) else max(len(args), 1)
+        self.database.statements.extend([query] * trips)
+        self.rows = []
+        self.rowcount = len(args)
+        return self.rowcount
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self.database)
+
+    def commit(self):
+        self.database.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """Reemplaza db.connect y cuenta conexiones, sentencias y commits.
+
+    results es una lista de (regex, filas): la primera expresión que coincide
+    con la sentencia decide lo que devuelven fetchone/fetchall.
+    """
+
+    def __init__(self, results=()):
+        self.results = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), rows) for pattern, rows in results]
+        self.connects = 0
+        self.statements = []
+        self.commits = 0
+
+    def connect(self, *args, **kwargs):
+        self.connects += 1
+        return FakeConnection(self)
+
+    def rows_for(self, query):
+        for pattern, rows in self.results:
+            if pattern.search(query):
+                return list(rows)
+        return []
+
+    def counts(self):
+        return {"connects": self.connects, "statements": len(self.statements), "commits": self.commits}
+
+    @contextmanager
+    def installed(self):
+        with patch.object(db, "connect", self.connect):
+            yield self
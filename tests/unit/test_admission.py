@@ -0,0 +1,127 @@
+import unittest
+import json
+import os
+from importlib import import_module
+from unittest.mock import patch, Mock
+
+from common import admission, instrumentation, sqlite_backend
+from scripts import connection_budget
+
+
+def function(code, reserved=None):
+    properties = {"CodeUri": code}
+    if reserved is not None:
+        properties["ReservedConcurrentExecutions"] = reserved
+    return {"Type": "AWS::Serverless::Function", "Properties": properties}
+
+
+class TestAdmission(unittest.TestCase):
+    def setUp(self):
+        admission.local_locks.clear()
+        self.addCleanup(admission.local_locks.clear)
+
+    def test_route_classes_and_slots(self):
+        self.assertEqual(admission.route_class("cancel_sales"), admission.WRITE)
+        self.assertEqual(admission.route_class("top_sold_products"), admission.ANALYTICS)
+        self.assertEqual(admission.route_class("get_products"), admission.OLTP)
+        self.assertEqual(admission.slots("write=2, analytics=1"), {"write": 2, "oltp": 20, "analytics": 1})
+
+    def test_writes_borrow_slots_and_reports_do_not(self):
+        configured = {"write": 1, "oltp": 1, "analytics": 1}
+        self.assertEqual(admission.candidates("write", configured),
+                         ["slot_write_0", "slot_oltp_0", "slot_analytics_0"])
+        self.assertEqual(admission.candidates("analytics", configured), ["slot_analytics_0"])
+
+    @patch.dict(os.environ, {"ADMISSION_SLOTS": "write=1,oltp=1,analytics=1"})
+    def test_local_slots(self):
+        release = admission.admit("top_sold_products")
+        with self.assertRaises(admission.AdmissionRejected):
+            admission.admit("sales_heatmap")
+        # Con su slot ocupado la escritura toma uno de lecturas
+        admission.admit("cancel_sales")
+        admission.admit("cancel_sales")
+        release()
+        admission.admit("sales_heatmap")
+
+    @patch.dict(os.environ, {"ADMISSION_CONTROL": "1", "ADMISSION_SLOTS": "analytics=1"})
+    def test_slot_is_taken_before_connecting(self):
+        factory = Mock()
+
+        def handler(event, context):
+            # Con el único slot tomado por esta sesión, la segunda no abre conexión
+            connection = instrumentation.connect(factory)
+            try:
+                with self.assertRaises(admission.AdmissionRejected):
+                    instrumentation.connect(factory)
+            finally:
+                connection.close()
+            instrumentation.connect(factory).close()
+            return {"statusCode": 200}
+
+        result = instrumentation.instrument("top_sold_products")(handler)({}, None)
+        self.assertEqual(result["statusCode"], 503)
+        self.assertEqual(factory.call_count, 2)
+        factory.return_value.close.assert_called()
+        # Ninguna consulta extra para tomar el slot
+        factory.return_value.cursor.assert_not_called()
+
+    @patch.dict(os.environ, {"ADMISSION_CONTROL": "1", "ADMISSION_SLOTS": "analytics=1"})
+    def test_slot_is_released_when_connect_fails(self):
+        factory = Mock(side_effect=OSError("refused"))
+
+        def handler(event, context):
+            with self.assertRaises(OSError):
+                instrumentation.connect(factory)
+            admission.admit("top_sold_products")()
+            return {"statusCode": 200}
+
+        self.assertEqual(instrumentation.instrument("top_sold_products")(handler)({}, None)["statusCode"], 200)
+
+    def test_busy_report_gets_503_and_slot_is_released_on_close(self):
+        n = id(self)
+        path = "file:admission_%d?mode=memory&cache=shared" % n
+        self.addCleanup(sqlite_backend.reset, path)
+        environment = {"DB_BACKEND": "sqlite", "DB_SQLITE_PATH": path, "DB_SQLITE_SEED": "",
+                       "ADMISSION_CONTROL": "1", "ADMISSION_SLOTS": "analytics=1"}
+        with patch.dict(os.environ, environment):
+            app = import_module("sales_heatmap.app")
+            event = {"queryStringParameters": {"start": "2024-07-01", "end": "2024-07-31"}}
+            self.assertEqual(app.lambda_handler(event, None)["statusCode"], 200)
+
+            held = admission.admit("top_sold_products")
+            result = app.lambda_handler(event, None)
+            self.assertEqual(result["statusCode"], 503)
+            self.assertEqual(json.loads(result["body"])["message"], "DATABASE_BUSY")
+            self.assertEqual(result["headers"]["Retry-After"], "1")
+            held()
+            self.assertEqual(app.lambda_handler(event, None)["statusCode"], 200)
+
+
+class TestConnectionBudget(unittest.TestCase):
+    def test_repo_template_fits_the_budget(self):
+        template = connection_budget.load_template()
+        connections = connection_budget.max_connections(connection_budget.instance_class(template))
+        errors, warnings, rows = connection_budget.check(template, admission.slots(""), connections)
+        self.assertEqual(errors, [])
+        # La concurrencia de los reportes sale del presupuesto: 85 - 5 - 12 - 20 = 48 entre 3
+        self.assertEqual(connections, 85)
+        reports = [reserved for _, klass, reserved in rows if klass == admission.ANALYTICS]
+        self.assertEqual(reports, [16, 16, 16])
+        self.assertFalse(any(warning.startswith("analytics") for warning in warnings))
+        self.assertNotIn("login", [code for _, code, _, _ in connection_budget.functions(template)])
+        self.assertEqual(len(rows), 16)
+
+    def test_over_budget_and_unreserved(self):
+        template = {"Resources": {
+            "Report": function("top_sold_products", reserved=8),
+            "Cancel": function("cancel_sales", reserved=10),
+            "Products": function("get_products"),
+            "Login": function("login")
+        }}
+        errors, warnings, rows = connection_budget.check(template, {"write": 4, "oltp": 4, "analytics": 4}, 20, reserve=5)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("reserved concurrency (18)", errors[0])
+        # 20 - 5 - 4 - 4 = 7 para una función de reportes; tiene 8
+        self.assertTrue(any(warning.startswith("analytics") for warning in warnings))
+        self.assertTrue(any("Products" in warning for warning in warnings))
+        self.assertEqual(len(rows), 3)
@@ -9,11 +9,13 @@ from cancel_sales import app
 
 class TestCancelSales(unittest.TestCase):
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_lambda_handler_successful_cancellation(self, mock_connect):
         mock_connection = Mock()
         mock_cursor = Mock()
+        mock_cursor.rowcount = 1
         mock_cursor.fetchone.return_value = (1,)
+        mock_cursor.fetchall.return_value = [(3,), (5,)]
         mock_connection.cursor.return_value = mock_cursor
         mock_connect.return_value = mock_connection
 
@@ -34,6 +36,75 @@ class TestCancelSales(unittest.TestCase):
         self.assertEqual(result["statusCode"], 200)
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "SUCCESSFUL_CANCELLATION")
+        mock_connection.commit.assert_called_once()
+
+    @patch("cancel_sales.app.db.connect")
+    def test_cancel_sale_invalidates_daily_balance(self, mock_connect):
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.rowcount = 1
+        mock_cursor.fetchall.return_value = [(3,), (5,)]
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connect.return_value = mock_connection
+
+        app.cancel_sale(1)
+
+        statements = [call[0][0] for call in mock_cursor.execute.call_args_list]
+        self.assertIn("DELETE FROM daily_balance", statements[-1])
+        # Se descuentan los pares de productos de la venta en una sola sentencia
+        pairs = [call for call in mock_cursor.execute.call_args_list if "UPDATE product_pairs" in call[0][0]]
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual(pairs[0][0][1], (1,))
+        mock_cursor.executemany.assert_not_called()
+        mock_connection.commit.assert_called_once()
+
+    @patch("cancel_sales.app.db.connect")
+    def test_lambda_handler_snapshot_delete_fails(self, mock_connect):
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.rowcount = 1
+        mock_cursor.fetchone.return_value = (1,)
+        mock_cursor.fetchall.return_value = []
+
+        def execute(query, args=None):
+            if "DELETE FROM daily_balance" in query:
+                raise pymysql.err.OperationalError(1205, "Lock wait timeout exceeded")
+        mock_cursor.execute.side_effect = execute
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connect.return_value = mock_connection
+
+        event = {
+            "pathParameters": {
+                "id": "1"
+            },
+            "requestContext": {
+                "authorizer": {
+                    "claims": {
+                        "cognito:groups": "admin"
+                    }
+                }
+            }
+        }
+
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 500)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "DATABASE_ERROR")
+        mock_connection.commit.assert_not_called()
+        mock_connection.rollback.assert_called_once()
+
+    @patch("cancel_sales.app.db.connect")
+    def test_cancel_sale_already_cancelled(self, mock_connect):
+        mock_connection = Mock()
+        mock_cursor = Mock()
+        mock_cursor.rowcount = 0
+        mock_connection.cursor.return_value = mock_cursor
+        mock_connect.return_value = mock_connection
+
+        app.cancel_sale(1)
+
+        mock_cursor.execute.assert_called_once()
+        mock_cursor.executemany.assert_not_called()
 
     def test_lambda_handler_missing_id(self):
         event = {
@@ -108,7 +179,7 @@ class TestCancelSales(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "INVALID_CHARACTERS")
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_lambda_handler_id_not_found(self, mock_connect):
         mock_connection = Mock()
         mock_cursor = Mock()
@@ -134,7 +205,7 @@ class TestCancelSales(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "ID_NOT_FOUND")
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_lambda_handler_database_error(self, mock_connect):
         mock_connection = Mock()
         mock_cursor = Mock()
@@ -172,7 +243,7 @@ class TestCancelSales(unittest.TestCase):
         with self.assertRaises(ClientError):
             app.get_secret()
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_lambda_handler_invalid_role(self, mock_connect):
         mock_connection = Mock()
         mock_cursor = Mock()
@@ -198,7 +269,7 @@ class TestCancelSales(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "FORBIDDEN")
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_lambda_handler_id_none(self, mock_connect):
         mock_connection = Mock()
         mock_cursor = Mock()
@@ -223,7 +294,7 @@ class TestCancelSales(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "MISSING_FIELDS")
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_cancel_sale_database_error(self, mock_connect):
         mock_connection = Mock()
         mock_cursor = Mock()
@@ -238,7 +309,7 @@ class TestCancelSales(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "DATABASE_ERROR")
 
-    @patch("cancel_sales.app.pymysql.connect")
+    @patch("cancel_sales.app.db.connect")
     def test_lambda_handler_mysql_error(self, mock_connect):
         # Simula un error de MySQL al intentar conectar
         mock_connect.side_effect = pymysql.MySQLError("MySQL database error")
@@ -261,3 +332,18 @@ class TestCancelSales(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "DATABASE_ERROR")
         self.assertIn("MySQL database error", body["error"])
+
+    def test_lambda_handler_invalid_token(self):
+        event = {
+            "pathParameters": {
+                "id": "1"
+            },
+            "headers": {
+                "Authorization": "Bearer not-a-jwt"
+            }
+        }
+
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 401)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "UNAUTHORIZED")
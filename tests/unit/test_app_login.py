@@ -1,6 +1,10 @@
 import unittest
 import json
+import base64
+import importlib
+from unittest.mock import patch
 from login import app
+from common import instrumentation
 
 mock_success = {
     "body": json.dumps({
@@ -35,3 +39,103 @@ class TestLogin(unittest.TestCase):
         result = app.lambda_handler(mock_invalid_json, None)
         status_code = result["statusCode"]
         self.assertEqual(status_code, 500)
+
+
+def make_token(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return "header." + payload + ".signature"
+
+
+class TestLoginGroupsFromToken(unittest.TestCase):
+    def auth_result(self, claims):
+        return {
+            "AuthenticationResult": {
+                "IdToken": make_token(claims),
+                "AccessToken": "access",
+                "RefreshToken": "refresh"
+            }
+        }
+
+    @patch("login.app.client")
+    def test_role_from_id_token(self, cognito):
+        cognito.initiate_auth.return_value = self.auth_result({"cognito:groups": ["admin"]})
+
+        result = app.lambda_handler(mock_success, None)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(json.loads(result["body"])["role"], "admin")
+        cognito.admin_list_groups_for_user.assert_not_called()
+
+    @patch("login.app.client")
+    def test_role_fallback_without_claim(self, cognito):
+        cognito.initiate_auth.return_value = self.auth_result({"sub": "123"})
+        cognito.admin_list_groups_for_user.return_value = {"Groups": [{"GroupName": "sales"}]}
+
+        result = app.lambda_handler(mock_success, None)
+        self.assertEqual(json.loads(result["body"])["role"], "sales")
+        cognito.admin_list_groups_for_user.assert_called_once()
+
+    def test_get_groups_from_invalid_token(self):
+        self.assertIsNone(app.get_groups_from_token("not-a-jwt"))
+
+    def test_timing_log_marks_only_first_call_as_cold(self):
+        self.addCleanup(setattr, app, "client", app.client)
+        instrumentation.started_functions.discard("login")
+        with patch("boto3.client") as boto3_client:
+            # Contenedor frío: el módulo se vuelve a cargar y crea su cliente
+            importlib.reload(app)
+            cognito = app.client
+            cognito.initiate_auth.return_value = self.auth_result({"cognito:groups": ["admin"]})
+            with self.assertLogs(level="INFO") as logs:
+                app.lambda_handler(mock_success, None)
+                app.lambda_handler(mock_success, None)
+
+        # Un solo cliente por contenedor, y la segunda invocación usa el mismo objeto
+        boto3_client.assert_called_once()
+        self.assertIs(cognito, boto3_client.return_value)
+        self.assertIs(app.client, cognito)
+        self.assertEqual(cognito.initiate_auth.call_count, 2)
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual([entry["cold_start"] for entry in entries], [True, False])
+        self.assertIn("cognito", entries[1]["phases"])
+        self.assertNotIn("init_client", entries[1]["phases"])
+
+
+class TestRefresh(unittest.TestCase):
+    @patch("login.app.client")
+    def test_refresh(self, cognito):
+        cognito.initiate_auth.return_value = {
+            "AuthenticationResult": {
+                "IdToken": make_token({"cognito:groups": ["sales"], "cognito:username": "balu"}),
+                "AccessToken": "access"
+            }
+        }
+        event = {"resource": "/refresh", "body": json.dumps({"refresh_token": "refresh"})}
+
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertEqual(body["role"], "sales")
+        self.assertNotIn("refresh_token", body)
+        self.assertEqual(cognito.initiate_auth.call_args[1]["AuthFlow"], "REFRESH_TOKEN_AUTH")
+        cognito.admin_list_groups_for_user.assert_not_called()
+
+    @patch("login.app.client")
+    def test_refresh_role_fallback_uses_token_username(self, cognito):
+        cognito.initiate_auth.return_value = {
+            "AuthenticationResult": {
+                "IdToken": make_token({"cognito:username": "balu"}),
+                "AccessToken": "access"
+            }
+        }
+        cognito.admin_list_groups_for_user.return_value = {"Groups": [{"GroupName": "admin"}]}
+        event = {"resource": "/refresh", "body": json.dumps({"refresh_token": "refresh"})}
+
+        result = app.lambda_handler(event, None)
+        self.assertEqual(json.loads(result["body"])["role"], "admin")
+        self.assertEqual(cognito.admin_list_groups_for_user.call_args[1]["Username"], "balu")
+
+    def test_refresh_missing_token(self):
+        event = {"resource": "/refresh", "body": json.dumps({})}
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 400)
+        self.assertEqual(json.loads(result["body"])["error_message"], "MISSING_REFRESH_TOKEN")
@@ -20,9 +20,9 @@ mock_missing_params = {
 }
 
 class TestResetPassword(unittest.TestCase):
-    @patch("newPassword.app.boto3.client")
+    @patch("newPassword.app.client")
     def test_new_password_success(self, mock_boto_client):
-        mock_client_instance = mock_boto_client.return_value
+        mock_client_instance = mock_boto_client
         mock_client_instance.admin_initiate_auth.return_value = {
             "ChallengeName": "NEW_PASSWORD_REQUIRED",
             "Session": "session"
@@ -32,9 +32,9 @@ class TestResetPassword(unittest.TestCase):
         self.assertEqual(status_code, 200)
         self.assertIn("Password changed successfully", result["body"])
 
-    @patch("newPassword.app.boto3.client")
+    @patch("newPassword.app.client")
     def test_password_update_success(self, mock_boto_client):
-        mock_client_instance = mock_boto_client.return_value
+        mock_client_instance = mock_boto_client
         mock_client_instance.admin_initiate_auth.return_value = {
             "AuthenticationResult": {
                 "AccessToken": "access_token"
@@ -45,9 +45,9 @@ class TestResetPassword(unittest.TestCase):
         self.assertEqual(status_code, 200)
         self.assertIn("Password updated successfully", result["body"])
 
-    @patch("newPassword.app.boto3.client")
+    @patch("newPassword.app.client")
     def test_unexpected_challenge(self, mock_boto_client):
-        mock_client_instance = mock_boto_client.return_value
+        mock_client_instance = mock_boto_client
         mock_client_instance.admin_initiate_auth.return_value = {
             "ChallengeName": "UNEXPECTED_CHALLENGE",
             "Session": "session"
@@ -57,9 +57,9 @@ class TestResetPassword(unittest.TestCase):
         self.assertEqual(status_code, 400)
         self.assertIn("Unexpected response during authentication", result["body"])
 
-    @patch("newPassword.app.boto3.client")
+    @patch("newPassword.app.client")
     def test_client_error(self, mock_boto_client):
-        mock_client_instance = mock_boto_client.return_value
+        mock_client_instance = mock_boto_client
         error_response = {
             'Error': {
                 'Code': 'InvalidParameterException',
@@ -74,9 +74,9 @@ class TestResetPassword(unittest.TestCase):
         self.assertEqual(status_code, 400)
         self.assertIn("An error occurred", result["body"])
 
-    @patch("newPassword.app.boto3.client")
+    @patch("newPassword.app.client")
     def test_error_500(self, mock_boto_client):
-        mock_client_instance = mock_boto_client.return_value
+        mock_client_instance = mock_boto_client
         error_response = {
             'Error': {
                 'Code': 'InvalidParameterException',
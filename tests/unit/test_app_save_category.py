@@ -35,7 +35,7 @@ class TestSaveCategory(unittest.TestCase):
 
     # ... (otras pruebas para diferentes ClientError) ...
 
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_lambda_handler_key_error_on_claims(self, mock_connect):
         event = {
             "body": json.dumps({
@@ -51,7 +51,7 @@ class TestSaveCategory(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "MISSING_KEY")
         self.assertIn("error", body)
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_lambda_handler_duplicate_name(self, mock_connect):
         mock_cursor = MagicMock()
         mock_cursor.fetchone.return_value = (1,)
@@ -76,7 +76,7 @@ class TestSaveCategory(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "DUPLICATE_NAME")
 
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_lambda_handler_valid(self, mock_connect):
         mock_cursor = MagicMock()
         mock_cursor.fetchone.return_value = (0,)
@@ -154,7 +154,7 @@ class TestSaveCategory(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "INVALID_CHARACTERS")
 
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_is_name_duplicate_true(self, mock_connect):
         mock_cursor = MagicMock()
         mock_cursor.fetchone.return_value = (1,)
@@ -163,7 +163,7 @@ class TestSaveCategory(unittest.TestCase):
         result = app.is_name_duplicate("duplicate")
         self.assertTrue(result)
 
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_is_name_duplicate_false(self, mock_connect):
         mock_cursor = MagicMock()
         mock_cursor.fetchone.return_value = (0,)
@@ -232,7 +232,7 @@ class TestSaveCategory(unittest.TestCase):
         self.assertIn("error", body)
         self.assertEqual(body["error"], "Unexpected error")
 
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_save_category_integrity_error(self, mock_connect):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
@@ -251,7 +251,7 @@ class TestSaveCategory(unittest.TestCase):
         self.assertEqual(result["statusCode"], 400)
         self.assertEqual(result["body"], json.dumps({"message": "El nombre de la categoría ya existe. Por favor, elige otro."}))
 
-    @patch("save_category.app.pymysql.connect")
+    @patch("save_category.app.db.connect")
     def test_save_category_generic_database_error(self, mock_connect):
         mock_connection = MagicMock()
         mock_cursor = MagicMock()
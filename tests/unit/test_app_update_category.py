@@ -221,7 +221,7 @@ class TestUpdateCategory(unittest.TestCase):
         self.assertIn("message", body)
         self.assertEqual(body["message"], "MISSING_KEY")
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_lambda_internal_server_error(self, mock_connect):
         mock_connect.side_effect = Exception("Connection error")
 
@@ -232,21 +232,21 @@ class TestUpdateCategory(unittest.TestCase):
         self.assertIn("message", body)
         self.assertEqual(body["message"], "INTERNAL_SERVER_ERROR")
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_category_exist_true(self, mock_connect):
         mock_connect.return_value.cursor.return_value.fetchone.return_value = (1, 'Category Name')
 
         result = app.category_exist(1)
         self.assertTrue(result)
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_category_exist_false(self, mock_connect):
         mock_connect.return_value.cursor.return_value.fetchone.return_value = None
 
         result = app.category_exist(1)
         self.assertFalse(result)
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_category_exist_db_error(self, mock_connect):
         mock_connect.return_value.cursor.side_effect = Exception("Database error")
 
@@ -290,7 +290,7 @@ class TestUpdateCategory(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "MISSING_FIELDS")
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_duplicated_name_db_error(self, mock_connect):
         # Simula un error en la ejecución de la consulta
         mock_connection = mock_connect.return_value
@@ -302,7 +302,7 @@ class TestUpdateCategory(unittest.TestCase):
 
         mock_connection.close.assert_called_once()
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_update_category_success(self, mock_connect):
         # Simula una actualización exitosa de la categoría
         mock_connection = mock_connect.return_value
@@ -323,7 +323,7 @@ class TestUpdateCategory(unittest.TestCase):
         mock_connection.commit.assert_called_once()
         mock_connection.close.assert_called_once()
 
-    @patch("update_category.app.pymysql.connect")
+    @patch("update_category.app.db.connect")
     def test_update_category_database_error(self, mock_connect):
         # Simula un error durante la ejecución del query
         mock_connection = mock_connect.return_value
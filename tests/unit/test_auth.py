@@ -0,0 +1,121 @@
+import unittest
+import time
+import urllib.error
+from unittest.mock import patch
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from common import auth
+
+
+def generate_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    public_jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    public_jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, public_jwk
+
+
+def make_token(private_key, kid, **overrides):
+    claims = {
+        "sub": "user-1",
+        "iss": auth.ISSUER,
+        "aud": auth.CLIENT_ID,
+        "token_use": "id",
+        "cognito:groups": ["admin"],
+        "exp": int(time.time()) + 3600
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+class TestAuth(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.private_key, cls.public_jwk = generate_key("key-1")
+        cls.other_key, cls.other_jwk = generate_key("key-2")
+
+    def setUp(self):
+        auth.signing_keys.clear()
+        auth.verified_tokens.clear()
+        auth.jwks_fetched_at = None
+        patcher = patch("common.auth.fetch_jwks", return_value={"keys": [self.public_jwk]})
+        self.mock_fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_verify_token_caches_keys_and_results(self):
+        token = make_token(self.private_key, "key-1")
+        self.assertEqual(auth.verify_token(token)["cognito:groups"], ["admin"])
+        with patch("common.auth.jwt.decode") as mock_decode:
+            self.assertEqual(auth.verify_token(token)["sub"], "user-1")
+            mock_decode.assert_not_called()
+        self.mock_fetch.assert_called_once()
+
+    def test_first_fetch_on_freshly_booted_machine(self):
+        # time.monotonic() cuenta desde el arranque: en una VM nueva está por debajo del intervalo
+        with patch("common.auth.time.monotonic", return_value=5.0):
+            claims = auth.verify_token(make_token(self.private_key, "key-1"))
+        self.assertEqual(claims["sub"], "user-1")
+        self.mock_fetch.assert_called_once()
+
+    def test_unknown_kid_refreshes_jwks(self):
+        with patch("common.auth.time.monotonic", return_value=1000.0):
+            auth.verify_token(make_token(self.private_key, "key-1"))
+        self.mock_fetch.return_value = {"keys": [self.public_jwk, self.other_jwk]}
+        with patch("common.auth.time.monotonic", return_value=1000.0 + auth.JWKS_REFRESH_INTERVAL):
+            claims = auth.verify_token(make_token(self.other_key, "key-2"))
+        self.assertEqual(claims["sub"], "user-1")
+        self.assertEqual(self.mock_fetch.call_count, 2)
+
+    def test_unknown_kid_refresh_is_rate_limited(self):
+        auth.verify_token(make_token(self.private_key, "key-1"))
+        with self.assertRaises(auth.AuthError):
+            auth.verify_token(make_token(self.other_key, "key-2"))
+        self.mock_fetch.assert_called_once()
+
+    def test_jwks_outage_keeps_known_keys(self):
+        with patch("common.auth.time.monotonic", return_value=1000.0):
+            auth.verify_token(make_token(self.private_key, "key-1"))
+        self.mock_fetch.side_effect = urllib.error.URLError("timed out")
+        with patch("common.auth.time.monotonic", return_value=1000.0 + auth.JWKS_REFRESH_INTERVAL):
+            with self.assertRaises(auth.AuthError):
+                auth.verify_token(make_token(self.other_key, "key-2"))
+            # Los tokens firmados con la llave conocida siguen siendo válidos
+            claims = auth.verify_token(make_token(self.private_key, "key-1", sub="user-2"))
+        self.assertEqual(claims["sub"], "user-2")
+        self.assertIn("key-1", auth.signing_keys)
+
+    def test_jwks_timeout_is_auth_error(self):
+        self.mock_fetch.side_effect = TimeoutError("timed out")
+        with self.assertRaises(auth.AuthError):
+            auth.verify_token(make_token(self.private_key, "key-1"))
+
+    def test_rejects_bad_signature(self):
+        with self.assertRaises(auth.AuthError):
+            auth.verify_token(make_token(self.other_key, "key-1"))
+
+    def test_rejects_expired_token(self):
+        with self.assertRaises(auth.AuthError):
+            auth.verify_token(make_token(self.private_key, "key-1", exp=int(time.time()) - 10))
+
+    def test_rejects_other_client(self):
+        with self.assertRaises(auth.AuthError):
+            auth.verify_token(make_token(self.private_key, "key-1", aud="other-client"))
+
+    def test_access_token_checks_client_id(self):
+        token = make_token(self.private_key, "key-1", token_use="access", aud=None, client_id=auth.CLIENT_ID)
+        self.assertEqual(auth.verify_token(token)["token_use"], "access")
+
+    def test_get_claims_prefers_authorizer(self):
+        event = {"requestContext": {"authorizer": {"claims": {"cognito:groups": "admin"}}}}
+        self.assertEqual(auth.get_claims(event), {"cognito:groups": "admin"})
+        self.mock_fetch.assert_not_called()
+
+    def test_get_claims_from_authorization_header(self):
+        token = make_token(self.private_key, "key-1")
+        claims = auth.get_claims({"headers": {"authorization": "Bearer " + token}})
+        self.assertEqual(claims["cognito:groups"], ["admin"])
+
+    def test_get_claims_without_token(self):
+        with self.assertRaises(KeyError):
+            auth.get_claims({"requestContext": {}})
@@ -0,0 +1,95 @@
+import unittest
+import json
+import os
+from unittest.mock import patch, Mock
+
+import pymysql
+
+from common import circuit_breaker, db, instrumentation
+from get_category import app
+
+
+def refused():
+    return pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+
+
+@patch.dict(os.environ, {"DB_BACKEND": "mysql"})
+@patch.object(db.time, "sleep")
+@patch.object(db.pymysql, "connect")
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        circuit_breaker.reset()
+        self.addCleanup(circuit_breaker.reset)
+
+    def test_explicit_timeouts(self, mock_connect, _):
+        db.connect(host="db.rds", user="u", password="p", db="cafe")
+        kwargs = mock_connect.call_args.kwargs
+        self.assertEqual(kwargs["connect_timeout"], db.CONNECT_TIMEOUT)
+        self.assertEqual(kwargs["read_timeout"], db.READ_TIMEOUT)
+        self.assertEqual(kwargs["write_timeout"], db.WRITE_TIMEOUT)
+
+    def test_transient_error_is_retried_with_backoff(self, mock_connect, mock_sleep):
+        connection = Mock()
+        mock_connect.side_effect = [refused(), refused(), connection]
+        self.assertIs(db.connect(host="db.rds"), connection)
+        self.assertEqual(mock_connect.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertTrue(all(0 <= call.args[0] <= db.RETRY_MAX_SECONDS for call in mock_sleep.call_args_list))
+        self.assertEqual(circuit_breaker.for_host("db.rds").state, circuit_breaker.CLOSED)
+
+    def test_non_transient_error_is_not_retried(self, mock_connect, mock_sleep):
+        mock_connect.side_effect = pymysql.err.OperationalError(1045, "Access denied")
+        with self.assertRaises(pymysql.err.OperationalError):
+            db.connect(host="db.rds")
+        self.assertEqual(mock_connect.call_count, 1)
+        mock_sleep.assert_not_called()
+        self.assertEqual(circuit_breaker.for_host("db.rds").failures, 0)
+
+    def test_opens_after_consecutive_failures_and_fails_fast(self, mock_connect, _):
+        mock_connect.side_effect = refused()
+        for _ in range(circuit_breaker.BREAKER_FAILURES):
+            with self.assertRaises(pymysql.err.OperationalError):
+                db.connect(host="db.rds")
+        calls = mock_connect.call_count
+
+        with self.assertRaises(circuit_breaker.CircuitOpenError) as raised:
+            db.connect(host="db.rds")
+        self.assertEqual(mock_connect.call_count, calls)
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        # El circuito es por host: otra base sigue intentándose
+        mock_connect.side_effect = None
+        db.connect(host="other.rds")
+
+    def test_half_open_lets_one_trial_through(self, mock_connect, _):
+        breaker = circuit_breaker.Breaker("db.rds", failures=1, open_seconds=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, circuit_breaker.OPEN)
+        breaker.before_call()
+        self.assertEqual(breaker.state, circuit_breaker.HALF_OPEN)
+        # Mientras la prueba no termina, el resto sigue fallando rápido
+        with self.assertRaises(circuit_breaker.CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, circuit_breaker.CLOSED)
+
+    def test_read_timeout_during_query_counts_as_failure(self, *_):
+        cursor = Mock()
+        cursor.connection.host = "db.rds"
+        cursor.execute.side_effect = pymysql.err.OperationalError(2013, "Lost connection to MySQL server during query")
+        with self.assertRaises(pymysql.err.OperationalError):
+            instrumentation.TimedCursor(cursor).execute("SELECT 1")
+        self.assertEqual(circuit_breaker.for_host("db.rds").failures, 1)
+
+    def test_handler_returns_503_with_retry_after(self, mock_connect, _):
+        breaker = circuit_breaker.for_host(app.rds_host)
+        for _ in range(breaker.max_failures):
+            breaker.record_failure()
+
+        with patch.object(app, "rds_replicas", []):
+            result = app.lambda_handler({"pathParameters": {"status": "1"}}, None)
+
+        mock_connect.assert_not_called()
+        self.assertEqual(result["statusCode"], 503)
+        self.assertEqual(json.loads(result["body"])["message"], "DATABASE_UNAVAILABLE")
+        self.assertGreaterEqual(int(result["headers"]["Retry-After"]), 1)
+        self.assertEqual(result["headers"]["Access-Control-Allow-Origin"], "*")
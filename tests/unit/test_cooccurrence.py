@@ -0,0 +1,33 @@
+import unittest
+from unittest.mock import Mock
+
+from common import cooccurrence
+
+
+class TestCooccurrence(unittest.TestCase):
+    def test_record_sale_counts_each_pair_once(self):
+        cursor = Mock()
+        cooccurrence.record_sale(cursor, [2, 1, 2])
+        self.assertEqual(cursor.executemany.call_args[0][1], [(1, 2), (2, 1)])
+
+    def test_record_sale_single_product(self):
+        cursor = Mock()
+        cooccurrence.record_sale(cursor, [1])
+        cursor.executemany.assert_not_called()
+
+    def test_count_pairs_matches_incremental_counts(self):
+        rows = [(1, 10), (1, 20), (1, 20), (2, 10), (2, 20), (2, 30), (3, 30)]
+        pairs = sorted(cooccurrence.count_pairs(rows))
+        self.assertEqual(pairs, [
+            (10, 20, 2), (10, 30, 1),
+            (20, 10, 2), (20, 30, 1),
+            (30, 10, 1), (30, 20, 1),
+        ])
+
+    def test_rebuild(self):
+        connection = Mock()
+        cursor = connection.cursor.return_value
+        cursor.fetchall.return_value = [(1, 10), (1, 20)]
+        self.assertEqual(cooccurrence.rebuild(connection), 2)
+        self.assertEqual(cursor.execute.call_args_list[1][0][0], "DELETE FROM product_pairs")
+        connection.commit.assert_called_once()
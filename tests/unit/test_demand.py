@@ -0,0 +1,26 @@
+import unittest
+
+import numpy as np
+
+from common import demand
+
+
+class TestDemand(unittest.TestCase):
+    def test_daily_matrix_ignores_unknown_products_and_old_days(self):
+        matrix = demand.daily_matrix([5, 3], [(3, 0, 2), (5, 1, 4), (9, 0, 1), (3, 7, 1)], 2)
+        np.testing.assert_array_equal(matrix, [[0, 4], [2, 0]])
+
+    def test_moving_average_of_constant_demand(self):
+        matrix = np.full((2, 28), 3.0)
+        np.testing.assert_allclose(demand.moving_average(matrix), [3.0, 3.0])
+
+    def test_days_of_cover(self):
+        cover = demand.days_of_cover([10, 10, -1], np.array([2.0, 0.0, 1.0]))
+        np.testing.assert_array_equal(cover, [5.0, np.inf, 0.0])
+
+    def test_order_quantities(self):
+        mean, std = demand.mean_and_std(np.array([[2.0, 2.0], [0.0, 4.0]]))
+        safety_stock, order_up_to, quantity = demand.order_quantities([10, 50], mean, std, [1, 2], 2, 1.0)
+        np.testing.assert_allclose(safety_stock, [0.0, 2.0 * 2.0])
+        np.testing.assert_allclose(order_up_to, [6.0, 12.0])
+        np.testing.assert_array_equal(quantity, [0, 0])
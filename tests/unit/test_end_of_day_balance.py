@@ -28,6 +28,9 @@ mock_wrong_date = {
 }
 
 class TestEndOfDayBalance(unittest.TestCase):
+    def setUp(self):
+        app.balance_cache.clear()
+
     def test_end_of_day_balance(self):
         result = app.lambda_handler(mock_date, None)
         self.assertEqual(result["statusCode"], 200)
@@ -60,9 +63,74 @@ class TestEndOfDayBalance(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "INVALID_DATE_FORMAT_OR_FUTURE_DATE")
 
-    @patch("end_of_day_balance.app.pymysql.connect")
+    @patch("end_of_day_balance.app.db.connect")
     def test_end_of_day_balance_error_connecting(self, mock_connect):
         mock_connect.side_effect = pymysql.MySQLError("Simulated connection error")
         with self.assertRaises(Exception) as context:
             app.connect_to_database()
-        self.assertIn("ERROR CONNECTING TO DATABASE", str(context.exception))
\ No newline at end of file
+        self.assertIn("ERROR CONNECTING TO DATABASE", str(context.exception))
+
+class TestEndOfDayBalanceSnapshot(unittest.TestCase):
+    def setUp(self):
+        app.balance_cache.clear()
+
+    @patch("end_of_day_balance.app.connect_to_database")
+    def test_closed_day_served_from_snapshot(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = ("Cafe", 50, 100, 2, 0)
+
+        result = app.lambda_handler(mock_date, None)
+        self.assertEqual(result["statusCode"], 200)
+        # Un POST no se cachea en API Gateway ni en CloudFront
+        self.assertNotIn("Cache-Control", result["headers"])
+        body = json.loads(result["body"])
+        self.assertEqual(body["balance"]["most_sold_product"], "Cafe")
+        # Solo se lee el snapshot, no se recalcula
+        self.assertEqual(mock_cursor.execute.call_count, 1)
+
+    @patch("end_of_day_balance.app.connect_to_database")
+    def test_closed_day_snapshot_created_on_first_request(self, mock_connect_to_database):
+        mock_connection = mock_connect_to_database.return_value
+        mock_cursor = mock_connection.cursor.return_value
+        mock_cursor.fetchone.side_effect = [None, ("Cafe", 50, 100, 2, 0)]
+
+        result = app.lambda_handler(mock_date, None)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(mock_cursor.execute.call_count, 3)
+        self.assertIn("INSERT INTO daily_balance", mock_cursor.execute.call_args_list[2][0][0])
+        mock_connection.commit.assert_called_once()
+
+    @patch("end_of_day_balance.app.connect_to_database")
+    def test_closed_day_served_from_memory(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = ("Cafe", 50, 100, 2, 0)
+
+        app.lambda_handler(mock_date, None)
+        result = app.lambda_handler(mock_date, None)
+        self.assertEqual(result["statusCode"], 200)
+        mock_connect_to_database.assert_called_once()
+
+    @patch("end_of_day_balance.app.connect_to_database")
+    def test_closed_day_memory_expires_after_max_age(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = ("Cafe", 50, 100, 2, 0)
+
+        with patch("end_of_day_balance.app.time.monotonic", return_value=1000.0):
+            app.lambda_handler(mock_date, None)
+        # Una cancelación tardía cambió el snapshot: se ve al vencer la entrada
+        mock_cursor.fetchone.return_value = ("Te", 40, 40, 1, 1)
+        with patch("end_of_day_balance.app.time.monotonic", return_value=1000.0 + app.BALANCE_MAX_AGE):
+            result = app.lambda_handler(mock_date, None)
+        self.assertEqual(json.loads(result["body"])["balance"]["most_sold_product"], "Te")
+        self.assertEqual(mock_connect_to_database.call_count, 2)
+
+    @patch("end_of_day_balance.app.connect_to_database")
+    def test_today_is_not_cached(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = ("Cafe", 50, 100, 2, 0)
+        today = {"body": json.dumps({"date": app.datetime.now().strftime('%Y-%m-%d')})}
+
+        result = app.lambda_handler(today, None)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(result["headers"]["Cache-Control"], "no-store")
+        self.assertEqual(len(app.balance_cache), 0)
@@ -0,0 +1,33 @@
+import unittest
+
+from benchmarks import handlers
+
+
+def route(us, calibration=1000.0, peak=10.0):
+    return {"us_per_request": us, "calibration_us": calibration, "peak_kib": peak}
+
+
+class TestHandlerBenchmarks(unittest.TestCase):
+    def test_regression_is_flagged(self):
+        baseline = {"routes": {"get_products": route(100.0)}}
+        flagged = handlers.regressions({"get_products": route(200.0)}, baseline, 0.5)
+        self.assertEqual(list(flagged), ["get_products"])
+
+    def test_slower_machine_scales_baseline(self):
+        # La calibración tardó el doble: 190 µs equivale a 95 µs en la máquina de la línea base
+        baseline = {"routes": {"get_products": route(100.0)}}
+        self.assertEqual(handlers.regressions({"get_products": route(190.0, calibration=2000.0)}, baseline, 0.5), {})
+
+    def test_memory_regression_and_unknown_route(self):
+        baseline = {"routes": {"get_products": route(100.0, peak=100.0)}}
+        flagged = handlers.regressions({
+            "get_products": route(100.0, peak=300.0),
+            "new_route": route(5000.0)
+        }, baseline, 0.5)
+        self.assertEqual(flagged, {"get_products": ["300.0 KiB peak, baseline 100.0 KiB"]})
+
+    def test_measure_runs_handler_with_fake_rows(self):
+        routes = handlers.quiet_run(5, ["get_category", "end_of_day_balance"])
+        self.assertEqual(set(routes), {"get_category", "end_of_day_balance"})
+        self.assertGreater(routes["get_category"]["us_per_request"], 0)
+        self.assertGreater(routes["get_category"]["response_bytes"], 0)
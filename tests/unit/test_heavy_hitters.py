@@ -0,0 +1,50 @@
+import unittest
+from collections import Counter
+
+from common.heavy_hitters import SpaceSaving, RollingHeavyHitters
+
+
+class TestSpaceSaving(unittest.TestCase):
+    def test_exact_when_under_capacity(self):
+        sketch = SpaceSaving(capacity=4)
+        sketch.add(1, 3)
+        sketch.add(2)
+        sketch.add(1)
+        self.assertEqual(sketch.top(2), [(1, 4, 0), (2, 1, 0)])
+
+    def test_error_bound(self):
+        stream = [1] * 50 + [2] * 30 + list(range(100, 140)) + [3] * 20
+        sketch = SpaceSaving(capacity=8)
+        for item in stream:
+            sketch.add(item)
+        exact = Counter(stream)
+        for item, count, error in sketch.top(8):
+            # Nunca subestima y el error queda dentro de N / capacidad
+            self.assertGreaterEqual(count, exact[item])
+            self.assertLessEqual(count - exact[item], error)
+            self.assertLessEqual(error, len(stream) / 8)
+        self.assertEqual([item for item, _, _ in sketch.top(2)], [1, 2])
+
+    def test_merge(self):
+        first = SpaceSaving(capacity=4)
+        second = SpaceSaving(capacity=4)
+        first.add(1, 5)
+        second.add(1, 2)
+        second.add(2, 4)
+        first.merge(second)
+        self.assertEqual(first.top(2), [(1, 7, 0), (2, 4, 0)])
+
+
+class TestRollingHeavyHitters(unittest.TestCase):
+    def test_window_expires_old_buckets(self):
+        sketch = RollingHeavyHitters(capacity=4, bucket_seconds=60, window_buckets=2)
+        sketch.add(1, 10, now=0)
+        sketch.add(2, 3, now=60)
+        self.assertEqual(sketch.top(1, now=90)[0][0], 1)
+        self.assertEqual(sketch.top(2, now=130), [(2, 3, 0)])
+
+    def test_dumps_and_loads(self):
+        sketch = RollingHeavyHitters(capacity=4, bucket_seconds=60, window_buckets=2)
+        sketch.add(7, 2, now=0)
+        restored = RollingHeavyHitters.loads(sketch.dumps())
+        self.assertEqual(restored.top(1, now=0), [(7, 2, 0)])
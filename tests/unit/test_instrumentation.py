@@ -0,0 +1,105 @@
+import unittest
+import json
+import os
+from unittest.mock import patch, Mock
+
+from common import instrumentation
+from cancel_sales import app
+
+mock_cancel = {
+    "resource": "/cancel_sale/{id}",
+    "pathParameters": {
+        "id": "1"
+    },
+    "requestContext": {
+        "authorizer": {
+            "claims": {
+                "cognito:groups": "admin"
+            }
+        }
+    }
+}
+
+
+def handler_logs(test, event):
+    with test.assertLogs(level="INFO") as logs:
+        result = app.lambda_handler(event, None)
+    entries = [json.loads(record.getMessage()) for record in logs.records]
+    return result, [entry for entry in entries if entry.get("function") == "cancel_sales"]
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.connection = Mock()
+        self.cursor = Mock()
+        self.cursor.fetchone.return_value = (1,)
+        self.cursor.fetchall.return_value = []
+        self.cursor.rowcount = 1
+        self.connection.cursor.return_value = self.cursor
+
+    @patch("cancel_sales.app.db.connect")
+    def test_logs_one_line_with_round_trips(self, mock_connect):
+        mock_connect.return_value = self.connection
+        result, entries = handler_logs(self, mock_cancel)
+
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry["route"], "/cancel_sale/{id}")
+        self.assertEqual(entry["status_code"], 200)
+        # 1 conexión, SELECT, UPDATE, pares, hora, DELETE de daily_balance y commit
+        self.assertEqual(entry["db_round_trips"], 7)
+        self.assertEqual(len(entry["queries_ms"]), 5)
+        self.assertIn("connect", entry["phases"])
+        self.assertIn("query", entry["phases"])
+        self.assertNotIn("Server-Timing", result["headers"])
+
+    @patch.dict(os.environ, {"SERVER_TIMING": "1"})
+    @patch("cancel_sales.app.db.connect")
+    def test_server_timing_header(self, mock_connect):
+        mock_connect.return_value = self.connection
+        result, _ = handler_logs(self, mock_cancel)
+
+        server_timing = result["headers"]["Server-Timing"]
+        self.assertIn("connect;dur=", server_timing)
+        self.assertIn("query;dur=", server_timing)
+        self.assertRegex(server_timing, r'db;desc="\d+ round trips"')
+        self.assertTrue(server_timing.split(", ")[-1].startswith("total;dur="))
+        self.assertEqual(result["headers"]["Timing-Allow-Origin"], "*")
+        # Los headers de CORS del handler se conservan
+        self.assertEqual(result["headers"]["Access-Control-Allow-Origin"], "*")
+
+    def test_init_phases_reported_on_cold_start(self):
+        instrumentation.init_phases.clear()
+        with instrumentation.phase("secret"):
+            pass
+        handler = instrumentation.instrument("cold_test")(lambda event, context: {"statusCode": 200})
+
+        with self.assertLogs(level="INFO") as logs:
+            handler({}, None)
+            handler({}, None)
+        entries = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual([entry["cold_start"] for entry in entries], [True, False])
+        self.assertIn("init_secret", entries[0]["phases"])
+        self.assertNotIn("init_secret", entries[1]["phases"])
+
+    def test_executemany_insert_is_one_round_trip(self):
+        cursor = instrumentation.TimedCursor(Mock())
+
+        def handler(event, context):
+            cursor.executemany("INSERT INTO product_pairs (product_id) VALUES (%s)", [(1,), (2,), (3,)])
+            cursor.executemany("UPDATE product_pairs SET sales_count = 0 WHERE product_id = %s", [(1,), (2,)])
+            return {"statusCode": 200}
+
+        with self.assertLogs(level="INFO") as logs:
+            instrumentation.instrument("executemany_test")(handler)({}, None)
+        self.assertEqual(json.loads(logs.records[0].getMessage())["db_round_trips"], 3)
+
+    def test_exception_is_logged_and_raised(self):
+        def handler(event, context):
+            raise ValueError("boom")
+
+        with self.assertLogs(level="INFO") as logs:
+            with self.assertRaises(ValueError):
+                instrumentation.instrument("error_test")(handler)({}, None)
+        self.assertIsNone(json.loads(logs.records[0].getMessage())["status_code"])
@@ -20,9 +20,144 @@ class TestLowStockProducts(unittest.TestCase):
         body = json.loads(result["body"])
         self.assertEqual(body["message"], "INTERNAL_SERVER_ERROR")
 
-    @patch("get_low_stock_products.app.pymysql.connect")
+    @patch("get_low_stock_products.app.db.connect")
     def test_end_of_day_balance_error_connecting(self, mock_connect):
         mock_connect.side_effect = pymysql.MySQLError("Simulated connection error")
         with self.assertRaises(Exception) as context:
             app.connect_to_database()
-        self.assertIn("ERROR CONNECTING TO DATABASE", str(context.exception))
\ No newline at end of file
+        self.assertIn("ERROR CONNECTING TO DATABASE", str(context.exception))
+
+    @patch("get_low_stock_products.app.connect_to_database")
+    def test_low_stock_products_closes_connection_on_error(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.execute.side_effect = pymysql.err.OperationalError(2013, "Lost connection")
+        result = app.lambda_handler(None, None)
+        self.assertEqual(result["statusCode"], 500)
+        mock_connect.return_value.close.assert_called_once()
+
+class TestLowStockForecast(unittest.TestCase):
+    def test_rank_by_stock_out(self):
+        products = [
+            (1, "Cafe", 10, 7),
+            (2, "Te", 10, 7),
+            (3, "Pastel", 0, 7),
+            (4, "Galleta", 100, 7),
+        ]
+        # Cafe vende 5 diarios, Te 1 diario, Galleta 1 diario
+        sales = [(1, day, 5) for day in range(7)] + [(2, day, 1) for day in range(7)] + [(4, day, 1) for day in range(7)]
+        result = app.rank_by_stock_out(products, sales, 7)
+        self.assertEqual([product["id"] for product in result], [3, 1])
+        self.assertEqual(result[1]["days_of_cover"], 2.0)
+
+    def test_rank_by_stock_out_per_product_threshold(self):
+        products = [(1, "Cafe", 10, 1), (2, "Te", 10, 20)]
+        sales = [(1, 0, 5), (2, 0, 5)]
+        result = app.rank_by_stock_out(products, sales, 1)
+        self.assertEqual([product["id"] for product in result], [2])
+
+    @patch("get_low_stock_products.app.connect_to_database")
+    def test_forecast_mode(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchall.side_effect = [[(1, "Cafe", 3, 7)], [(1, 0, 2)]]
+        event = {"queryStringParameters": {"mode": "forecast", "days": "1"}}
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertEqual(body["products"][0]["days_of_cover"], 1.5)
+        mock_connect.return_value.close.assert_called_once()
+
+    def test_forecast_mode_invalid_parameters(self):
+        event = {"queryStringParameters": {"mode": "forecast", "days": "abc"}}
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INVALID_PARAMETERS")
+
+
+    def test_forecast_mode_rejects_non_finite_days_of_cover(self):
+        for value in ("nan", "inf", "-inf"):
+            event = {"queryStringParameters": {"mode": "forecast", "days_of_cover": value}}
+            result = app.lambda_handler(event, None)
+            self.assertEqual(result["statusCode"], 400, value)
+            body = json.loads(result["body"])
+            self.assertEqual(body["message"], "INVALID_PARAMETERS")
+
+
+class TestReorderSuggestions(unittest.TestCase):
+    def setUp(self):
+        app.reorder_cache.clear()
+
+    def test_suggest_reorders_grouped_by_category(self):
+        products = [
+            (1, "Cafe", 5, 1, "Bebidas", 2),
+            (2, "Te", 500, 1, "Bebidas", 2),
+            (3, "Pastel", 0, 2, "Postres", 1),
+        ]
+        sales = [(1, day, 4) for day in range(7)] + [(3, day, 1 + day % 2) for day in range(7)]
+        result = app.suggest_reorders(products, sales, 7, 7, 0.95)
+        self.assertEqual([category["category_name"] for category in result], ["Bebidas", "Postres"])
+        cafe = result[0]["products"][0]
+        # Demanda constante: sin inventario de seguridad, 4 diarios x (2 + 7) días - 5 en stock
+        self.assertEqual(cafe["safety_stock"], 0)
+        self.assertEqual(cafe["order_quantity"], 31)
+        self.assertGreater(result[1]["products"][0]["safety_stock"], 0)
+
+    @patch("get_low_stock_products.app.connect_to_database")
+    def test_reorder_suggestions_cached_per_day(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = None
+        mock_cursor.fetchall.side_effect = [[(1, "Cafe", 0, 1, "Bebidas", 2)], [(1, 0, 3)]]
+        event = {"resource": "/reorder_suggestions", "queryStringParameters": None}
+
+        first = app.lambda_handler(event, None)
+        second = app.lambda_handler(event, None)
+        self.assertEqual(first["statusCode"], 200)
+        self.assertEqual(first["body"], second["body"])
+        body = json.loads(first["body"])
+        self.assertEqual(body["message"], "REORDER_SUGGESTIONS_FETCHED")
+        mock_connect.assert_called_once()
+        self.assertIn("INSERT INTO reorder_suggestions", mock_cursor.execute.call_args_list[3][0][0])
+
+    @patch("get_low_stock_products.app.connect_to_database")
+    def test_reorder_suggestions_from_stored_day(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = (json.dumps([{"category_id": 1}]),)
+        event = {"resource": "/reorder_suggestions"}
+
+        result = app.lambda_handler(event, None)
+        body = json.loads(result["body"])
+        self.assertEqual(body["categories"], [{"category_id": 1}])
+        mock_cursor.execute.assert_called_once()
+
+    def test_reorder_suggestions_invalid_service_level(self):
+        event = {"resource": "/reorder_suggestions", "queryStringParameters": {"service_level": "1.5"}}
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 400)
+
+    def test_reorder_suggestions_review_days_capped(self):
+        event = {"resource": "/reorder_suggestions", "queryStringParameters": {"review_days": "100000"}}
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INVALID_PARAMETERS")
+
+    @patch("get_low_stock_products.app.connect_to_database")
+    def test_reorder_suggestions_service_level_rounded(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = (json.dumps([]),)
+        event = {"resource": "/reorder_suggestions",
+                 "queryStringParameters": {"service_level": "0.9512345678901234567"}}
+
+        app.lambda_handler(event, None)
+        app.lambda_handler({**event, "queryStringParameters": {"service_level": "0.95"}}, None)
+        # Misma llave para ambos: la segunda sale del caché del contenedor
+        mock_cursor.execute.assert_called_once()
+        self.assertEqual(mock_cursor.execute.call_args[0][1][1], "28:7:0.95")
+
+    @patch("get_low_stock_products.app.connect_to_database")
+    def test_reorder_cache_is_bounded(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = (json.dumps([]),)
+        for history_days in range(1, app.MAX_CACHED_SUGGESTIONS + 10):
+            app.get_reorder_suggestions(history_days, 7, 0.95)
+        self.assertEqual(len(app.reorder_cache), app.MAX_CACHED_SUGGESTIONS)
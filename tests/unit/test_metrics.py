@@ -0,0 +1,89 @@
+import unittest
+import io
+import json
+from unittest.mock import patch
+
+from common import instrumentation, metrics
+from end_of_day_balance import app
+
+mock_date = {
+    "resource": "/end_of_day_balance",
+    "body": json.dumps({
+        "date": "2024-07-19"
+    })
+}
+
+
+def emitted(stdout):
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+class TestMetrics(unittest.TestCase):
+    def test_document_format(self):
+        metrics.start()
+        metrics.put_metric("Latency", 12.5, "Milliseconds")
+        metrics.count_cache(True)
+        metrics.count_cache(True)
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            metrics.flush("get_products", "/get_products")
+
+        [doc] = emitted(stdout)
+        directive = doc["_aws"]["CloudWatchMetrics"][0]
+        self.assertEqual(directive["Namespace"], metrics.NAMESPACE)
+        self.assertIn(["FunctionName", "Route"], directive["Dimensions"])
+        self.assertIn({"Name": "Latency", "Unit": "Milliseconds"}, directive["Metrics"])
+        self.assertEqual(doc["FunctionName"], "get_products")
+        self.assertEqual(doc["Route"], "/get_products")
+        self.assertEqual(doc["Latency"], 12.5)
+        self.assertEqual(doc["CacheHits"], [1, 1])
+
+    def test_metrics_outside_invocation_are_ignored(self):
+        metrics.current.metrics = None
+        metrics.put_metric("Latency", 1)
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            self.assertIsNone(metrics.flush("get_products", None))
+        self.assertEqual(stdout.getvalue(), "")
+
+    def test_values_are_capped(self):
+        metrics.start()
+        for _ in range(metrics.MAX_VALUES + 10):
+            metrics.put_metric("Queries", 1, "Count")
+        doc = metrics.document("f", None, metrics.current.metrics)
+        self.assertEqual(len(doc["Queries"]), metrics.MAX_VALUES)
+        self.assertEqual(doc["Route"], "direct")
+
+    def test_one_document_per_invocation(self):
+        handler = instrumentation.instrument("metrics_test")(lambda event, context: {"statusCode": 500})
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with self.assertLogs(level="INFO"):
+                handler({"resource": "/metrics_test"}, None)
+                handler({"resource": "/metrics_test"}, None)
+
+        docs = emitted(stdout)
+        self.assertEqual(len(docs), 2)
+        self.assertEqual([doc["ColdStart"] for doc in docs], [1, 0])
+        self.assertEqual(docs[0]["ServerErrors"], 1)
+        self.assertEqual(docs[0]["Route"], "/metrics_test")
+
+
+class TestHandlerMetrics(unittest.TestCase):
+    def setUp(self):
+        app.balance_cache.clear()
+
+    @patch("end_of_day_balance.app.connect_to_database")
+    def test_balance_cache_hits_and_round_trips(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchone.return_value = ("Cafe", 50, 100, 2, 0)
+
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            with self.assertLogs(level="INFO"):
+                app.lambda_handler(mock_date, None)
+                app.lambda_handler(mock_date, None)
+
+        miss, hit = emitted(stdout)
+        self.assertEqual(miss["FunctionName"], "end_of_day_balance")
+        self.assertEqual(miss["Route"], "/end_of_day_balance")
+        self.assertEqual(miss["CacheMisses"], 1)
+        self.assertEqual(hit["CacheHits"], 1)
+        self.assertEqual(hit["DbRoundTrips"], 0)
+        self.assertGreaterEqual(hit["Latency"], 0)
@@ -0,0 +1,69 @@
+import unittest
+import json
+from unittest.mock import patch
+
+from product_companions import app
+
+mock_success = {
+    "pathParameters": {
+        "id": "1"
+    },
+    "queryStringParameters": {
+        "limit": "2"
+    }
+}
+
+mock_invalid_id = {
+    "pathParameters": {
+        "id": "abc"
+    }
+}
+
+mock_invalid_limit = {
+    "pathParameters": {
+        "id": "1"
+    },
+    "queryStringParameters": {
+        "limit": "500"
+    }
+}
+
+class TestProductCompanions(unittest.TestCase):
+    @patch("product_companions.app.connect_to_database")
+    def test_product_companions(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = [(2, "Pan", 40), (3, "Jugo", 12)]
+
+        result = app.lambda_handler(mock_success, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertEqual(body["products"][0], {"id": 2, "name": "Pan", "sales_count": 40})
+        # Una sola lectura por índice
+        mock_cursor.execute.assert_called_once()
+        self.assertEqual(mock_cursor.execute.call_args[0][1], (1, 2))
+
+    def test_product_companions_missing_id(self):
+        result = app.lambda_handler({"pathParameters": {}}, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "MISSING_FIELDS")
+
+    def test_product_companions_invalid_id(self):
+        result = app.lambda_handler(mock_invalid_id, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INVALID_ID")
+
+    def test_product_companions_invalid_limit(self):
+        result = app.lambda_handler(mock_invalid_limit, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INVALID_LIMIT")
+
+    @patch("product_companions.app.connect_to_database")
+    def test_product_companions_internal_error(self, mock_connect_to_database):
+        mock_connect_to_database.side_effect = Exception("Error")
+        result = app.lambda_handler(mock_success, None)
+        self.assertEqual(result["statusCode"], 500)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INTERNAL_SERVER_ERROR")
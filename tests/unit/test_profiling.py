@@ -0,0 +1,106 @@
+import unittest
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from common import instrumentation, profiling
+
+admin = {
+    "headers": {"X-Profile": "1"},
+    "requestContext": {
+        "authorizer": {
+            "claims": {
+                "cognito:groups": "admin"
+            }
+        }
+    }
+}
+
+
+def allocate(event, context):
+    data = [str(i) * 10 for i in range(20000)]
+    return {"statusCode": 200, "body": str(len(data))}
+
+
+def profile_reports(logs):
+    entries = [json.loads(record.getMessage()) for record in logs.records]
+    return [entry for entry in entries if "profile" in entry]
+
+
+class TestShouldProfile(unittest.TestCase):
+    @patch.dict(os.environ, {"PROFILE": "0", "PROFILE_SAMPLE_RATE": "0"})
+    def test_off_by_default(self):
+        self.assertFalse(profiling.should_profile({}))
+
+    @patch.dict(os.environ, {"PROFILE": "1"})
+    def test_environment_variable(self):
+        self.assertTrue(profiling.should_profile({}))
+
+    @patch.dict(os.environ, {"PROFILE": "0", "PROFILE_SAMPLE_RATE": "0.25"})
+    def test_sample_rate(self):
+        with patch("common.profiling.random.random", return_value=0.1):
+            self.assertTrue(profiling.should_profile({}))
+        with patch("common.profiling.random.random", return_value=0.9):
+            self.assertFalse(profiling.should_profile({}))
+
+    @patch.dict(os.environ, {"PROFILE": "0", "PROFILE_SAMPLE_RATE": "0"})
+    def test_header_requires_admin(self):
+        self.assertTrue(profiling.should_profile(admin))
+        sales = {**admin, "requestContext": {"authorizer": {"claims": {"cognito:groups": "sales"}}}}
+        self.assertFalse(profiling.should_profile(sales))
+        # Sin claims ni token el header se ignora
+        self.assertFalse(profiling.should_profile({"headers": {"X-Profile": "1"}}))
+        # Un token sin verificar por API Gateway tampoco basta
+        self.assertFalse(profiling.should_profile({"headers": {"X-Profile": "1", "Authorization": "Bearer x"}}))
+
+    @patch.dict(os.environ, {"PROFILE": "0", "PROFILE_SAMPLE_RATE": "0"})
+    def test_header_does_not_need_pyjwt(self):
+        # Las funciones de lectura no empaquetan pyjwt
+        with patch.dict("sys.modules", {"jwt": None, "common.auth": None}):
+            self.assertTrue(profiling.should_profile(admin))
+
+
+class TestProfilingRun(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        patcher = patch.object(profiling, "PROFILE_DIR", self.directory.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch.dict(os.environ, {"PROFILE": "1", "PROFILE_TOP_N": "5", "PROFILE_BUCKET": ""})
+    def test_profiled_invocation_writes_files_and_logs_report(self):
+        handler = instrumentation.instrument("profiling_test")(allocate)
+        with self.assertLogs(level="INFO") as logs:
+            result = handler({}, None)
+
+        self.assertEqual(result["statusCode"], 200)
+        [report] = profile_reports(logs)
+        self.assertEqual(report["profile"], "profiling_test")
+        self.assertEqual(len(report["top_functions"]), 5)
+        self.assertTrue(any("allocate" in entry["function"] for entry in report["top_functions"]))
+        self.assertGreater(report["peak_traced_mb"], 0)
+        self.assertEqual(report["uploaded"], [])
+        # Sin bucket solo queda el reporte; /tmp no acumula archivos
+        self.assertEqual(len(report["files"]), 2)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    @patch.dict(os.environ, {"PROFILE": "1", "PROFILE_BUCKET": "cafe-balu"})
+    @patch("common.profiling.s3_client")
+    def test_uploads_to_bucket(self, s3_client):
+        handler = instrumentation.instrument("profiling_test")(allocate)
+        with self.assertLogs(level="INFO") as logs:
+            handler({}, None)
+
+        [report] = profile_reports(logs)
+        self.assertEqual(s3_client.upload_file.call_count, 2)
+        self.assertTrue(report["uploaded"][0].startswith("s3://cafe-balu/profiles/profiling_test/"))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    @patch.dict(os.environ, {"PROFILE": "0", "PROFILE_SAMPLE_RATE": "0"})
+    def test_not_profiled_without_trigger(self):
+        handler = instrumentation.instrument("profiling_test")(allocate)
+        with self.assertLogs(level="INFO") as logs:
+            handler({}, None)
+        self.assertEqual(profile_reports(logs), [])
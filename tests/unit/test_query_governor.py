@@ -0,0 +1,125 @@
+import unittest
+import json
+import os
+from datetime import date
+from unittest.mock import patch, Mock
+
+import pymysql
+
+from common import query_governor, sqlite_backend
+from tests.unit.fake_db import FakeDatabase
+
+
+def timeout():
+    return pymysql.err.OperationalError(query_governor.QUERY_TIMEOUT, "maximum statement execution time exceeded")
+
+
+def connection_with(cursor):
+    connection = Mock()
+    connection.cursor.return_value = cursor
+    return connection
+
+
+class TestQueryGovernor(unittest.TestCase):
+    def setUp(self):
+        query_governor.reports.clear()
+        self.addCleanup(query_governor.reports.clear)
+
+    def test_route_classes(self):
+        self.assertEqual(query_governor.route_class("end_of_day_balance"), query_governor.ANALYTICS)
+        self.assertEqual(query_governor.route_class("cancel_sales"), query_governor.OLTP)
+        self.assertIsNone(query_governor.limit_ms("get_products"))
+
+    def test_hint_goes_on_the_outer_select(self):
+        query = "WITH d AS (SELECT 1 AS x) SELECT COALESCE((SELECT 'a (b' FROM d), 0)"
+        self.assertEqual(query_governor.with_limit(query, 500),
+                         "WITH d AS (SELECT 1 AS x) SELECT /*+ MAX_EXECUTION_TIME(500) */ COALESCE((SELECT 'a (b' FROM d), 0)")
+        self.assertEqual(query_governor.with_limit("\n  select * from sales", 500),
+                         "\n  select /*+ MAX_EXECUTION_TIME(500) */ * from sales")
+        # Escrituras y sentencias que ya traen el hint no se tocan
+        self.assertEqual(query_governor.with_limit("UPDATE sales SET status = 0", 500), "UPDATE sales SET status = 0")
+        hinted = "SELECT /*+ MAX_EXECUTION_TIME(10) */ 1"
+        self.assertEqual(query_governor.with_limit(hinted, 500), hinted)
+
+    def test_only_analytics_statements_get_the_hint(self):
+        from end_of_day_balance import app as balance_app
+        from cancel_sales import app as cancel_app
+
+        database = FakeDatabase([(r"FROM sales WHERE id", [(1,)]), (r".", [("Latte", 10, 100, 10, 0)])])
+        with database.installed():
+            balance_app.lambda_handler({"body": json.dumps({"date": date.today().isoformat()})}, None)
+            analytics = list(database.statements)
+            cancel_app.lambda_handler({
+                "pathParameters": {"id": "1"},
+                "requestContext": {"authorizer": {"claims": {"cognito:groups": "admin"}}}
+            }, None)
+        self.assertTrue(analytics)
+        self.assertTrue(all("MAX_EXECUTION_TIME(%d)" % query_governor.ANALYTICS_MAX_EXECUTION_MS in statement
+                            for statement in analytics))
+        self.assertFalse(any("MAX_EXECUTION_TIME" in statement for statement in database.statements[len(analytics):]))
+
+    @patch.dict(os.environ, {"DB_SQLITE_SEED": ""})
+    def test_sqlite_backend_enforces_the_hint(self):
+        path = "file:governor?mode=memory&cache=shared"
+        self.addCleanup(sqlite_backend.reset, path)
+        connection = sqlite_backend.connect(path)
+        self.addCleanup(connection.close)
+        query = query_governor.with_limit(
+            "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000) SELECT COUNT(*) FROM n", 20)
+        with self.assertRaises(pymysql.err.OperationalError) as raised:
+            connection.cursor().execute(query)
+        self.assertTrue(query_governor.is_timeout(raised.exception))
+        # El límite no queda puesto para la siguiente sentencia
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        self.assertEqual(cursor.fetchone(), (1,))
+
+    @patch("top_sold_products.app.db.connect")
+    def test_top_sold_timeout_serves_last_report(self, mock_connect):
+        from top_sold_products import app
+
+        cursor = Mock()
+        cursor.fetchall.return_value = [("Latte", "Bebidas", 10)]
+        cursor.description = (("product_name",), ("category_name",), ("total_quantity_sold",))
+        mock_connect.return_value = connection_with(cursor)
+        self.assertEqual(app.lambda_handler({"body": "{}"}, None)["statusCode"], 200)
+
+        cursor.execute.side_effect = timeout()
+        result = app.lambda_handler({"body": "{}"}, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertTrue(body["stale"])
+        self.assertEqual(body["product"][0]["product_name"], "Latte")
+
+        # Otro reporte sin resultado previo: 503 para reintentar más tarde
+        result = app.lambda_handler({"body": json.dumps({"limit": 3})}, None)
+        self.assertEqual(result["statusCode"], 503)
+        self.assertEqual(json.loads(result["body"])["message"], "REPORT_TIMEOUT")
+        self.assertIn("Retry-After", result["headers"])
+
+    @patch("sales_heatmap.app.db.connect")
+    def test_heatmap_timeout_serves_last_map_not_rollup(self, mock_connect):
+        from sales_heatmap import app
+
+        cursor = Mock()
+        cursor.fetchall.return_value = [(0, 8, 3, 90)]
+        mock_connect.return_value = connection_with(cursor)
+        event = {"queryStringParameters": {"start": "2024-01-01", "end": "2024-12-31"}}
+        self.assertEqual(app.lambda_handler(event, None)["statusCode"], 200)
+
+        cursor.execute.side_effect = timeout()
+        result = app.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertEqual(body["source"], "sales")
+        self.assertTrue(body["stale"])
+        self.assertIn("age_seconds", body)
+        self.assertEqual(body["count"][0][8], 3)
+
+        # Sin mapa previo no se cae a sales_hourly, que puede estar desactualizado
+        cursor.execute.reset_mock()
+        result = app.lambda_handler({"queryStringParameters": {"start": "2024-01-01", "end": "2024-06-30"}}, None)
+        self.assertEqual(result["statusCode"], 503)
+        self.assertEqual(json.loads(result["body"])["message"], "REPORT_TIMEOUT")
+        self.assertEqual(cursor.execute.call_count, 1)
+        self.assertNotIn("sales_hourly", cursor.execute.call_args[0][0])
@@ -0,0 +1,118 @@
+import unittest
+import json
+import os
+from datetime import datetime, timedelta
+from importlib import import_module
+from itertools import count
+from unittest.mock import patch
+
+import pymysql
+
+from common import db, sqlite_backend
+
+databases = count()
+
+
+class TestReadReplicas(unittest.TestCase):
+    """Primario y réplica como dos bases SQLite en memoria."""
+
+    def setUp(self):
+        n = next(databases)
+        self.primary = "file:primary_%d?mode=memory&cache=shared" % n
+        self.replica = "file:replica_%d?mode=memory&cache=shared" % n
+        patcher = patch.dict(os.environ, {"DB_BACKEND": "sqlite", "DB_SQLITE_PATH": self.primary, "DB_SQLITE_SEED": ""})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        for path in (self.primary, self.replica):
+            self.addCleanup(sqlite_backend.reset, path)
+        db.replica_state.clear()
+        self.addCleanup(db.replica_state.clear)
+
+        self.execute(self.primary, "INSERT INTO categories (id, name, status) VALUES (1, 'En primario', 1)")
+        self.execute(self.replica, "INSERT INTO categories (id, name, status) VALUES (1, 'En réplica', 1)")
+
+    def execute(self, path, sql, args=None):
+        connection = db.connect(host=path)
+        try:
+            cursor = connection.cursor()
+            cursor.execute(sql, args)
+            connection.commit()
+            return cursor.fetchall()
+        finally:
+            connection.close()
+
+    def beat(self, seconds_ago=0):
+        # El último latido que llegó a la réplica
+        self.execute(self.replica, """
+            INSERT INTO replication_heartbeat (id, beat) VALUES (1, %s)
+            ON DUPLICATE KEY UPDATE beat = VALUES(beat)
+        """, (datetime.now().replace(microsecond=0) - timedelta(seconds=seconds_ago),))
+
+    def served_by(self, replicas):
+        connection = db.connect_read(replicas)
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT name FROM categories WHERE id = 1")
+            return cursor.fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_replica_hosts_from_secret(self):
+        self.assertEqual(db.replica_hosts({"replica_hosts": "a.rds, b.rds,"}), ["a.rds", "b.rds"])
+        self.assertEqual(db.replica_hosts({"replica_hosts": ["a.rds"]}), ["a.rds"])
+        self.assertEqual(db.replica_hosts({"host": "primary.rds"}), [])
+
+    def test_without_replicas_reads_primary(self):
+        self.assertEqual(self.served_by([]), "En primario")
+
+    def test_fresh_replica_serves_reads(self):
+        self.beat()
+        self.assertEqual(self.served_by([self.replica]), "En réplica")
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.beat(seconds_ago=60)
+        self.assertEqual(self.served_by([self.replica]), "En primario")
+        self.assertFalse(db.replica_state[self.replica][1])
+        self.assertGreaterEqual(db.replica_state[self.replica][2], 59)
+
+        # Mientras el resultado siga vigente no se vuelve a medir
+        self.beat()
+        self.assertEqual(self.served_by([self.replica]), "En primario")
+        with patch.object(db, "REPLICA_CHECK_SECONDS", 0):
+            db.replica_state.clear()
+            self.assertEqual(self.served_by([self.replica]), "En réplica")
+
+    def test_replica_without_heartbeat_is_not_trusted(self):
+        self.assertEqual(self.served_by([self.replica]), "En primario")
+
+    def test_unreachable_replica_falls_back_to_primary(self):
+        connect = db.connect
+
+        def fail_for_replica(host=None, **kwargs):
+            if host == "replica.rds":
+                raise pymysql.err.OperationalError(2003, "Can't connect")
+            return connect(host=host, **kwargs)
+
+        with patch.object(db, "connect", side_effect=fail_for_replica) as mock_connect:
+            self.assertEqual(self.served_by(["replica.rds"]), "En primario")
+            self.assertEqual(self.served_by(["replica.rds"]), "En primario")
+        # La segunda lectura ya no intenta la réplica caída
+        self.assertEqual([call.kwargs.get("host") for call in mock_connect.call_args_list],
+                         ["replica.rds", None, None])
+
+    def test_read_only_handler_uses_replica_and_writes_stay_on_primary(self):
+        self.beat()
+        get_category = import_module("get_category.app")
+        end_of_day_balance = import_module("end_of_day_balance.app")
+        end_of_day_balance.balance_cache.clear()
+
+        with patch.object(get_category, "rds_replicas", [self.replica]):
+            body = json.loads(get_category.lambda_handler({"pathParameters": {"status": "1"}}, None)["body"])
+        self.assertEqual([category["name"] for category in body["categories"]], ["En réplica"])
+
+        with patch.object(end_of_day_balance, "rds_replicas", [self.replica]):
+            result = end_of_day_balance.lambda_handler({"body": json.dumps({"date": "2024-07-19"})}, None)
+        self.assertEqual(result["statusCode"], 200)
+        # El snapshot del día cerrado se escribe en el primario
+        self.assertEqual(len(self.execute(self.primary, "SELECT day FROM daily_balance")), 1)
+        self.assertEqual(self.execute(self.replica, "SELECT day FROM daily_balance"), [])
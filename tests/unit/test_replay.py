@@ -0,0 +1,61 @@
+import unittest
+from datetime import date
+
+from benchmarks import replay
+from tests.unit.fake_db import FakeDatabase
+
+
+class TestReplay(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.routes = replay.load_routes()
+
+    def test_routes_only_for_handlers_in_repo(self):
+        names = {route.name for route in self.routes}
+        self.assertIn("GET /get_products/{status}", names)
+        self.assertIn("GET /reorder_suggestions", names)
+        # save_sale está en template.yaml pero su código no vive en este repositorio
+        self.assertNotIn("POST /save_sale", names)
+
+    def test_match_by_path_fills_path_parameters(self):
+        route, parameters = replay.match(self.routes, {"httpMethod": "PATCH", "path": "/cancel_sale/42"})
+        self.assertEqual(route.module, "cancel_sales")
+        self.assertEqual(parameters, {"id": "42"})
+        self.assertEqual(replay.match(self.routes, {"httpMethod": "DELETE", "path": "/cancel_sale/42"}), (None, None))
+
+    def test_rush_schedule_is_deterministic_and_peaks_mid_run(self):
+        arguments = (50, 60, replay.RUSH_MIX, 7, date(2024, 7, 19), date(2024, 7, 19), 1000, 60)
+        schedule = replay.rush_schedule(*arguments)
+        self.assertEqual([offset for offset, _, _ in schedule], [offset for offset, _, _ in replay.rush_schedule(*arguments)])
+        edges = sum(1 for offset, _, _ in schedule if offset < 10 or offset >= 50)
+        middle = sum(1 for offset, _, _ in schedule if 20 <= offset < 40)
+        self.assertGreater(middle, edges)
+        self.assertTrue(all(replay.match(self.routes, event)[0] for _, _, event in schedule))
+
+    def test_replay_keeps_captured_spacing(self):
+        events = [{"requestContext": {"requestTimeEpoch": epoch}} for epoch in (5000, 1000, 3000)]
+        self.assertEqual([offset for offset, _, _ in replay.replay_schedule(events, speed=2)], [0, 1, 2])
+        self.assertEqual([offset for offset, _, _ in replay.replay_schedule(events, rate=4)], [0, 0.25, 0.5])
+
+    def test_round_trips_from_server_timing(self):
+        self.assertEqual(replay.round_trips('connect;dur=1.0, db;desc="3 round trips", total;dur=4.0'), 3)
+        self.assertIsNone(replay.round_trips(""))
+
+    def test_report_percentiles_and_errors(self):
+        results = [("GET /x", "catalog", 200, float(ms), 1.0, 2) for ms in range(1, 101)]
+        results.append(("GET /x", "catalog", 500, 1.0, 1.0, None))
+        summary = replay.report(results, 10.0, 0.0, 1)
+        route = summary["routes"]["GET /x"]
+        self.assertEqual((route["p50_ms"], route["p95_ms"], route["p99_ms"]), (50.0, 95.0, 99.0))
+        self.assertEqual(route["errors"], 1)
+        self.assertEqual(route["db_round_trips_mean"], 2.0)
+        self.assertEqual(summary["unrouted"], 1)
+
+    def test_drive_in_process(self):
+        event = replay.api_event("GET", "/get_categories/1", resource="/get_categories/{status}",
+                                 path_parameters={"status": "1"})
+        dispatch = [(i * 0.001, "catalog", "GET /get_categories/{status}", ("get_category", event)) for i in range(5)]
+        with FakeDatabase([(r".", [(1, "Bebidas", 1)])]).installed():
+            results, _, _ = replay.drive(dispatch, replay.invoke, workers=2)
+        self.assertEqual([result[2] for result in results], [200] * 5)
+        self.assertEqual({result[0] for result in results}, {"GET /get_categories/{status}"})
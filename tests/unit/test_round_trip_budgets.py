@@ -0,0 +1,154 @@
+import unittest
+import json
+from datetime import datetime
+
+from tests.unit.fake_db import FakeDatabase
+from cancel_sales import app as cancel_sales
+from end_of_day_balance import app as end_of_day_balance
+from get_category import app as get_category
+from get_low_stock_products import app as get_low_stock_products
+from get_products import app as get_products
+from product_companions import app as product_companions
+from sales_heatmap import app as sales_heatmap
+from save_category import app as save_category
+from top_sold_products import app as top_sold_products
+from update_category import app as update_category
+
+admin = {
+    "authorizer": {
+        "claims": {
+            "cognito:groups": "admin"
+        }
+    }
+}
+
+# Viajes a la base de datos permitidos por ruta en el camino exitoso: una
+# conexión por petición y solo las sentencias que la ruta necesita. Si un
+# cambio agrega una conexión, una consulta o un commit, este archivo falla y
+# se corrige la ruta, no el presupuesto. executemany cuenta una sentencia por
+# fila salvo INSERT ... VALUES, que pymysql agrupa en una.
+BUDGETS = {
+    "cancel_sale": {"connects": 1, "statements": 5, "commits": 1},
+    "end_of_day_balance:today": {"connects": 1, "statements": 1, "commits": 0},
+    "end_of_day_balance:closed_day": {"connects": 1, "statements": 1, "commits": 0},
+    "end_of_day_balance:closed_day_first_request": {"connects": 1, "statements": 3, "commits": 1},
+    "get_category": {"connects": 1, "statements": 1, "commits": 0},
+    "get_products": {"connects": 1, "statements": 1, "commits": 0},
+    "get_low_stock_products": {"connects": 1, "statements": 1, "commits": 0},
+    "get_low_stock_products:forecast": {"connects": 1, "statements": 2, "commits": 0},
+    "reorder_suggestions": {"connects": 1, "statements": 4, "commits": 1},
+    "product_companions": {"connects": 1, "statements": 1, "commits": 0},
+    "sales_heatmap": {"connects": 1, "statements": 1, "commits": 0},
+    "save_category": {"connects": 1, "statements": 2, "commits": 1},
+    "top_sold_products": {"connects": 1, "statements": 1, "commits": 0},
+    "top_sold_products:category": {"connects": 1, "statements": 2, "commits": 0},
+    "top_sold_products:per_category": {"connects": 1, "statements": 1, "commits": 0},
+    "update_category": {"connects": 1, "statements": 3, "commits": 1},
+}
+
+balance_row = [("Cafe", 50, 100, 2, 0)]
+
+
+class TestRoundTripBudgets(unittest.TestCase):
+    def run_route(self, route, module, event, results=()):
+        database = FakeDatabase(results)
+        with database.installed():
+            result = module.lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 200, result["body"])
+
+        counts = database.counts()
+        budget = BUDGETS[route]
+        for name, limit in budget.items():
+            self.assertLessEqual(
+                counts[name], limit,
+                "%s: %d %s, budget %d\n%s" % (route, counts[name], name, limit, "\n".join(database.statements))
+            )
+        return counts
+
+    def test_executemany_counts_a_statement_per_row(self):
+        database = FakeDatabase()
+        cursor = database.connect().cursor()
+        cursor.executemany("INSERT INTO t (a, b) VALUES (%s, %s)", [(1, 2), (3, 4), (5, 6)])
+        self.assertEqual(database.counts()["statements"], 1)
+        cursor.executemany("UPDATE t SET a = a - 1 WHERE b = %s", [(1,), (2,), (3,)])
+        self.assertEqual(database.counts()["statements"], 4)
+
+    def test_cancel_sale(self):
+        self.run_route("cancel_sale", cancel_sales, {
+            "pathParameters": {"id": "1"},
+            "requestContext": admin
+        }, [(r"COUNT\(\*\) FROM sales", [(1,)]), (r"FROM sales_products", [(1,), (2,)])])
+
+    def test_end_of_day_balance_today(self):
+        end_of_day_balance.balance_cache.clear()
+        today = datetime.now().strftime("%Y-%m-%d")
+        self.run_route("end_of_day_balance:today", end_of_day_balance,
+                       {"body": json.dumps({"date": today})}, [(r".", balance_row)])
+
+    def test_end_of_day_balance_closed_day(self):
+        end_of_day_balance.balance_cache.clear()
+        self.run_route("end_of_day_balance:closed_day", end_of_day_balance,
+                       {"body": json.dumps({"date": "2024-07-19"})}, [(r".", balance_row)])
+
+    def test_end_of_day_balance_closed_day_first_request(self):
+        end_of_day_balance.balance_cache.clear()
+        self.run_route("end_of_day_balance:closed_day_first_request", end_of_day_balance,
+                       {"body": json.dumps({"date": "2024-07-19"})},
+                       [(r"FROM daily_balance", []), (r".", balance_row)])
+
+    def test_end_of_day_balance_cached_day_skips_database(self):
+        end_of_day_balance.balance_cache.clear()
+        event = {"body": json.dumps({"date": "2024-07-19"})}
+        self.run_route("end_of_day_balance:closed_day", end_of_day_balance, event, [(r".", balance_row)])
+        counts = self.run_route("end_of_day_balance:closed_day", end_of_day_balance, event)
+        self.assertEqual(counts["connects"], 0)
+
+    def test_get_category(self):
+        self.run_route("get_category", get_category, {"pathParameters": {"status": "1"}},
+                       [(r".", [(1, "Bebidas", 1)])])
+
+    def test_get_products(self):
+        self.run_route("get_products", get_products, {"pathParameters": {"status": "1"}},
+                       [(r".", [(1, "Cafe", 1)])])
+
+    def test_get_low_stock_products(self):
+        self.run_route("get_low_stock_products", get_low_stock_products, {})
+
+    def test_get_low_stock_products_forecast(self):
+        self.run_route("get_low_stock_products:forecast", get_low_stock_products,
+                       {"queryStringParameters": {"mode": "forecast"}})
+
+    def test_reorder_suggestions(self):
+        get_low_stock_products.reorder_cache.clear()
+        self.run_route("reorder_suggestions", get_low_stock_products, {"resource": "/reorder_suggestions"})
+
+    def test_product_companions(self):
+        self.run_route("product_companions", product_companions, {"pathParameters": {"id": "1"}},
+                       [(r".", [(2, "Pan", 10)])])
+
+    def test_sales_heatmap(self):
+        self.run_route("sales_heatmap", sales_heatmap,
+                       {"queryStringParameters": {"start": "2024-07-01", "end": "2024-07-31"}})
+
+    def test_save_category(self):
+        self.run_route("save_category", save_category, {
+            "body": json.dumps({"name": "Postres"}),
+            "requestContext": admin
+        }, [(r"COUNT\(\*\)", [(0,)])])
+
+    def test_top_sold_products(self):
+        self.run_route("top_sold_products", top_sold_products, {"body": json.dumps({})})
+
+    def test_top_sold_products_category(self):
+        self.run_route("top_sold_products:category", top_sold_products, {"body": json.dumps({"category": 1})},
+                       [(r"from categories where id", [(1,)])])
+
+    def test_top_sold_products_per_category(self):
+        self.run_route("top_sold_products:per_category", top_sold_products,
+                       {"body": json.dumps({"per_category": True})})
+
+    def test_update_category(self):
+        self.run_route("update_category", update_category, {
+            "body": json.dumps({"id": 1, "name": "Postres"}),
+            "requestContext": admin
+        }, [(r"WHERE id = ", [(1, "Bebidas", 1)])])
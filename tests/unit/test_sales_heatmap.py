@@ -0,0 +1,75 @@
+import unittest
+import json
+from decimal import Decimal
+from unittest.mock import patch
+
+from sales_heatmap import app
+
+mock_range = {
+    "queryStringParameters": {
+        "start": "2024-07-01",
+        "end": "2024-07-31"
+    }
+}
+
+mock_rollup = {
+    "queryStringParameters": {
+        "start": "2024-07-01",
+        "end": "2024-07-31",
+        "source": "rollup"
+    }
+}
+
+mock_invalid_range = {
+    "queryStringParameters": {
+        "start": "2024-07-31",
+        "end": "2024-07-01"
+    }
+}
+
+class TestSalesHeatmap(unittest.TestCase):
+    @patch("sales_heatmap.app.connect_to_database")
+    def test_sales_heatmap(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = [(0, 8, 12, Decimal("340.50")), (6, 23, 1, Decimal("20"))]
+
+        result = app.lambda_handler(mock_range, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertEqual(len(body["count"]), 7)
+        self.assertEqual(len(body["count"][0]), 24)
+        self.assertEqual(body["count"][0][8], 12)
+        self.assertEqual(body["revenue"][6][23], 20.0)
+        query, params = mock_cursor.execute.call_args[0]
+        self.assertIn("FROM sales", query)
+        # El rango incluye el último día completo
+        self.assertEqual(params[1], app.datetime(2024, 8, 1))
+
+    @patch("sales_heatmap.app.connect_to_database")
+    def test_sales_heatmap_rollup(self, mock_connect_to_database):
+        mock_cursor = mock_connect_to_database.return_value.cursor.return_value
+        mock_cursor.fetchall.return_value = []
+
+        result = app.lambda_handler(mock_rollup, None)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertIn("FROM sales_hourly", mock_cursor.execute.call_args[0][0])
+
+    def test_sales_heatmap_missing_fields(self):
+        result = app.lambda_handler({"queryStringParameters": None}, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "MISSING_FIELDS")
+
+    def test_sales_heatmap_invalid_range(self):
+        result = app.lambda_handler(mock_invalid_range, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INVALID_DATE_RANGE")
+
+    @patch("sales_heatmap.app.connect_to_database")
+    def test_sales_heatmap_internal_error(self, mock_connect_to_database):
+        mock_connect_to_database.side_effect = Exception("Error")
+        result = app.lambda_handler(mock_range, None)
+        self.assertEqual(result["statusCode"], 500)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INTERNAL_SERVER_ERROR")
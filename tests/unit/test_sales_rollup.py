@@ -0,0 +1,23 @@
+import unittest
+from unittest.mock import Mock
+
+from common import sales_rollup
+
+
+class TestSalesRollup(unittest.TestCase):
+    def test_refresh_range_replaces_hours(self):
+        cursor = Mock()
+        sales_rollup.refresh_range(cursor, "2024-07-01", "2024-07-02")
+        delete, insert = [call[0] for call in cursor.execute.call_args_list]
+        self.assertIn("DELETE FROM sales_hourly", delete[0])
+        self.assertIn("INSERT INTO sales_hourly", insert[0])
+        # El formato de fecha va escapado para pymysql
+        self.assertIn("%%Y-%%m-%%d %%H:00:00", insert[0])
+        self.assertEqual(insert[1], ("2024-07-01", "2024-07-02"))
+
+    def test_refresh_sale_hour(self):
+        cursor = Mock()
+        sales_rollup.refresh_sale_hour(cursor, 7)
+        query, params = cursor.execute.call_args[0]
+        self.assertIn("ON DUPLICATE KEY UPDATE", query)
+        self.assertEqual(params, (7,))
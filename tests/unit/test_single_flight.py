@@ -0,0 +1,87 @@
+import unittest
+import json
+import threading
+import time
+from unittest.mock import patch
+
+from common import single_flight
+from tests.unit.fake_db import FakeDatabase
+
+TABLETS = 20
+
+
+def burst(handler, events):
+    # Todos los hilos llaman al handler al mismo tiempo
+    barrier = threading.Barrier(len(events))
+    responses = [None] * len(events)
+
+    def call(i):
+        barrier.wait()
+        responses[i] = handler(events[i], None)
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(events))]
+    for thread in threads:
+        thread.start()
+    return threads, responses
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(single_flight.stats.update, single_flight.snapshot())
+        single_flight.stats.update(leaders=0, followers=0, queries_saved=0)
+
+    def test_request_key_is_normalized(self):
+        first = {"httpMethod": "POST", "resource": "/get_top_sold_products", "body": '{"limit": 5, "category": 1}'}
+        second = {"httpMethod": "POST", "resource": "/get_top_sold_products", "body": '{"category":1,"limit":5}'}
+        self.assertEqual(single_flight.request_key("top", first), single_flight.request_key("top", second))
+        self.assertNotEqual(single_flight.request_key("top", first),
+                            single_flight.request_key("top", {**second, "body": '{"category": 2, "limit": 5}'}))
+        self.assertNotEqual(single_flight.request_key("top", first), single_flight.request_key("other", first))
+
+    def test_identical_tablet_polls_share_one_query(self):
+        from get_products import app
+
+        release = threading.Event()
+        database = FakeDatabase([(r".", [(1, "Latte", 45, 10, 1, 1)])])
+        connect = database.connect
+
+        def slow_connect(*args, **kwargs):
+            release.wait(5)
+            return connect(*args, **kwargs)
+
+        event = {"httpMethod": "GET", "resource": "/get_products/{status}", "pathParameters": {"status": "1"}}
+        with patch.object(database, "connect", slow_connect), database.installed():
+            threads, responses = burst(app.lambda_handler, [event] * TABLETS)
+            # Deja que los demás hilos lleguen a esperar al primero
+            time.sleep(0.2)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+
+        self.assertEqual(database.connects, 1)
+        self.assertEqual({response["statusCode"] for response in responses}, {200})
+        self.assertEqual(len({response["body"] for response in responses}), 1)
+        self.assertEqual(json.loads(responses[0]["body"])["products"][0]["col1"], "Latte")
+        stats = single_flight.snapshot()
+        self.assertEqual((stats["leaders"], stats["followers"]), (1, TABLETS - 1))
+        self.assertEqual(stats["queries_saved"], len(database.statements) * (TABLETS - 1))
+
+    def test_server_errors_are_not_shared(self):
+        release = threading.Event()
+        calls = []
+
+        @single_flight.coalesce("flaky")
+        def handler(event, context):
+            calls.append(event)
+            if len(calls) == 1:
+                release.wait(5)
+                return {"statusCode": 503, "body": "{}"}
+            return {"statusCode": 200, "body": "{}"}
+
+        threads, responses = burst(handler, [{"path": "/x"}] * 3)
+        time.sleep(0.2)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sorted(response["statusCode"] for response in responses), [200, 200, 503])
+        self.assertEqual(single_flight.in_flight, {})
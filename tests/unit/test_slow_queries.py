@@ -0,0 +1,79 @@
+import unittest
+import json
+from unittest.mock import patch, Mock
+
+from common import instrumentation, slow_queries
+
+
+def explain_cursor():
+    cursor = Mock()
+    explain = cursor.connection.cursor.return_value
+    explain.description = (("table",), ("type",), ("rows",))
+    explain.fetchall.return_value = [("categories", "ALL", 12000)]
+    return cursor, explain
+
+
+class TestSlowQueries(unittest.TestCase):
+    def setUp(self):
+        slow_queries.stats.clear()
+        slow_queries.explained.clear()
+
+    def test_fingerprint_normalizes_literals_and_parameters(self):
+        first = slow_queries.fingerprint("SELECT * FROM categories WHERE lower(name) = %s AND id != 3")
+        second = slow_queries.fingerprint("""
+            select *  from categories
+            where LOWER(name) = 'Bebidas' and id != 17 -- duplicado
+        """)
+        self.assertEqual(first, second)
+        self.assertEqual(first, "select * from categories where lower(name) = ? and id != ?")
+
+    def test_fingerprint_collapses_value_lists(self):
+        self.assertEqual(
+            slow_queries.fingerprint("SELECT name FROM products WHERE id IN (%s, %s, %s)"),
+            slow_queries.fingerprint("SELECT name FROM products WHERE id IN (1)")
+        )
+
+    def test_stats_accumulate_per_fingerprint(self):
+        cursor = Mock()
+        slow_queries.record(cursor, "SELECT * FROM sales WHERE id = %s", (1,), 2.0)
+        slow_queries.record(cursor, "SELECT * FROM sales WHERE id = %s", (2,), 4.0)
+        [entry] = slow_queries.top()
+        self.assertEqual(entry["count"], 2)
+        self.assertEqual(entry["total_ms"], 6.0)
+        self.assertEqual(entry["max_ms"], 4.0)
+        cursor.connection.cursor.assert_not_called()
+
+    @patch.object(slow_queries, "SLOW_QUERY_MS", 10)
+    def test_explain_runs_once_per_fingerprint(self):
+        cursor, explain = explain_cursor()
+        query = "SELECT * FROM categories WHERE lower(name) = %s"
+
+        with self.assertLogs(level="WARNING") as logs:
+            slow_queries.record(cursor, query, ("bebidas",), 50.0)
+            slow_queries.record(cursor, query, ("postres",), 60.0)
+
+        explain.execute.assert_called_once_with("EXPLAIN " + query, ("bebidas",))
+        first, second = [json.loads(record.getMessage()) for record in logs.records]
+        self.assertEqual(first["explain"], [{"table": "categories", "type": "ALL", "rows": 12000}])
+        self.assertNotIn("explain", second)
+        self.assertEqual(second["count"], 2)
+
+    @patch.object(slow_queries, "SLOW_QUERY_MS", 10)
+    def test_explain_failure_does_not_raise(self):
+        cursor, explain = explain_cursor()
+        explain.execute.side_effect = Exception("EXPLAIN not supported")
+        with self.assertLogs(level="WARNING") as logs:
+            slow_queries.record(cursor, "SELECT 1", None, 50.0)
+        self.assertEqual(json.loads(logs.records[0].getMessage())["explain"], {"error": "EXPLAIN not supported"})
+
+    @patch.object(slow_queries, "SLOW_QUERY_MS", 0)
+    def test_timed_cursor_records_queries(self):
+        cursor, explain = explain_cursor()
+        timed = instrumentation.TimedCursor(cursor)
+        with self.assertLogs(level="WARNING"):
+            timed.execute("SELECT COUNT(*) FROM sales WHERE id = %s", (1,))
+            timed.executemany("UPDATE product_pairs SET sales_count = 0 WHERE product_id = %s", [(1,), (2,)])
+
+        self.assertEqual(len(slow_queries.stats), 2)
+        # EXPLAIN solo para execute; executemany no tiene un solo juego de parámetros
+        explain.execute.assert_called_once()
@@ -0,0 +1,171 @@
+import unittest
+import json
+import os
+from importlib import import_module
+from itertools import count
+from unittest.mock import patch
+
+from common import db, sqlite_backend
+
+SEED = os.path.join(sqlite_backend.SCHEMA_DIR, "seed", "demo.sql")
+databases = count()
+
+admin = {
+    "authorizer": {
+        "claims": {
+            "cognito:groups": "admin"
+        }
+    }
+}
+
+
+class TestTranslate(unittest.TestCase):
+    def test_placeholders_and_escaped_percent(self):
+        self.assertEqual(
+            sqlite_backend.translate("SELECT DATE_FORMAT(createdAt, '%%Y-%%m-%%d') FROM sales WHERE id = %s"),
+            "SELECT strftime('%Y-%m-%d', createdAt) FROM sales WHERE id = ?"
+        )
+
+    def test_without_arguments_percent_is_left_alone(self):
+        self.assertEqual(sqlite_backend.translate("SELECT 1 WHERE 'a' LIKE '%x'", None), "SELECT 1 WHERE 'a' LIKE '%x'")
+
+    def test_weekday_hour_and_datediff(self):
+        sql = sqlite_backend.translate("SELECT WEEKDAY(hour), HOUR(hour), DATEDIFF(%s, DATE(createdAt)) FROM t")
+        self.assertIn("((CAST(strftime('%w', hour) AS INTEGER) + 6) % 7)", sql)
+        self.assertIn("CAST(strftime('%H', hour) AS INTEGER)", sql)
+        self.assertIn("julianday(date(?)) - julianday(date(DATE(createdAt)))", sql)
+
+    def test_upsert_and_locking(self):
+        sql = sqlite_backend.translate(
+            "INSERT INTO reorder_suggestions (params, data) VALUES (%s, %s) ON DUPLICATE KEY UPDATE data = VALUES(data)"
+        )
+        self.assertTrue(sql.endswith("ON CONFLICT DO UPDATE SET data = excluded.data"))
+        self.assertNotIn("FOR UPDATE", sqlite_backend.translate("SELECT data FROM reorder_suggestions FOR UPDATE"))
+
+    def test_insert_select_upsert_gets_where(self):
+        sql = sqlite_backend.translate("""
+            INSERT INTO sales_hourly (hour, sales_count)
+            SELECT h.hour, COUNT(s.id) FROM (SELECT hour FROM x WHERE id = %s) h
+            LEFT JOIN sales s ON s.createdAt < h.hour + INTERVAL 1 HOUR
+            GROUP BY h.hour
+            ON DUPLICATE KEY UPDATE sales_count = VALUES(sales_count)
+        """)
+        self.assertIn("WHERE true GROUP BY h.hour", sql)
+        self.assertIn("datetime(h.hour, '+1 hours')", sql)
+
+    def test_update_join_becomes_update_from(self):
+        sql = sqlite_backend.translate("""
+            UPDATE product_pairs pp
+            JOIN (SELECT a.product_id FROM sales_products a WHERE a.sale_id = %s) x ON x.product_id = pp.product_id
+            SET pp.sales_count = pp.sales_count - 1
+            WHERE pp.sales_count > 0
+        """)
+        self.assertEqual(" ".join(sql.split()),
+                         "UPDATE product_pairs AS pp SET sales_count = pp.sales_count - 1 "
+                         "FROM (SELECT a.product_id FROM sales_products a WHERE a.sale_id = ?) AS x "
+                         "WHERE (x.product_id = pp.product_id) AND (pp.sales_count > 0)")
+
+    def test_ddl(self):
+        statements = sqlite_backend.translate_ddl("""
+            -- comentario; con punto y coma
+            CREATE TABLE IF NOT EXISTS t (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                total DECIMAL(10, 2) NOT NULL,
+                updatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                INDEX idx_t_total (total)
+            );
+        """)
+        self.assertEqual(len(statements), 2)
+        self.assertIn("INTEGER PRIMARY KEY AUTOINCREMENT", statements[0])
+        self.assertIn("total REAL", statements[0])
+        self.assertNotIn("ON UPDATE", statements[0])
+        self.assertEqual(statements[1], "CREATE INDEX IF NOT EXISTS idx_t_total ON t (total)")
+
+
+class TestHandlersOnSQLite(unittest.TestCase):
+    def setUp(self):
+        self.path = "file:test_%d?mode=memory&cache=shared" % next(databases)
+        patcher = patch.dict(os.environ, {"DB_BACKEND": "sqlite", "DB_SQLITE_PATH": self.path, "DB_SQLITE_SEED": SEED})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(sqlite_backend.reset, self.path)
+        # Los handlers leen credenciales al importarse; con DB_BACKEND=sqlite no tocan Secrets Manager
+        self.app = lambda name: import_module(name + ".app")
+        self.app("end_of_day_balance").balance_cache.clear()
+
+    def query(self, sql, args=None):
+        connection = db.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(sql, args)
+            return cursor.fetchall()
+        finally:
+            connection.close()
+
+    def test_credentials_skip_secrets_manager(self):
+        def fetch():
+            raise AssertionError("Secrets Manager no debe llamarse")
+        self.assertEqual(db.load_credentials(fetch)["dbname"], self.path)
+
+    def test_end_of_day_balance_snapshots_closed_day(self):
+        result = self.app("end_of_day_balance").lambda_handler({"body": json.dumps({"date": "2024-07-19"})}, None)
+        balance = json.loads(result["body"])["balance"]
+        self.assertEqual(balance["total_sales_today"], 93.0)
+        self.assertEqual(balance["total_transactions_today"], 2)
+        self.assertEqual(balance["total_cancelled_transactions"], 1)
+        self.assertEqual(self.query("SELECT total_sales_today FROM daily_balance WHERE day = %s", ("2024-07-19",)),
+                         [(93.0,)])
+
+    def test_cancel_sale_updates_rollup_and_invalidates_snapshot(self):
+        self.app("end_of_day_balance").lambda_handler({"body": json.dumps({"date": "2024-07-19"})}, None)
+        result = self.app("cancel_sales").lambda_handler({"pathParameters": {"id": "1"}, "requestContext": admin}, None)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(self.query("SELECT status FROM sales WHERE id = 1"), [(0,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM daily_balance"), [(0,)])
+        hour = self.query("SELECT sales_count, revenue FROM sales_hourly")
+        self.assertEqual(hour, [(0, 0)])
+
+    def test_cancel_sale_decrements_its_pairs(self):
+        from common import cooccurrence
+        connection = db.connect()
+        try:
+            cooccurrence.rebuild(connection)
+        finally:
+            connection.close()
+        pairs = "SELECT product_id, companion_id, sales_count FROM product_pairs WHERE product_id = 1 ORDER BY companion_id"
+        self.assertEqual(self.query(pairs), [(1, 2, 1), (1, 4, 1), (1, 5, 2)])
+
+        self.app("cancel_sales").lambda_handler({"pathParameters": {"id": "1"}, "requestContext": admin}, None)
+        # La venta 1 tenía 1, 4 y 5; el par (1, 2) es de la venta 4
+        self.assertEqual(self.query(pairs), [(1, 2, 1), (1, 4, 0), (1, 5, 1)])
+        self.assertEqual(self.query("SELECT sales_count FROM product_pairs WHERE product_id = 5 AND companion_id = 4"), [(0,)])
+
+    def test_sales_heatmap(self):
+        event = {"queryStringParameters": {"start": "2024-07-19", "end": "2024-07-20"}}
+        body = json.loads(self.app("sales_heatmap").lambda_handler(event, None)["body"])
+        # 2024-07-19 es viernes (WEEKDAY 4) y 2024-07-20 sábado
+        self.assertEqual(body["count"][4][8], 1)
+        self.assertEqual(body["count"][4][9], 1)
+        self.assertEqual(body["count"][4][13], 0)
+        self.assertEqual(body["revenue"][5][8], 78.0)
+
+    def test_top_sold_products_per_category(self):
+        result = self.app("top_sold_products").lambda_handler({"body": json.dumps({"per_category": True, "limit": 1})}, None)
+        categories = json.loads(result["body"])["categories"]
+        self.assertEqual(result["statusCode"], 200)
+        # La venta cancelada (3) no cuenta; Temporada no tiene ventas
+        self.assertEqual([category["category_name"] for category in categories], ["Bebidas", "Panadería"])
+        self.assertEqual(categories[1]["products"], [{"product_id": 5, "product_name": "Cuernito", "total_quantity_sold": 2}])
+
+    def test_low_stock_forecast(self):
+        event = {"queryStringParameters": {"mode": "forecast"}}
+        result = self.app("get_low_stock_products").lambda_handler(event, None)
+        self.assertEqual(result["statusCode"], 200, result["body"])
+
+    def test_duplicate_category_maps_integrity_error(self):
+        with self.assertRaises(db.pymysql.err.IntegrityError) as context:
+            self.query("INSERT INTO categories (name, status) VALUES (%s, true)", ("Bebidas",))
+        self.assertEqual(context.exception.args[0], 1062)
+        result = self.app("save_category").lambda_handler({"body": json.dumps({"name": "Postres"}), "requestContext": admin}, None)
+        self.assertEqual(result["statusCode"], 200)
+        self.assertEqual(self.query("SELECT name FROM categories WHERE id = 4"), [("Postres",)])
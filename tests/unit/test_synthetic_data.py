@@ -0,0 +1,58 @@
+import unittest
+import os
+import random
+from datetime import date
+from unittest.mock import patch
+
+from benchmarks import synthetic_data
+from common import db, sqlite_backend
+
+
+class TestSyntheticData(unittest.TestCase):
+    def generate(self, lines, seed=7):
+        _, products = synthetic_data.catalog(random.Random(seed))
+        return list(synthetic_data.generate_sales(lines, products, days=30, end=date(2024, 7, 31), seed=seed))
+
+    def test_exact_line_count_and_deterministic(self):
+        sales = self.generate(2000)
+        self.assertEqual(sum(len(items) for _, items in sales), 2000)
+        self.assertEqual(sales, self.generate(2000))
+        self.assertNotEqual(sales, self.generate(2000, seed=8))
+
+    def test_sales_are_ordered_and_inside_opening_hours(self):
+        sales = self.generate(2000)
+        created = [sale[3] for sale, _ in sales]
+        self.assertEqual(created, sorted(created))
+        self.assertEqual([sale[0] for sale, _ in sales], list(range(1, len(sales) + 1)))
+        self.assertTrue(all(7 <= moment.hour <= 21 for moment in created))
+        self.assertEqual(created[-1].date(), date(2024, 7, 31))
+
+    def test_day_quotas_add_up(self):
+        quotas = list(synthetic_data.day_quotas(12345, 400, date(2024, 12, 31)))
+        self.assertEqual(len(quotas), 400)
+        self.assertEqual(sum(quota for _, quota in quotas), 12345)
+
+    def test_load_refuses_non_empty_database(self):
+        path = "file:synthetic_test?mode=memory&cache=shared"
+        self.addCleanup(sqlite_backend.reset, path)
+        with patch.dict(os.environ, {"DB_SQLITE_SEED": ""}):
+            connection = sqlite_backend.connect(path)
+        try:
+            sales = synthetic_data.load(connection, 500, days=10, end=date(2024, 7, 31))
+            cursor = connection.cursor()
+            cursor.execute("SELECT COUNT(*) FROM sales_products")
+            self.assertEqual(cursor.fetchone()[0], 500)
+            cursor.execute("SELECT COUNT(*) FROM sales")
+            self.assertEqual(cursor.fetchone()[0], sales)
+            with self.assertRaises(ValueError):
+                synthetic_data.load(connection, 500)
+        finally:
+            connection.close()
+
+    def test_direct_credentials_skip_secrets_manager(self):
+        env = {"DB_HOST": "bench.local", "DB_USER": "bench", "DB_PASSWORD": "secret", "DB_NAME": "cafe_balu_bench"}
+        with patch.dict(os.environ, env):
+            os.environ.pop("DB_BACKEND", None)
+            credentials = db.load_credentials(None)
+        self.assertEqual(credentials, {"host": "bench.local", "username": "bench", "password": "secret",
+                                       "dbname": "cafe_balu_bench"})
@@ -25,6 +25,19 @@ mock_category_not_found = {
     })
 }
 
+mock_per_category = {
+    "body": json.dumps({
+        "per_category": True,
+        "limit": 2
+    })
+}
+
+mock_invalid_limit = {
+    "body": json.dumps({
+        "limit": 0
+    })
+}
+
 class TestTopSoldProducts(unittest.TestCase):
     def test_top_sold_products_no_category(self):
         result = app.lambda_handler(mock_no_category, None)
@@ -68,7 +81,7 @@ class TestTopSoldProducts(unittest.TestCase):
         with self.assertRaises(ClientError):
             app.get_secret()
 
-    @patch("top_sold_products.app.pymysql.connect")
+    @patch("top_sold_products.app.db.connect")
     def test_connect_to_database_mysql_exception(self, mock_connect):
         # Simula una excepción MySQLError cuando se intenta conectar a la base de datos
         mock_connect.side_effect = pymysql.MySQLError("Simulated MySQL connection error")
@@ -78,4 +91,43 @@ class TestTopSoldProducts(unittest.TestCase):
 
         # Verifica que la excepción levantada contiene el mensaje esperado
         self.assertIn("ERROR CONNECTING TO DATABASE", str(context.exception))
-        self.assertIn("Simulated MySQL connection error", str(context.exception))
\ No newline at end of file
+        self.assertIn("Simulated MySQL connection error", str(context.exception))
+
+    @patch("top_sold_products.app.connect_to_database")
+    def test_top_sold_products_per_category(self, mock_connect_to_database):
+        mock_connection = mock_connect_to_database.return_value
+        mock_cursor = mock_connection.cursor.return_value
+        mock_cursor.fetchall.return_value = [
+            (1, "Bebidas", 10, "Cafe", 30),
+            (1, "Bebidas", 11, "Te", 12),
+            (2, "Postres", 20, "Pastel", 8),
+        ]
+
+        result = app.lambda_handler(mock_per_category, None)
+        self.assertEqual(result["statusCode"], 200)
+        body = json.loads(result["body"])
+        self.assertEqual(len(body["categories"]), 2)
+        self.assertEqual(body["categories"][0]["products"][1]["product_name"], "Te")
+        # Una sola consulta y la conexión se cierra
+        mock_cursor.execute.assert_called_once()
+        self.assertIn("ROW_NUMBER()", mock_cursor.execute.call_args[0][0])
+        self.assertEqual(mock_cursor.execute.call_args[0][1], (2,))
+        mock_connection.close.assert_called_once()
+
+    def test_top_sold_products_invalid_limit(self):
+        result = app.lambda_handler(mock_invalid_limit, None)
+        self.assertEqual(result["statusCode"], 400)
+        body = json.loads(result["body"])
+        self.assertEqual(body["message"], "INVALID_LIMIT")
+
+    @patch("top_sold_products.app.connect_to_database")
+    def test_top_sold_products_category_check_reuses_connection(self, mock_connect_to_database):
+        mock_connection = mock_connect_to_database.return_value
+        mock_cursor = mock_connection.cursor.return_value
+        mock_cursor.fetchone.return_value = (1,)
+        mock_cursor.fetchall.return_value = []
+
+        result = app.lambda_handler(mock_category, None)
+        self.assertEqual(result["statusCode"], 200)
+        mock_connect_to_database.assert_called_once()
+        mock_connection.close.assert_called_once()
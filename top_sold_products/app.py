@@ -3,6 +3,7 @@ import pymysql
 from decimal import Decimal
 import boto3
 from botocore.exceptions import ClientError
+from common import db, instrumentation, query_governor, single_flight
 
 def get_secret():
     secret_name = "secretsForBalu"
@@ -28,12 +29,20 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
 rds_db = secrets["dbname"]
+# Réplicas de lectura opcionales; ver db.connect_read
+rds_replicas = db.replica_hosts(secrets)
 
+TOP_LIMIT = 10
+MAX_TOP_LIMIT = 50
+
+@instrumentation.instrument("top_sold_products")
+@single_flight.coalesce("top_sold_products")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
@@ -41,31 +50,73 @@ def lambda_handler(event, __):
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
     try:
-       category = None
+       body = {}
        if 'body' in event:
-           if 'category' in json.loads(event['body']):
-            category = json.loads(event['body']).get('category')
-
-       if category != None:
-            if not category_exists(category):
-                return {
-                    "statusCode": 404,
-                    "headers": headers,
-                    "body": json.dumps({
-                        "message": "CATEGORY_NOT_FOUND"
-                    }),
-                }
-       top_products = get_top_sold_products(category)
+           body = json.loads(event['body'])
+       category = body.get('category')
+       per_category = body.get('per_category') is True
+       limit = body.get('limit', TOP_LIMIT)
+
+       if not isinstance(limit, int) or isinstance(limit, bool) or limit < 1 or limit > MAX_TOP_LIMIT:
+           return {
+               "statusCode": 400,
+               "headers": headers,
+               "body": json.dumps({
+                   "message": "INVALID_LIMIT"
+               }),
+           }
+
+       # Una sola conexión para la validación y la consulta
+       connection = connect_to_database()
+       try:
+           cursor = connection.cursor()
+           report = ("top_sold_products", category, per_category, limit)
+           field = "categories" if per_category else "product"
+           try:
+               if per_category:
+                   top_products = get_top_sold_products_per_category(cursor, limit)
+               else:
+                   if category != None:
+                       if not category_exists(cursor, category):
+                           return {
+                               "statusCode": 404,
+                               "headers": headers,
+                               "body": json.dumps({
+                                   "message": "CATEGORY_NOT_FOUND"
+                               }),
+                           }
+                   top_products = get_top_sold_products(cursor, category, limit)
+           except pymysql.MySQLError as e:
+               if not query_governor.is_timeout(e):
+                   raise
+               # La consulta pasó el límite de query_governor: el último reporte igual, si hay
+               cached = query_governor.last_report(report)
+               if cached is None:
+                   return query_governor.timeout_response(headers)
+               return {
+                   "statusCode": 200,
+                   "headers": headers,
+                   "body": instrumentation.dumps({
+                       "message": "PRODUCTS_FETCHED",
+                       field: cached[0],
+                       "stale": True,
+                       "age_seconds": cached[1]
+                   }, default=decimal_to_float)
+               }
+       finally:
+           connection.close()
+
+       query_governor.remember(report, top_products)
        return {
             "statusCode": 200,
             "headers": headers,
-            "body": json.dumps({
+            "body": instrumentation.dumps({
                 "message": "PRODUCTS_FETCHED",
-                "product": top_products
+                field: top_products
             }, default=decimal_to_float)
        }
-        
-        
+
+
     except Exception as e:
         return {
             "statusCode": 500,
@@ -76,10 +127,8 @@ def lambda_handler(event, __):
             }),
         }
 
-def get_top_sold_products(category):
-    connection = connect_to_database()
-    cursor = connection.cursor()
-    
+def get_top_sold_products(cursor, category, limit=TOP_LIMIT):
+    # Se agrupa por p.id (PK) en lugar de p.name: usa el índice y no mezcla productos con el mismo nombre
     if category == None:
         cursor.execute("""
         SELECT
@@ -97,10 +146,10 @@ def get_top_sold_products(category):
             WHERE
                 s.status = 1
             GROUP BY
-                p.name, c.name
+                p.id, p.name, c.name
             ORDER BY
                 total_quantity_sold DESC
-            LIMIT 10;""", ())
+            LIMIT %s;""", (limit,))
     else:
         cursor.execute("""
         SELECT
@@ -118,26 +167,77 @@ def get_top_sold_products(category):
             WHERE
                 s.status = 1 AND c.id = %s
             GROUP BY
-                p.name, c.name
+                p.id, p.name, c.name
             ORDER BY
                 total_quantity_sold DESC
-            LIMIT 10;""", (category,))
-    
+            LIMIT %s;""", (category, limit))
+
     result = cursor.fetchall()
-    result = [dict(zip([column[0] for column in cursor.description], row)) for row in result]
+    columns = [column[0] for column in cursor.description]
+    result = [dict(zip(columns, row)) for row in result]
     return result
 
-def category_exists(category):
-    connection = connect_to_database()
-    cursor = connection.cursor()
-    cursor.execute("select * from categories where id = %s", (category))
+def get_top_sold_products_per_category(cursor, limit=TOP_LIMIT):
+    # Top N de todas las categorías en una sola consulta con ROW_NUMBER()
+    cursor.execute("""
+        SELECT
+            category_id,
+            category_name,
+            product_id,
+            product_name,
+            total_quantity_sold
+        FROM (
+            SELECT
+                c.id AS category_id,
+                c.name AS category_name,
+                p.id AS product_id,
+                p.name AS product_name,
+                SUM(sp.quantity) AS total_quantity_sold,
+                ROW_NUMBER() OVER (
+                    PARTITION BY p.category_id
+                    ORDER BY SUM(sp.quantity) DESC, p.id
+                ) AS position
+            FROM
+                sales_products sp
+            JOIN
+                products p ON sp.product_id = p.id
+            JOIN
+                categories c ON p.category_id = c.id
+            JOIN
+                sales s ON sp.sale_id = s.id
+            WHERE
+                s.status = 1
+            GROUP BY
+                p.id, p.name, p.category_id, c.id, c.name
+        ) ranked
+        WHERE
+            position <= %s
+        ORDER BY
+            category_id, position;""", (limit,))
+
+    categories = []
+    for category_id, category_name, product_id, product_name, total_quantity_sold in cursor.fetchall():
+        if not categories or categories[-1]["category_id"] != category_id:
+            categories.append({
+                "category_id": category_id,
+                "category_name": category_name,
+                "products": []
+            })
+        categories[-1]["products"].append({
+            "product_id": product_id,
+            "product_name": product_name,
+            "total_quantity_sold": total_quantity_sold
+        })
+    return categories
+
+def category_exists(cursor, category):
+    cursor.execute("select id from categories where id = %s", (category,))
     result = cursor.fetchone()
-    connection.close()
     return result != None
 
 def connect_to_database():
     try:
-        connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+        connection = instrumentation.connect(db.connect_read, rds_replicas, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
         return connection
     except pymysql.MySQLError as e:
         raise Exception("ERROR CONNECTING TO DATABASE: " + str(e))
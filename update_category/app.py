@@ -1,8 +1,8 @@
 import json
-import pymysql
 import logging
 import boto3
 from botocore.exceptions import ClientError
+from common import auth, db, instrumentation
 
 def get_secret():
     secret_name = "secretsForBalu"
@@ -28,7 +28,8 @@ def get_secret():
     return json.loads(secret)
 
 # Obtener las credenciales desde Secrets Manager
-secrets = get_secret()
+with instrumentation.phase("secret"):
+    secrets = db.load_credentials(get_secret)
 rds_host = secrets["host"]
 rds_user = secrets["username"]
 rds_password = secrets["password"]
@@ -38,14 +39,18 @@ logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 
+@instrumentation.instrument("update_category")
 def lambda_handler(event, __):
     headers = {
         "Access-Control-Allow-Origin": "*",
         "Access-Control-Allow-Methods": "PUT, OPTIONS",
         "Access-Control-Allow-Headers": "Content-Type, X-Amz-Date, Authorization, X-Api-Key, X-Amz-Security-Token"
     }
+    # Las dos verificaciones y el UPDATE comparten una conexión
+    shared = db.SharedConnection(open_connection)
     try:
-        claims = event['requestContext']['authorizer']['claims']
+        # Claims del autorizador de API Gateway o, sin él, del JWT verificado localmente
+        claims = auth.get_claims(event)
         role = claims['cognito:groups']
 
         if 'admin' not in role:
@@ -98,8 +103,7 @@ def lambda_handler(event, __):
 
         id = int(id)
         newName = newName.strip()
-        exist = category_exist(id)
-        if category_exist(id) is False:
+        if category_exist(id, shared) is False:
                 logger.error("Category not found for id=%s", id)
                 return {
                     "statusCode": 404,
@@ -109,7 +113,7 @@ def lambda_handler(event, __):
                     }),
                 }
 
-        if duplicated_name(newName) is True:
+        if duplicated_name(newName, shared) is True:
             logger.error("Category already exists: newName=%s", newName)
             return {
                 "statusCode": 400,
@@ -119,7 +123,7 @@ def lambda_handler(event, __):
                 }),
             }
 
-        update_category(id, newName, headers)
+        update_category(id, newName, headers, shared)
 
         logger.info("Category updated successfully: id=%s, newName=%s", id, newName)
 
@@ -130,6 +134,15 @@ def lambda_handler(event, __):
                 "message": "CATEGORY_UPDATED",
             }),
         }
+    except auth.AuthError as e:
+        return {
+            "statusCode": 401,
+            "headers": headers,
+            "body": json.dumps({
+                "message": "UNAUTHORIZED",
+                "error": str(e)
+            }),
+        }
     except KeyError as e:
         logger.error("Missing key in event: %s", str(e))
         return {
@@ -150,10 +163,16 @@ def lambda_handler(event, __):
                 "error": str(e)
             }),
         }
+    finally:
+        shared.close()
+
+
+def open_connection():
+    return instrumentation.connect(db.connect, host=rds_host, user=rds_user, password=rds_password, db=rds_db)
 
 
-def update_category(id, newName, headers):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+def update_category(id, newName, headers, shared=None):
+    connection = shared.get() if shared else open_connection()
     try:
         try:
             cursor = connection.cursor()
@@ -178,10 +197,11 @@ def update_category(id, newName, headers):
             }),
         }
     finally:
-        connection.close()
+        if shared is None:
+            connection.close()
 
-def category_exist(id):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+def category_exist(id, shared=None):
+    connection = shared.get() if shared else open_connection()
     try:
         try:
             cursor = connection.cursor()
@@ -200,10 +220,11 @@ def category_exist(id):
         logger.error("Database connection error: %s", str(e))
         return False
     finally:
-        connection.close()
+        if shared is None:
+            connection.close()
 
-def duplicated_name(newName):
-    connection = pymysql.connect(host=rds_host, user=rds_user, password=rds_password, db=rds_db)
+def duplicated_name(newName, shared=None):
+    connection = shared.get() if shared else open_connection()
     try:
         try:
             cursor = connection.cursor()
@@ -220,4 +241,5 @@ def duplicated_name(newName):
         logger.error("Database connection error: %s", str(e))
         return False
     finally:
-        connection.close()
\ No newline at end of file
+        if shared is None:
+            connection.close()
\ No newline at end of file